@@ -3,18 +3,36 @@ AI School Backend Server
 Main Flask application for user authentication with Azure Table Storage
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Blueprint, request, jsonify, Response, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import bcrypt
 import jwt
 import datetime
 import os
 import logging
-import logging.handlers
 from dotenv import load_dotenv
-from azure.data.tables import TableServiceClient, TableClient
-from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+from azure.data.tables import TableTransactionError, UpdateMode
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError, ResourceModifiedError
+from storage import (
+    CountingTableClient, WriteBehindQueue, TTLCache, LatencyModel, TableProvisioner,
+    create_table_service, start_request_stats, current_request_stats
+)
+from config import Config
+from serialization import (
+    fast_json, EncodedBody, choose_encoding, compress, encoded_etag, etag_variants, should_compress
+)
+from models import (
+    PROGRESS_PATCH_ATTEMPTS, UPDATABLE_FIELDS, InvalidProgressEvents, InvalidProgressPatch, ProgressPreconditionFailed,
+    aggregate_events, apply_progress_patch, build_changes, changes_query, decode_change_token, kid_profile_from_entity,
+    lost_to_concurrent_write, new_kid_profile_entity, progress_etag, progress_update_operations, transaction_chunks
+)
+from auth import password_pool, PasswordHasherBusy
+from observability import start_queue_logging, RequestLogger, RequestLogFormatter
+from observability.timing import span, start_request_timings, current_request_timings
+from observability.metrics import HTTP_REQUESTS_IN_FLIGHT, METRICS_AVAILABLE, observe_request, render_metrics
 import uuid
+import hashlib
 import traceback
 import sys
 
@@ -36,19 +54,21 @@ def setup_session_logging():
     # Create log filename with session ID
     log_filename = os.path.join(logs_dir, f"ai_school_{session_id}.log")
     
-    # Configure root logger
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
-        handlers=[
-            logging.FileHandler(log_filename, encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)  # Also log to console
-        ]
-    )
+    # File and console I/O happen on a listener thread; request threads only
+    # enqueue records, and drop them if the bounded queue is full
+    formatter = RequestLogFormatter('%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s')
+    handlers = [
+        logging.FileHandler(log_filename, encoding='utf-8'),
+        logging.StreamHandler(sys.stdout)  # Also log to console
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_level = getattr(logging, Config.LOG_LEVEL, logging.INFO)
+    start_queue_logging(handlers, max_records=Config.LOG_QUEUE_MAX_RECORDS, level=log_level)
     
     # Create application logger
     app_logger = logging.getLogger('ai_school')
-    app_logger.setLevel(logging.DEBUG)
+    app_logger.setLevel(log_level)
     
     # Log session start
     app_logger.info(f"=== AI School Backend Server Session Started ===")
@@ -62,80 +82,112 @@ def setup_session_logging():
 # Initialize session logging
 logger, current_log_file = setup_session_logging()
 
-app = Flask(__name__)
-CORS(app)
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider using orjson when enabled, reporting serialization time as the json span"""
+
+    def dumps(self, obj, **kwargs):
+        with span('json'):
+            # Pretty printing (debug mode) stays with the stdlib
+            if fast_json.ENABLED and 'indent' not in kwargs:
+                return fast_json.dumps(obj, default=self.default, sort_keys=self.sort_keys).decode('utf-8')
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if fast_json.ENABLED and not kwargs:
+            return fast_json.loads(s)
+        return super().loads(s, **kwargs)
+
+# Routes and request hooks; create_app() registers them on a Flask app
+api = Blueprint('api', __name__)
 
 # Configuration
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-this')
+SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-this')
 AZURE_STORAGE_CONNECTION_STRING = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
 
 logger.info("Starting application configuration...")
-logger.info(f"SECRET_KEY configured: {'Yes' if app.config['SECRET_KEY'] != 'your-secret-key-change-this' else 'No (using default)'}")
+logger.info(f"SECRET_KEY configured: {'Yes' if SECRET_KEY != 'your-secret-key-change-this' else 'No (using default)'}")
 logger.info(f"AZURE_STORAGE_CONNECTION_STRING configured: {'Yes' if AZURE_STORAGE_CONNECTION_STRING else 'No'}")
 
-if not AZURE_STORAGE_CONNECTION_STRING:
+if not AZURE_STORAGE_CONNECTION_STRING and Config.STORAGE_BACKEND == 'azure':
     logger.error("AZURE_STORAGE_CONNECTION_STRING environment variable is required")
     raise ValueError("AZURE_STORAGE_CONNECTION_STRING environment variable is required")
 
 # Azure Table Storage setup
-logger.info("Initializing Azure Table Storage...")
-table_service_client = TableServiceClient.from_connection_string(AZURE_STORAGE_CONNECTION_STRING)
+logger.info(f"Initializing table storage (backend: {Config.STORAGE_BACKEND})...")
+table_service_client = create_table_service(
+    AZURE_STORAGE_CONNECTION_STRING,
+    backend=Config.STORAGE_BACKEND,
+    latency=LatencyModel.parse(Config.MEMORY_STORAGE_LATENCY_MS, Config.MEMORY_STORAGE_JITTER_MS)
+)
 users_table_name = "users"
-kids_profiles_table_name = "kidsprofiles"
-
-logger.info(f"Setting up table: {users_table_name}")
-# Create users table if it doesn't exist
-try:
-    table_service_client.create_table(users_table_name)
-    logger.info(f"✓ Table '{users_table_name}' created or already exists")
-    print(f"✓ Table '{users_table_name}' created or already exists")
-except ResourceExistsError:
-    logger.info(f"✓ Table '{users_table_name}' already exists")
-    print(f"✓ Table '{users_table_name}' already exists")
-except Exception as e:
-    logger.error(f"Failed to create/access table '{users_table_name}': {e}")
-    logger.error(f"Traceback: {traceback.format_exc()}")
-    raise
-
-logger.info(f"Setting up table: {kids_profiles_table_name}")
-# Create kids profiles table if it doesn't exist
-try:
-    table_service_client.create_table(kids_profiles_table_name)
-    logger.info(f"✓ Table '{kids_profiles_table_name}' created or already exists")
-    print(f"✓ Table '{kids_profiles_table_name}' created or already exists")
-except ResourceExistsError:
-    logger.info(f"✓ Table '{kids_profiles_table_name}' already exists")
-    print(f"✓ Table '{kids_profiles_table_name}' already exists")
-except Exception as e:
-    logger.error(f"Failed to create/access table '{kids_profiles_table_name}': {e}")
-    logger.error(f"Traceback: {traceback.format_exc()}")
-    raise
+kids_profiles_table_name = Config.KIDS_PROFILES_TABLE_NAME
+
+# Tables are created on first use (or skipped, see STORAGE_TABLES_PROVISIONED),
+# not at import, so a starting worker answers liveness probes immediately
+table_provisioner = TableProvisioner(
+    table_service_client,
+    (users_table_name, kids_profiles_table_name),
+    skip=Config.STORAGE_TABLES_PROVISIONED
+)
 
 logger.info("Creating table clients...")
-users_table_client = TableClient.from_connection_string(AZURE_STORAGE_CONNECTION_STRING, users_table_name)
-kids_profiles_table_client = TableClient.from_connection_string(AZURE_STORAGE_CONNECTION_STRING, kids_profiles_table_name)
-logger.info("Azure Table Storage setup completed successfully")
+users_table_client = CountingTableClient(table_service_client.get_table_client(users_table_name))
+kids_profiles_table_client = CountingTableClient(table_service_client.get_table_client(kids_profiles_table_name))
+logger.info("Table storage clients ready; tables are provisioned on first use")
+
+# Per-process caches, off while several worker processes would each keep
+# their own stale copy (see Config.PROCESS_CACHES)
+process_caches = Config.process_caches_enabled()
+if not process_caches:
+    logger.info(f"User and profile list caches disabled ({Config.WEB_PROCESSES} worker processes)")
+
+# Recently read users, keyed by email; invalidated by every user write
+user_cache = TTLCache(Config.USER_CACHE_MAX_ENTRIES if process_caches else 0, Config.USER_CACHE_TTL_SECONDS,
+                      name='users')
+
+# Serialized profile list responses (EncodedBody: ETag and compressed
+# variants), keyed by parent user_id; invalidated by every kid profile write
+profile_list_cache = TTLCache(
+    Config.PROFILE_LIST_CACHE_MAX_ENTRIES if process_caches else 0,
+    Config.PROFILE_LIST_CACHE_TTL_SECONDS,
+    name='profile_lists'
+)
+
+# Structured per-request log lines, sampled for successful requests
+request_logger = RequestLogger(Config.REQUEST_LOG_SAMPLE_RATE, Config.REQUEST_LOG_SLOW_MS)
+
+# Timestamp updates are written in the background, off the request path
+write_behind = WriteBehindQueue(
+    flush_interval=Config.WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+    max_pending=Config.WRITE_BEHIND_MAX_PENDING
+)
 
 # Helper functions
 def hash_password(password):
-    """Hash a password using bcrypt"""
+    """Hash a password using bcrypt on the bounded password pool"""
     logger.debug("Hashing password")
     try:
-        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed = password_pool.hash_password(password)
         logger.debug("Password hashed successfully")
         return hashed
+    except PasswordHasherBusy:
+        logger.warning("Password pool saturated, rejecting hash request")
+        raise
     except Exception as e:
         logger.error(f"Error hashing password: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise
 
 def verify_password(password, hashed_password):
-    """Verify a password against its hash"""
+    """Verify a password against its hash on the bounded password pool"""
     logger.debug("Verifying password")
     try:
-        result = bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
-        logger.debug(f"Password verification result: {result}")
+        result = password_pool.verify_password(password, hashed_password)
+        logger.debug("Password verification result: %s", result)
         return result
+    except PasswordHasherBusy:
+        logger.warning("Password pool saturated, rejecting verify request")
+        raise
     except Exception as e:
         logger.error(f"Error verifying password: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
@@ -143,7 +195,7 @@ def verify_password(password, hashed_password):
 
 def generate_jwt_token(user_id, email):
     """Generate JWT token for authenticated user"""
-    logger.debug(f"Generating JWT token for user: {email}")
+    logger.debug("Generating JWT token for user: %s", email)
     try:
         payload = {
             'user_id': user_id,
@@ -151,8 +203,11 @@ def generate_jwt_token(user_id, email):
             'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24),
             'iat': datetime.datetime.utcnow()
         }
-        token = jwt.encode(payload, app.config['SECRET_KEY'], algorithm='HS256')
-        logger.info(f"JWT token generated successfully for user: {email}")
+        with span('jwt'):
+            token = jwt.encode(payload, SECRET_KEY, algorithm='HS256')
+        if has_request_context():
+            g.user_id = user_id
+        logger.debug("JWT token generated successfully for user: %s", email)
         return token
     except Exception as e:
         logger.error(f"Error generating JWT token for user {email}: {e}")
@@ -163,8 +218,11 @@ def verify_jwt_token(token):
     """Verify and decode JWT token"""
     logger.debug("Verifying JWT token")
     try:
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-        logger.debug(f"JWT token verified successfully for user: {payload.get('email', 'unknown')}")
+        with span('jwt'):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        logger.debug("JWT token verified successfully for user: %s", payload.get('email', 'unknown'))
+        if has_request_context():
+            g.user_id = payload.get('user_id')
         return payload
     except jwt.ExpiredSignatureError:
         logger.warning("JWT token verification failed: Token expired")
@@ -179,24 +237,28 @@ def verify_jwt_token(token):
 
 def get_user_by_email(email):
     """Get user from Azure Table Storage by email"""
-    logger.debug(f"Querying user by email: {email}")
+    logger.debug("Querying user by email: %s", email)
+    cached = user_cache.get(email)
+    if cached is not None:
+        logger.debug("User cache hit: %s", email)
+        return cached
     try:
         # Use email as partition key for efficient querying
         entities = users_table_client.query_entities(f"PartitionKey eq '{email}'")
         for entity in entities:
-            logger.info(f"User found: {email}")
+            logger.debug("User found: %s", email)
+            user_cache.set(email, entity)
             return entity
-        logger.info(f"User not found: {email}")
+        logger.debug("User not found: %s", email)
         return None
     except Exception as e:
         logger.error(f"Error querying user {email}: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"Error querying user: {e}")
         return None
 
 def create_user(email, password, full_name, phone_number=None):
     """Create a new user in Azure Table Storage"""
-    logger.info(f"Creating new user: {email}")
+    logger.debug("Creating new user: %s", email)
     try:
         user_id = str(uuid.uuid4())
         user_entity = {
@@ -212,103 +274,120 @@ def create_user(email, password, full_name, phone_number=None):
         }
         
         users_table_client.create_entity(user_entity)
-        logger.info(f"User created successfully: {email} (ID: {user_id})")
+        user_cache.invalidate(email)
+        logger.debug("User created successfully: %s (ID: %s)", email, user_id)
         return user_entity
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
         logger.error(f"Error creating user {email}: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"Error creating user: {e}")
         return None
 
-def update_last_login(email):
-    """Update user's last login timestamp"""
-    logger.debug(f"Updating last login for user: {email}")
+def update_last_login(user):
+    """Queue a last login timestamp update for an already loaded user entity
+    
+    The merge touches only last_login and is written by the write-behind
+    queue, so login costs no extra read and no synchronous write. The cached
+    user is dropped once the merge is written; dropping it earlier would let
+    a read in between cache the entity without the new last_login.
+    """
+    email = user['email']
+    logger.debug("Updating last login for user: %s", email)
     try:
-        user = get_user_by_email(email)
-        if user:
-            user['last_login'] = datetime.datetime.utcnow().isoformat()
-            users_table_client.update_entity(user, mode='merge')
-            logger.info(f"Last login updated for user: {email}")
+        write_behind.merge(
+            users_table_client,
+            user['PartitionKey'],
+            user['RowKey'],
+            {'last_login': datetime.datetime.utcnow().isoformat()},
+            on_flushed=lambda: user_cache.invalidate(email)
+        )
+        logger.debug("Last login update queued for user: %s", email)
     except Exception as e:
         logger.error(f"Error updating last login for user {email}: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"Error updating last login: {e}")
+
+def upgrade_password_hash(user, password):
+    """Re-hash a just verified password at the configured bcrypt cost
+    
+    Runs in the background after login. The write is conditional on the
+    ETag the user was read with, so a concurrent password change is never
+    overwritten; a skipped upgrade is retried on the next login.
+    """
+    email = user['email']
+    etag = getattr(user, 'metadata', {}).get('etag')
+    if not etag:
+        return
+
+    def store(new_hash):
+        try:
+            users_table_client.update_entity(
+                {'PartitionKey': user['PartitionKey'], 'RowKey': user['RowKey'], 'password_hash': new_hash},
+                mode=UpdateMode.MERGE,
+                etag=etag,
+                match_condition=MatchConditions.IfNotModified
+            )
+            user_cache.invalidate(email)
+            logger.debug("Password hash upgraded to cost %s for user: %s", password_pool.rounds, email)
+        except ResourceModifiedError:
+            logger.debug("Password hash upgrade skipped, user changed meanwhile: %s", email)
+
+    password_pool.rehash_in_background(password, store)
 
 # Kids Profile Functions
 
 def create_kid_profile(user_id, name, age, grade=None, avatar=None, learning_goals=None):
     """Create a new kid profile for a user"""
-    logger.info(f"Creating kid profile for user {user_id}: {name}, age {age}")
+    logger.debug("Creating kid profile for user %s: %s, age %s", user_id, name, age)
     try:
-        profile_id = str(uuid.uuid4())
-        kid_profile = {
-            "PartitionKey": user_id,  # Using user_id as partition key
-            "RowKey": profile_id,     # Using UUID as row key
-            "user_id": user_id,
-            "name": name,
-            "age": age,
-            "grade": grade or "",
-            "avatar": avatar or "default",
-            "learning_goals": learning_goals or "",
-            "created_at": datetime.datetime.utcnow().isoformat(),
-            "last_activity": None,
-            "progress": "{}",  # JSON string to store progress data
-            "is_active": True
-        }
+        kid_profile = new_kid_profile_entity(user_id, name, age, grade, avatar, learning_goals)
+        profile_id = kid_profile["RowKey"]
         
         kids_profiles_table_client.create_entity(kid_profile)
-        logger.info(f"Kid profile created successfully: {name} (ID: {profile_id})")
+        profile_list_cache.invalidate(user_id)
+        logger.debug("Kid profile created successfully: %s (ID: %s)", name, profile_id)
         return kid_profile
     except Exception as e:
         logger.error(f"Error creating kid profile for user {user_id}: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"Error creating kid profile: {e}")
         return None
 
 def get_kids_profiles_by_user(user_id):
-    """Get all kids profiles for a specific user"""
-    logger.debug(f"Getting kids profiles for user: {user_id}")
+    """Get all kids profiles for a specific user, None if the query failed"""
+    logger.debug("Getting kids profiles for user: %s", user_id)
     try:
         entities = kids_profiles_table_client.query_entities(f"PartitionKey eq '{user_id}' and is_active eq true")
-        profiles = []
-        for entity in entities:
-            profiles.append({
-                'id': entity['RowKey'],
-                'name': entity['name'],
-                'age': entity['age'],
-                'grade': entity['grade'],
-                'avatar': entity['avatar'],
-                'learning_goals': entity['learning_goals'],
-                'created_at': entity['created_at'],
-                'last_activity': entity.get('last_activity'),
-                'progress': entity.get('progress', '{}')
-            })
-        logger.info(f"Retrieved {len(profiles)} kids profiles for user: {user_id}")
+        profiles = [kid_profile_from_entity(entity) for entity in entities]
+        logger.debug("Retrieved %s kids profiles for user: %s", len(profiles), user_id)
         return profiles
     except Exception as e:
         logger.error(f"Error getting kids profiles for user {user_id}: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"Error getting kids profiles: {e}")
-        return []
+        return None
+
+def get_kids_profile_changes(user_id, since):
+    """Profiles of a user written since a change token's Timestamp (all of them if None), None if the query failed"""
+    logger.debug("Getting kids profile changes for user %s since %s", user_id, since)
+    try:
+        query_filter, parameters = changes_query(user_id, since)
+        entities = kids_profiles_table_client.query_entities(query_filter, parameters=parameters)
+        changes = build_changes(entities, since)
+        logger.debug("Retrieved %s changed and %s deleted kids profiles for user: %s",
+                     len(changes['profiles']), len(changes['deleted']), user_id)
+        return changes
+    except Exception as e:
+        logger.error(f"Error getting kids profile changes for user {user_id}: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return None
 
 def get_kid_profile_by_id(user_id, profile_id):
     """Get a specific kid profile by ID"""
-    logger.debug(f"Getting kid profile {profile_id} for user {user_id}")
+    logger.debug("Getting kid profile %s for user %s", profile_id, user_id)
     try:
         entity = kids_profiles_table_client.get_entity(partition_key=user_id, row_key=profile_id)
         if entity and entity.get('is_active', True):
-            profile = {
-                'id': entity['RowKey'],
-                'name': entity['name'],
-                'age': entity['age'],
-                'grade': entity['grade'],
-                'avatar': entity['avatar'],
-                'learning_goals': entity['learning_goals'],
-                'created_at': entity['created_at'],
-                'last_activity': entity.get('last_activity'),
-                'progress': entity.get('progress', '{}')
-            }
-            logger.info(f"Kid profile retrieved: {entity['name']} (ID: {profile_id})")
+            profile = kid_profile_from_entity(entity)
+            logger.debug("Kid profile retrieved: %s (ID: %s)", entity['name'], profile_id)
             return profile
         logger.warning(f"Kid profile not found or inactive: {profile_id}")
         return None
@@ -318,115 +397,258 @@ def get_kid_profile_by_id(user_id, profile_id):
     except Exception as e:
         logger.error(f"Error getting kid profile {profile_id}: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"Error getting kid profile: {e}")
         return None
 
 def update_kid_profile(user_id, profile_id, update_data):
     """Update a kid profile"""
-    logger.info(f"Updating kid profile {profile_id} for user {user_id}")
-    logger.debug(f"Update data: {update_data}")
+    logger.debug("Updating kid profile %s for user %s", profile_id, user_id)
+    logger.debug("Update data: %s", update_data)
     try:
         entity = kids_profiles_table_client.get_entity(partition_key=user_id, row_key=profile_id)
         if entity and entity.get('is_active', True):
             # Update allowed fields
-            allowed_fields = ['name', 'age', 'grade', 'avatar', 'learning_goals', 'progress']
             updated_fields = []
-            for field in allowed_fields:
+            for field in UPDATABLE_FIELDS:
                 if field in update_data:
                     old_value = entity.get(field)
                     entity[field] = update_data[field]
                     updated_fields.append(f"{field}: {old_value} -> {update_data[field]}")
             
             kids_profiles_table_client.update_entity(entity, mode='merge')
-            logger.info(f"Kid profile updated successfully. Changes: {', '.join(updated_fields)}")
+            profile_list_cache.invalidate(user_id)
+            logger.debug("Kid profile updated successfully. Changes: %s", ', '.join(updated_fields))
             return True
         logger.warning(f"Kid profile not found or inactive for update: {profile_id}")
         return False
     except Exception as e:
         logger.error(f"Error updating kid profile {profile_id}: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"Error updating kid profile: {e}")
         return False
 
+def patch_kid_progress(user_id, profile_id, patch, if_match=None):
+    """Apply a JSON merge patch to a kid's progress
+    
+    Read, patch and write back conditionally on the entity ETag; a write that
+    lost to a concurrent one is redone on the fresh entity, so patches to
+    different keys all land. With if_match (werkzeug ETags from If-Match) the
+    progress must still have one of those ETags, else
+    ProgressPreconditionFailed. Returns the stored progress, None if the
+    profile is missing or inactive; ResourceModifiedError once the attempts
+    run out.
+    """
+    logger.debug("Patching progress of kid profile %s for user %s", profile_id, user_id)
+    for attempt in range(PROGRESS_PATCH_ATTEMPTS):
+        try:
+            entity = kids_profiles_table_client.get_entity(partition_key=user_id, row_key=profile_id)
+        except ResourceNotFoundError:
+            return None
+        if not entity.get('is_active', True):
+            return None
+        
+        current = entity.get('progress') or '{}'
+        if if_match is not None and not any(if_match.contains(etag)
+                                            for etag in etag_variants(progress_etag(current))):
+            raise ProgressPreconditionFailed(profile_id)
+        progress = apply_progress_patch(current, patch)
+        if progress == current:
+            return progress
+        
+        try:
+            kids_profiles_table_client.update_entity(
+                {'PartitionKey': user_id, 'RowKey': profile_id, 'progress': progress},
+                mode=UpdateMode.MERGE,
+                etag=entity.metadata['etag'],
+                match_condition=MatchConditions.IfNotModified
+            )
+        except ResourceModifiedError:
+            logger.debug("Progress of kid profile %s changed meanwhile, attempt %s", profile_id, attempt + 1)
+            continue
+        profile_list_cache.invalidate(user_id)
+        logger.debug("Kid profile progress patched: %s", profile_id)
+        return progress
+    raise ResourceModifiedError(f"Progress of kid profile {profile_id} kept changing")
+
+def ingest_progress_events(user_id, aggregates):
+    """Write aggregated progress events (see models.aggregate_events) to a user's kids profiles
+    
+    One query reads the user's profiles, then every batch of up to 100 is
+    merged in one entity group transaction, conditional on the ETags the
+    profiles were read with. Batches that lost to a concurrent write are
+    recomputed from fresh entities; other transaction errors are raised.
+    Returns (updated ids, skipped ids of missing or deleted profiles);
+    ResourceModifiedError once the attempts run out.
+    """
+    logger.debug("Ingesting progress events for %s kids profiles of user %s", len(aggregates), user_id)
+    pending = sorted(aggregates)
+    updated, skipped = [], []
+    try:
+        for attempt in range(PROGRESS_PATCH_ATTEMPTS):
+            profiles = {
+                entity['RowKey']: entity
+                for entity in kids_profiles_table_client.query_entities(
+                    "PartitionKey eq @parent", parameters={'parent': user_id}
+                )
+            }
+            operations, missing = progress_update_operations(user_id, profiles, aggregates, pending)
+            skipped.extend(missing)
+            
+            pending = []
+            for batch in transaction_chunks(operations):
+                profile_ids = [operation[1]['RowKey'] for operation in batch]
+                try:
+                    kids_profiles_table_client.submit_transaction(batch)
+                    updated.extend(profile_ids)
+                except TableTransactionError as e:
+                    if not lost_to_concurrent_write(e):
+                        raise
+                    pending.extend(profile_ids)
+            if not pending:
+                logger.debug("Progress events written: %s updated, %s skipped", len(updated), len(skipped))
+                return updated, skipped
+            logger.debug("%s kids profiles changed meanwhile, attempt %s", len(pending), attempt + 1)
+        raise ResourceModifiedError(f"Kids profiles of user {user_id} kept changing")
+    finally:
+        if updated:
+            profile_list_cache.invalidate(user_id)
+
 def delete_kid_profile(user_id, profile_id):
     """Soft delete a kid profile (mark as inactive)"""
-    logger.info(f"Deleting kid profile {profile_id} for user {user_id}")
+    logger.debug("Deleting kid profile %s for user %s", profile_id, user_id)
     try:
         entity = kids_profiles_table_client.get_entity(partition_key=user_id, row_key=profile_id)
         if entity:
             profile_name = entity.get('name', 'Unknown')
             entity['is_active'] = False
             kids_profiles_table_client.update_entity(entity, mode='merge')
-            logger.info(f"Kid profile deleted successfully: {profile_name} (ID: {profile_id})")
+            profile_list_cache.invalidate(user_id)
+            logger.debug("Kid profile deleted successfully: %s (ID: %s)", profile_name, profile_id)
             return True
         logger.warning(f"Kid profile not found for deletion: {profile_id}")
         return False
     except Exception as e:
         logger.error(f"Error deleting kid profile {profile_id}: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"Error deleting kid profile: {e}")
         return False
 
+def password_pool_busy_response():
+    """503 returned when password hashing capacity is exhausted"""
+    response = jsonify({'error': 'Server is busy, please try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 # API Routes
 
 # Request/Response logging middleware
-@app.before_request
-def log_request_info():
-    """Log all incoming requests"""
-    logger.info(f"=== INCOMING REQUEST ===")
-    logger.info(f"Method: {request.method}")
-    logger.info(f"URL: {request.url}")
-    logger.info(f"Remote Address: {request.remote_addr}")
-    logger.info(f"User Agent: {request.headers.get('User-Agent', 'Unknown')}")
-    logger.info(f"Content Type: {request.headers.get('Content-Type', 'None')}")
-    
-    # Log headers (excluding sensitive ones)
-    headers_to_log = {}
-    for header, value in request.headers:
-        if header.lower() not in ['authorization', 'cookie', 'x-api-key']:
-            headers_to_log[header] = value
-        else:
-            headers_to_log[header] = '[REDACTED]'
-    logger.debug(f"Headers: {headers_to_log}")
+@api.before_app_request
+def start_request():
+    """Start the request clock, timing spans and storage call counters"""
+    start_request_timings()
+    start_request_stats()
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    g.in_flight = True
+
+# Endpoints answered without touching table storage
+STORAGE_FREE_ENDPOINTS = {'api.liveness', 'api.readiness', 'api.health_check', 'api.metrics', 'api.logout'}
+
+@api.before_app_request
+def ensure_storage():
+    """Provision the tables on the first request of this process that needs them
     
-    # Log request body for POST/PUT requests (be careful with sensitive data)
-    if request.method in ['POST', 'PUT'] and request.is_json:
-        try:
-            data = request.get_json()
-            # Redact sensitive fields
-            if isinstance(data, dict):
-                safe_data = data.copy()
-                sensitive_fields = ['password', 'token', 'secret']
-                for field in sensitive_fields:
-                    if field in safe_data:
-                        safe_data[field] = '[REDACTED]'
-                logger.debug(f"Request Body: {safe_data}")
-        except Exception as e:
-            logger.warning(f"Could not log request body: {e}")
-
-@app.after_request
+    Unmatched URLs (request.endpoint is None) get their 404 without storage.
+    """
+    if table_provisioner.ready or request.endpoint is None or request.endpoint in STORAGE_FREE_ENDPOINTS:
+        return None
+    try:
+        table_provisioner.ensure()
+    except Exception:
+        response = jsonify({'error': 'Storage is not available yet, please try again shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    return None
+
+@api.after_app_request
 def log_response_info(response):
-    """Log all outgoing responses"""
-    logger.info(f"=== OUTGOING RESPONSE ===")
-    logger.info(f"Status Code: {response.status_code}")
-    logger.info(f"Content Type: {response.headers.get('Content-Type', 'None')}")
-    
-    # Log response size
-    if response.content_length:
-        logger.debug(f"Content Length: {response.content_length} bytes")
+    """Add Server-Timing and write one structured log line for the finished request"""
+    timings = current_request_timings()
+    duration_ms = timings.elapsed_ms() if timings is not None else 0.0
+    spans = None
+    if timings is not None:
+        response.headers['Server-Timing'] = timings.server_timing(duration_ms)
+        spans = timings.as_dict()
     
-    # Log response body for non-successful requests or debug mode
-    if response.status_code >= 400:
-        try:
-            if response.is_json:
-                logger.debug(f"Error Response: {response.get_json()}")
-        except Exception as e:
-            logger.warning(f"Could not log error response: {e}")
+    # Storage round trips made by this request
+    storage_stats = current_request_stats()
+    storage = None
+    if storage_stats is not None:
+        response.headers['X-Storage-Calls'] = repr(storage_stats)
+        storage = {'reads': storage_stats.reads, 'writes': storage_stats.writes}
     
-    logger.info(f"Request completed with status: {response.status_code}")
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    observe_request(request.method, route, response.status_code, duration_ms / 1000)
+    request_logger.log(
+        request.method,
+        route,
+        response.status_code,
+        duration_ms,
+        user_id=g.get('user_id'),
+        storage=storage,
+        spans=spans
+    )
     return response
 
-@app.route('/api/health', methods=['GET'])
+@api.after_app_request
+def compress_response(response):
+    """Compress large JSON bodies for clients that accept it
+
+    Registered after log_response_info so it runs first, and the compress
+    span is part of Server-Timing.
+    """
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers):
+        return response
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if encoding is None or not should_compress(response.mimetype, len(body)):
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak=weak)
+    return response
+
+@api.teardown_app_request
+def end_request(exc):
+    """Leave the in-flight gauge, whatever happened to the request"""
+    if g.pop('in_flight', False):
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics, aggregated over all workers in multiprocess mode"""
+    if not METRICS_AVAILABLE:
+        return jsonify({'error': 'prometheus_client is not installed'}), 501
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
+
+@api.route('/api/live', methods=['GET'])
+def liveness():
+    """Liveness probe: the process is up and serving, whatever the state of storage"""
+    return jsonify({'status': 'alive'}), 200
+
+@api.route('/api/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: 200 once the tables are provisioned, 503 (and provisioning started) until then"""
+    if table_provisioner.ready:
+        return jsonify({'status': 'ready'}), 200
+    table_provisioner.start()
+    body = {'status': 'starting'}
+    if table_provisioner.error:
+        body['error'] = table_provisioner.error
+    return jsonify(body), 503
+
+@api.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     logger.debug("Health check requested")
@@ -436,13 +658,13 @@ def health_check():
         'timestamp': datetime.datetime.utcnow().isoformat(),
         'log_file': current_log_file
     }
-    logger.info("Health check completed successfully")
+    logger.debug("Health check completed successfully")
     return jsonify(response_data), 200
 
-@app.route('/api/auth/register', methods=['POST'])
+@api.route('/api/auth/register', methods=['POST'])
 def register():
     """User registration endpoint"""
-    logger.info("User registration attempt started")
+    logger.debug("User registration attempt started")
     try:
         data = request.get_json()
         
@@ -458,7 +680,7 @@ def register():
         full_name = data['full_name'].strip()
         phone_number = data.get('phone_number', '').strip()
         
-        logger.info(f"Registration attempt for email: {email}")
+        logger.debug("Registration attempt for email: %s", email)
         
         # Validate email format (basic validation)
         if '@' not in email or '.' not in email:
@@ -485,7 +707,7 @@ def register():
         # Generate JWT token
         token = generate_jwt_token(user['RowKey'], email)
         
-        logger.info(f"User registration completed successfully: {email}")
+        logger.debug("User registration completed successfully: %s", email)
         return jsonify({
             'message': 'User registered successfully',
             'token': token,
@@ -498,16 +720,17 @@ def register():
             }
         }), 201
         
+    except PasswordHasherBusy:
+        return password_pool_busy_response()
     except Exception as e:
         logger.error(f"Registration error: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"Registration error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/auth/login', methods=['POST'])
+@api.route('/api/auth/login', methods=['POST'])
 def login():
     """User login endpoint"""
-    logger.info("User login attempt started")
+    logger.debug("User login attempt started")
     try:
         data = request.get_json()
         
@@ -519,7 +742,7 @@ def login():
         email = data['email'].lower().strip()
         password = data['password']
         
-        logger.info(f"Login attempt for email: {email}")
+        logger.debug("Login attempt for email: %s", email)
         
         # Get user from database
         user = get_user_by_email(email)
@@ -537,13 +760,17 @@ def login():
             logger.warning(f"Login failed: Account deactivated for email {email}")
             return jsonify({'error': 'Account is deactivated'}), 401
         
+        # Upgrade hashes created with a lower bcrypt cost
+        if password_pool.needs_rehash(user['password_hash']):
+            upgrade_password_hash(user, password)
+        
         # Update last login
-        update_last_login(email)
+        update_last_login(user)
         
         # Generate JWT token
         token = generate_jwt_token(user['RowKey'], email)
         
-        logger.info(f"User login completed successfully: {email}")
+        logger.debug("User login completed successfully: %s", email)
         return jsonify({
             'message': 'Login successful',
             'token': token,
@@ -556,16 +783,17 @@ def login():
             }
         }), 200
         
+    except PasswordHasherBusy:
+        return password_pool_busy_response()
     except Exception as e:
         logger.error(f"Login error: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"Login error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/auth/user', methods=['GET'])
+@api.route('/api/auth/user', methods=['GET'])
 def get_user_profile():
     """Get user basic profile (authenticated endpoint)"""
-    logger.info("User profile request started")
+    logger.debug("User profile request started")
     try:
         # Get token from Authorization header
         auth_header = request.headers.get('Authorization')
@@ -581,7 +809,7 @@ def get_user_profile():
             return jsonify({'error': 'Invalid or expired token'}), 401
         
         email = payload['email']
-        logger.debug(f"User profile request for: {email}")
+        logger.debug("User profile request for: %s", email)
         
         # Get user from database
         user = get_user_by_email(email)
@@ -589,7 +817,7 @@ def get_user_profile():
             logger.error(f"User profile request failed: User not found for {email}")
             return jsonify({'error': 'User not found'}), 404
         
-        logger.info(f"User profile request completed successfully: {email}")
+        logger.debug("User profile request completed successfully: %s", email)
         return jsonify({
             'user': {
                 'id': user['RowKey'],
@@ -604,7 +832,6 @@ def get_user_profile():
     except Exception as e:
         logger.error(f"User profile error: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"User profile error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
 def authenticate_request():
@@ -621,40 +848,97 @@ def authenticate_request():
         logger.warning("Authentication failed: Invalid or expired token")
         return None, jsonify({'error': 'Invalid or expired token'}), 401
     
-    logger.debug(f"Authentication successful for user: {payload['email']}")
+    logger.debug("Authentication successful for user: %s", payload['email'])
     return payload, None, None
 
 # Kids Profile Endpoints
 
-@app.route('/api/profiles', methods=['GET'])
+@api.route('/api/profiles', methods=['GET'])
 def get_kids_profiles():
-    """Get all kids profiles for the authenticated user"""
-    logger.info("Get kids profiles request started")
+    """Get all kids profiles for the authenticated user
+    
+    The serialized list is cached per user and carries a strong ETag, so a
+    client sending If-None-Match gets an empty 304 while nothing changed.
+    """
+    logger.debug("Get kids profiles request started")
     try:
         # Authenticate request
         payload, error_response, error_code = authenticate_request()
         if payload is None:
             return error_response, error_code
         
-        # Get kids profiles for this user
-        profiles = get_kids_profiles_by_user(payload['user_id'])
+        user_id = payload['user_id']
+        cached = profile_list_cache.get(user_id)
+        if cached is None:
+            # Get kids profiles for this user
+            profiles = get_kids_profiles_by_user(user_id)
+            if profiles is None:
+                return jsonify({'error': 'Failed to load profiles'}), 500
+            
+            body = jsonify({
+                'profiles': profiles,
+                'count': len(profiles)
+            }).get_data()
+            cached = EncodedBody(body, hashlib.sha256(body).hexdigest())
+            profile_list_cache.set(user_id, cached)
+            logger.debug("Get kids profiles completed successfully: Found %s profiles", len(profiles))
         
-        logger.info(f"Get kids profiles completed successfully: Found {len(profiles)} profiles")
-        return jsonify({
-            'profiles': profiles,
-            'count': len(profiles)
-        }), 200
+        # Compressed once per cached list, not per request
+        encoding = cached.encoding_for(request.headers.get('Accept-Encoding'))
+        if any(request.if_none_match.contains_weak(etag) for etag in etag_variants(cached.etag)):
+            logger.debug("Get kids profiles: not modified")
+            response = Response(status=304)
+        else:
+            response = Response(cached.get(encoding), status=200, mimetype='application/json')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(encoded_etag(cached.etag, encoding))
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Accept-Encoding')
+        return response
         
     except Exception as e:
         logger.error(f"Get profiles error: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"Get profiles error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/profiles', methods=['POST'])
+@api.route('/api/profiles/sync', methods=['GET'])
+def sync_kids_profiles():
+    """Kids profiles changed since a change token
+    
+    ?since=<token> returns the profiles created or modified since the token
+    and the ids of those deleted; without a token (or with an unreadable one)
+    every active profile comes back with full=true. Either way the response
+    carries the token for the next sync.
+    """
+    logger.debug("Sync kids profiles request started")
+    try:
+        payload, error_response, error_code = authenticate_request()
+        if payload is None:
+            return error_response, error_code
+        
+        token = request.args.get('since')
+        since = decode_change_token(token)
+        if token and since is None:
+            logger.warning("Sync kids profiles: unreadable change token, sending a full list")
+        
+        changes = get_kids_profile_changes(payload['user_id'], since)
+        if changes is None:
+            return jsonify({'error': 'Failed to sync profiles'}), 500
+        
+        response = jsonify(changes)
+        response.headers['Cache-Control'] = 'private, no-store'
+        return response
+        
+    except Exception as e:
+        logger.error(f"Sync profiles error: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/api/profiles', methods=['POST'])
 def create_kids_profile():
     """Create a new kid profile"""
-    logger.info("Create kid profile request started")
+    logger.debug("Create kid profile request started")
     try:
         # Authenticate request
         payload, error_response, error_code = authenticate_request()
@@ -674,7 +958,7 @@ def create_kids_profile():
         avatar = data.get('avatar', 'default')
         learning_goals = data.get('learning_goals', '').strip()
         
-        logger.info(f"Creating kid profile: {name}, age {age}")
+        logger.debug("Creating kid profile: %s, age %s", name, age)
         
         # Validate age
         try:
@@ -692,7 +976,7 @@ def create_kids_profile():
             logger.error("Create profile failed: Could not create profile")
             return jsonify({'error': 'Failed to create profile'}), 500
         
-        logger.info(f"Kid profile created successfully: {name} (ID: {profile['RowKey']})")
+        logger.debug("Kid profile created successfully: %s (ID: %s)", name, profile['RowKey'])
         return jsonify({
             'message': 'Kid profile created successfully',
             'profile': {
@@ -709,10 +993,9 @@ def create_kids_profile():
     except Exception as e:
         logger.error(f"Create profile error: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        print(f"Create profile error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/profiles/<profile_id>', methods=['GET'])
+@api.route('/api/profiles/<profile_id>', methods=['GET'])
 def get_kid_profile(profile_id):
     """Get a specific kid profile"""
     try:
@@ -735,10 +1018,9 @@ def get_kid_profile(profile_id):
         return jsonify({'profile': profile}), 200
         
     except Exception as e:
-        print(f"Get profile error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/profiles/<profile_id>', methods=['PUT'])
+@api.route('/api/profiles/<profile_id>', methods=['PUT'])
 def update_kids_profile(profile_id):
     """Update a kid profile"""
     try:
@@ -779,10 +1061,75 @@ def update_kids_profile(profile_id):
         }), 200
         
     except Exception as e:
-        print(f"Update profile error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/profiles/<profile_id>', methods=['DELETE'])
+def progress_response(progress):
+    """Progress of a profile, with its ETag for If-Match on the next patch"""
+    response = jsonify({'progress': progress})
+    response.set_etag(progress_etag(progress))
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@api.route('/api/profiles/<profile_id>/progress', methods=['GET'])
+def get_kid_progress(profile_id):
+    """Get a kid's progress and its ETag"""
+    try:
+        payload, error_response, error_code = authenticate_request()
+        if payload is None:
+            return error_response, error_code
+        
+        profile = get_kid_profile_by_id(payload['user_id'], profile_id)
+        if not profile:
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        progress = profile['progress'] or '{}'
+        if any(request.if_none_match.contains_weak(etag) for etag in etag_variants(progress_etag(progress))):
+            response = Response(status=304)
+            response.set_etag(progress_etag(progress))
+            return response
+        return progress_response(progress)
+        
+    except Exception as e:
+        logger.error(f"Get progress error: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/api/profiles/<profile_id>/progress', methods=['PATCH'])
+def patch_kids_progress(profile_id):
+    """Update a kid's progress with a JSON merge patch (RFC 7396)
+    
+    The body (application/merge-patch+json) holds only the keys to change,
+    null removing a key. With If-Match the patch applies only while the
+    progress still has that ETag (412 otherwise).
+    """
+    try:
+        payload, error_response, error_code = authenticate_request()
+        if payload is None:
+            return error_response, error_code
+        
+        patch = request.get_json(silent=True)
+        if_match = request.if_match if 'If-Match' in request.headers else None
+        progress = patch_kid_progress(payload['user_id'], profile_id, patch, if_match)
+        if progress is None:
+            return jsonify({'error': 'Profile not found'}), 404
+        
+        return progress_response(progress)
+        
+    except InvalidProgressPatch as e:
+        logger.warning(f"Patch progress failed: {e}")
+        return jsonify({'error': str(e)}), 400
+    except ProgressPreconditionFailed:
+        logger.debug("Patch progress failed: stale If-Match for profile %s", profile_id)
+        return jsonify({'error': 'Progress has changed, reload it and retry'}), 412
+    except ResourceModifiedError:
+        logger.warning(f"Patch progress failed: too many concurrent writes to profile {profile_id}")
+        return jsonify({'error': 'Progress is being updated concurrently, retry'}), 409
+    except Exception as e:
+        logger.error(f"Patch progress error: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/api/profiles/<profile_id>', methods=['DELETE'])
 def delete_kids_profile(profile_id):
     """Delete a kid profile"""
     try:
@@ -805,33 +1152,89 @@ def delete_kids_profile(profile_id):
         return jsonify({'message': 'Profile deleted successfully'}), 200
         
     except Exception as e:
-        print(f"Delete profile error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@app.route('/api/auth/logout', methods=['POST'])
+@api.route('/api/progress/events', methods=['POST'])
+def record_progress_events():
+    """Record a batch of progress events across the user's kids
+    
+    Body: {"events": [{"profile_id", "occurred_at", "progress": merge patch}]},
+    up to 1000 events. Events are applied per profile in occurred_at order;
+    events for missing or deleted profiles are skipped.
+    """
+    try:
+        payload, error_response, error_code = authenticate_request()
+        if payload is None:
+            return error_response, error_code
+        
+        data = request.get_json(silent=True)
+        events = data.get('events') if isinstance(data, dict) else None
+        aggregates = aggregate_events(events)
+        updated, skipped = ingest_progress_events(payload['user_id'], aggregates)
+        
+        return jsonify({
+            'message': 'Progress events recorded',
+            'accepted': len(events),
+            'updated': updated,
+            'skipped': skipped
+        }), 200
+        
+    except (InvalidProgressEvents, InvalidProgressPatch) as e:
+        logger.warning(f"Record progress events failed: {e}")
+        return jsonify({'error': str(e)}), 400
+    except ResourceModifiedError:
+        logger.warning("Record progress events failed: too many concurrent writes")
+        return jsonify({'error': 'Profiles are being updated concurrently, retry'}), 409
+    except Exception as e:
+        logger.error(f"Record progress events error: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/api/auth/logout', methods=['POST'])
 def logout():
     """User logout endpoint"""
     # Since we're using stateless JWT tokens, logout is handled client-side
     # The client should delete the token from storage
     return jsonify({'message': 'Logged out successfully'}), 200
 
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found(error):
     logger.warning(f"404 Error: Endpoint not found - {request.url}")
     return jsonify({'error': 'Endpoint not found'}), 404
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
     logger.error(f"500 Error: Internal server error - {str(error)}")
     logger.error(f"Traceback: {traceback.format_exc()}")
     return jsonify({'error': 'Internal server error'}), 500
 
+def create_app():
+    """
+    Build the Flask application
+
+    Storage clients, caches and logging are module level and shared by every
+    app built here; wsgi.py builds the production app once, before workers fork.
+
+    Returns:
+        Flask: The configured application
+    """
+    app = Flask(__name__)
+    app.json = TimedJSONProvider(app)
+    app.config['SECRET_KEY'] = SECRET_KEY
+    CORS(app)
+    app.register_blueprint(api)
+    return app
+
 if __name__ == '__main__':
+    # Werkzeug development server; production runs wsgi:application under gunicorn
+    app = create_app()
     logger.info("=== AI School Backend Server Starting ===")
     print("🚀 Starting AI School Backend Server...")
     logger.info("Listing available endpoints...")
     print("📚 Endpoints available:")
     print("   GET  /api/health")
+    print("   GET  /api/live")
+    print("   GET  /api/ready")
     print("   POST /api/auth/register")
     print("   POST /api/auth/login")
     print("   GET  /api/auth/user")
@@ -845,11 +1248,11 @@ if __name__ == '__main__':
     print()
     
     logger.info("Starting Flask development server...")
-    logger.info("Server configuration: debug=True, host='0.0.0.0', port=5000")
+    logger.info(f"Server configuration: debug={Config.DEBUG}, host='0.0.0.0', port=5000")
     
     try:
-        # Run the application
-        app.run(debug=True, host='0.0.0.0', port=5000)
+        # Run the application; FLASK_DEBUG=true turns on the debugger and reloader
+        app.run(debug=Config.DEBUG, host='0.0.0.0', port=5000)
     except Exception as e:
         logger.error(f"Failed to start server: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
@@ -2,6 +2,8 @@
 from .utils import (
     hash_password, 
     verify_password, 
+    hash_password_async,
+    verify_password_async,
     generate_jwt_token, 
     verify_jwt_token,
     validate_email,
@@ -9,14 +11,19 @@ from .utils import (
     token_required,
     sanitize_input
 )
+from .password_pool import password_pool, PasswordHasherBusy
 
 __all__ = [
     'hash_password', 
     'verify_password', 
+    'hash_password_async',
+    'verify_password_async',
     'generate_jwt_token', 
     'verify_jwt_token',
     'validate_email',
     'validate_password_strength',
     'token_required',
-    'sanitize_input'
+    'sanitize_input',
+    'password_pool',
+    'PasswordHasherBusy'
 ]
@@ -0,0 +1,211 @@
+"""
+Bounded executor for bcrypt password hashing and verification
+
+bcrypt costs hundreds of milliseconds of CPU per call. Running it on a
+dedicated, size-limited pool caps how many cores password work can take, so
+cheap endpoints keep being served during a login or registration burst.
+When the pool and its queue are full, new password work is rejected at once
+with PasswordHasherBusy (mapped to 503 by both apps) instead of piling up.
+
+bcrypt releases the GIL while hashing, so a thread pool runs in parallel on
+all cores without the pickling and fork-safety costs of a process pool.
+
+The cost factor comes from BCRYPT_ROUNDS, or with BCRYPT_CALIBRATE=true is
+measured at startup as the highest cost that hashes within BCRYPT_TARGET_MS.
+Hashes stored with a lower cost are upgraded after a successful login.
+Run `python -m auth.password_pool` to print the calibrated cost for a host.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import bcrypt
+
+from config import Config
+from observability.metrics import BCRYPT_QUEUE_DEPTH
+from observability.timing import span
+
+
+logger = logging.getLogger('ai_school.password_pool')
+
+_init_lock = threading.Lock()
+
+MIN_ROUNDS = 10  # Never calibrate below this, whatever the hardware
+MAX_ROUNDS = 16
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the bcrypt executor has no free worker or queue slot"""
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Cost factor of a stored bcrypt hash ($2b$<rounds>$...), None if unparseable"""
+    try:
+        return int(hashed_password.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int = MIN_ROUNDS, max_rounds: int = MAX_ROUNDS) -> int:
+    """
+    Highest bcrypt cost that hashes within target_ms on this host
+
+    Every extra round doubles the hashing time, so costs are timed upwards
+    until one exceeds the target.
+
+    Args:
+        target_ms (float): Acceptable time for one hash, in milliseconds
+        min_rounds (int): Cost returned even if it is slower than the target
+        max_rounds (int): Upper bound of the search
+
+    Returns:
+        int: Cost factor to pass to bcrypt.gensalt()
+    """
+    rounds = min_rounds
+    for candidate in range(min_rounds, max_rounds + 1):
+        started = time.perf_counter()
+        _hash('calibration-password', candidate)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.debug("bcrypt cost %d hashed in %.1f ms", candidate, elapsed_ms)
+        if elapsed_ms > target_ms:
+            break
+        rounds = candidate
+    return rounds
+
+
+class PasswordPool:
+    """Size-limited bcrypt executor with a bounded queue"""
+
+    def __init__(self, max_workers: int, max_queue: int, rounds: int = 12):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._pid = None
+        self._executor = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _ensure_executor(self):
+        # Created lazily, and again after a fork, since threads do not survive fork()
+        if self._pid != os.getpid():
+            with _init_lock:
+                if self._pid != os.getpid():
+                    self._lock = threading.Lock()
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='bcrypt')
+                    self._in_flight = 0
+                    self._pid = os.getpid()
+
+    @property
+    def depth(self) -> int:
+        """Password jobs running or waiting"""
+        return self._in_flight if self._pid == os.getpid() else 0
+
+    def submit(self, fn, *args) -> Future:
+        """
+        Queue password work, failing fast when the pool is saturated
+
+        Raises:
+            PasswordHasherBusy: If max_workers + max_queue jobs are already in flight
+        """
+        self._ensure_executor()
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                raise PasswordHasherBusy("Password hashing capacity exhausted")
+            self._in_flight += 1
+        BCRYPT_QUEUE_DEPTH.inc()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        BCRYPT_QUEUE_DEPTH.dec()
+
+    def hash_password(self, password: str) -> str:
+        """Hash a password on the pool, blocking the caller until done"""
+        future = self.submit(_hash, password, self.rounds)
+        with span('bcrypt'):
+            return future.result()
+
+    def verify_password(self, password: str, hashed_password: str) -> bool:
+        """Verify a password on the pool, blocking the caller until done"""
+        future = self.submit(_verify, password, hashed_password)
+        with span('bcrypt'):
+            return future.result()
+
+    async def hash_password_async(self, password: str) -> str:
+        """Hash a password on the pool without blocking the event loop"""
+        future = self.submit(_hash, password, self.rounds)
+        with span('bcrypt'):
+            return await asyncio.wrap_future(future)
+
+    async def verify_password_async(self, password: str, hashed_password: str) -> bool:
+        """Verify a password on the pool without blocking the event loop"""
+        future = self.submit(_verify, password, hashed_password)
+        with span('bcrypt'):
+            return await asyncio.wrap_future(future)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True if a stored hash uses a lower cost than the configured one"""
+        rounds = hash_rounds(hashed_password)
+        return rounds is not None and rounds < self.rounds
+
+    def rehash_in_background(self, password: str, on_rehashed: Callable[[str], None]) -> None:
+        """
+        Hash a verified password at the current cost without waiting for it
+
+        Args:
+            password (str): Plain text password that was just verified
+            on_rehashed (Callable): Called on a pool thread with the new hash
+
+        The upgrade is skipped when the pool is saturated; it is retried on
+        the user's next login.
+        """
+        try:
+            future = self.submit(_hash, password, self.rounds)
+        except PasswordHasherBusy:
+            logger.debug("Password pool busy, deferring hash upgrade")
+            return
+
+        def done(f: Future):
+            if f.exception() is not None:
+                logger.error("Password hash upgrade failed: %s", f.exception())
+                return
+            try:
+                on_rehashed(f.result())
+            except Exception as e:
+                logger.error("Storing upgraded password hash failed: %s", e)
+
+        future.add_done_callback(done)
+
+
+# Shared by every password call in the process
+password_pool = PasswordPool(Config.BCRYPT_MAX_WORKERS, Config.BCRYPT_MAX_QUEUE, Config.BCRYPT_ROUNDS)
+
+if Config.BCRYPT_CALIBRATE:
+    password_pool.rounds = calibrate_rounds(Config.BCRYPT_TARGET_MS)
+    logger.info("Calibrated bcrypt cost %d for a %.0f ms target", password_pool.rounds, Config.BCRYPT_TARGET_MS)
+
+
+if __name__ == '__main__':
+    print(f"BCRYPT_ROUNDS={calibrate_rounds(Config.BCRYPT_TARGET_MS)}  "
+          f"(target {Config.BCRYPT_TARGET_MS:.0f} ms per hash)")
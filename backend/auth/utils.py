@@ -2,28 +2,31 @@
 Authentication utilities for AI School backend
 """
 
-import bcrypt
 import jwt
 import datetime
 from functools import wraps
-from flask import request, jsonify, current_app
 from typing import Optional, Dict, Any
 
+from .password_pool import password_pool
+
 def hash_password(password: str) -> str:
     """
-    Hash a password using bcrypt
+    Hash a password using bcrypt on the shared password pool
     
     Args:
         password (str): Plain text password
         
     Returns:
         str: Hashed password
+        
+    Raises:
+        PasswordHasherBusy: If the password pool is saturated
     """
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return password_pool.hash_password(password)
 
 def verify_password(password: str, hashed_password: str) -> bool:
     """
-    Verify a password against its hash
+    Verify a password against its hash on the shared password pool
     
     Args:
         password (str): Plain text password
@@ -31,8 +34,36 @@ def verify_password(password: str, hashed_password: str) -> bool:
         
     Returns:
         bool: True if password matches, False otherwise
+        
+    Raises:
+        PasswordHasherBusy: If the password pool is saturated
+    """
+    return password_pool.verify_password(password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password on the shared password pool without blocking the event loop
+    
+    Args:
+        password (str): Plain text password
+        
+    Returns:
+        str: Hashed password
     """
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return await password_pool.hash_password_async(password)
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the shared password pool without blocking the event loop
+    
+    Args:
+        password (str): Plain text password
+        hashed_password (str): Hashed password
+        
+    Returns:
+        bool: True if password matches, False otherwise
+    """
+    return await password_pool.verify_password_async(password, hashed_password)
 
 def generate_jwt_token(user_id: str, email: str, 
                       secret_key: str, expiration_hours: int = 24) -> str:
@@ -132,6 +163,9 @@ def token_required(f):
     Returns:
         Decorated function
     """
+    # Imported here so the package can be used without Flask (FastAPI app)
+    from flask import request, jsonify, current_app
+    
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
@@ -0,0 +1,127 @@
+"""
+One-time backfill of the FastAPI email index
+
+Streams every FastAPI user row ("User" partitions) page by page and writes
+the matching email -> username index rows in transactions of up to 100
+rows. Safe to re-run: rows that are already indexed are skipped, and emails
+that are registered to more than one username are reported, not overwritten.
+
+Usage (from the backend directory):
+    python backfill_email_index.py [--page-size 1000] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+from collections import defaultdict
+
+from azure.core.exceptions import ResourceExistsError
+from azure.data.tables import TableServiceClient, TableTransactionError
+from dotenv import load_dotenv
+
+from config import Config
+from storage import EmailIndex, USER_PARTITION_KEY
+from storage.sharding import partition_range_filter
+
+BATCH_SIZE = 100  # Azure limit for a single entity group transaction
+
+
+def write_batch(email_index, batch, stats):
+    """Insert index rows of one partition, falling back to row-by-row on conflict"""
+    try:
+        email_index.table_client.submit_transaction([("create", row) for _, row in batch])
+        stats["indexed"] += len(batch)
+        return
+    except TableTransactionError:
+        pass
+
+    # At least one row already exists, the whole transaction was rolled back
+    for email, row in batch:
+        try:
+            email_index.table_client.create_entity(row)
+            stats["indexed"] += 1
+        except ResourceExistsError:
+            owner = email_index.lookup(email)
+            if owner == row["username"]:
+                stats["already_indexed"] += 1
+            else:
+                stats["conflicts"] += 1
+                print(f"⚠ Email {email} belongs to '{owner}', not indexing '{row['username']}'")
+
+
+def backfill(users_table, email_index, page_size=1000, dry_run=False):
+    """
+    Build index rows for every user row
+
+    Args:
+        users_table: TableClient of the users table
+        email_index (EmailIndex): Index to populate
+        page_size (int): Rows fetched per page
+        dry_run (bool): Only count rows, write nothing
+
+    Returns:
+        Dict: Counters for scanned, indexed, already indexed, skipped and conflicting rows
+    """
+    stats = {"scanned": 0, "indexed": 0, "already_indexed": 0, "skipped": 0, "conflicts": 0}
+    pending = defaultdict(list)
+
+    pages = users_table.query_entities(
+        partition_range_filter(USER_PARTITION_KEY),
+        select=["RowKey", "email"],
+        results_per_page=page_size
+    ).by_page()
+
+    for page in pages:
+        for user in page:
+            stats["scanned"] += 1
+            email = user.get("email")
+            if not email:
+                stats["skipped"] += 1
+                continue
+
+            row = email_index.entity_for(email, user["RowKey"])
+            partition = pending[row["PartitionKey"]]
+            partition.append((email, row))
+            if len(partition) == BATCH_SIZE:
+                if not dry_run:
+                    write_batch(email_index, partition, stats)
+                pending[row["PartitionKey"]] = []
+
+        print(f"  ...{stats['scanned']} users scanned")
+
+    for partition in pending.values():
+        if partition and not dry_run:
+            write_batch(email_index, partition, stats)
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the FastAPI email index table")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    load_dotenv()
+    conn_str = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
+    if not conn_str:
+        print("AZURE_STORAGE_CONNECTION_STRING environment variable is required")
+        sys.exit(1)
+
+    service = TableServiceClient.from_connection_string(conn_str)
+    service.create_table_if_not_exists(Config.EMAIL_INDEX_TABLE_NAME)
+    users_table = service.get_table_client(Config.USERS_TABLE_NAME)
+    email_index = EmailIndex(
+        service.get_table_client(Config.EMAIL_INDEX_TABLE_NAME),
+        shards=Config.USER_PARTITION_SHARDS,
+        legacy_fallback=Config.USER_PARTITION_LEGACY_FALLBACK
+    )
+
+    print(f"🔄 Backfilling '{Config.EMAIL_INDEX_TABLE_NAME}' from '{Config.USERS_TABLE_NAME}'...")
+    stats = backfill(users_table, email_index, page_size=args.page_size, dry_run=args.dry_run)
+    print(f"✓ Done: {stats}")
+    sys.exit(1 if stats["conflicts"] else 0)
+
+
+if __name__ == "__main__":
+    main()
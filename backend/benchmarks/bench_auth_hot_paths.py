@@ -0,0 +1,237 @@
+"""
+Micro-benchmarks for the per-request CPU work of both apps
+
+Measures, in-process and without any network or storage I/O:
+
+    hash_password / verify_password     bcrypt at each --costs work factor
+    generate_jwt_token / verify_jwt_token
+    validate_email, validate_password_strength, sanitize_input
+    UserRegister                        Pydantic validation of a /register body
+    kid_profile_from_entity             entity -> dict of get_kids_profiles_by_user
+
+For each case it reports ops/sec (best of --repeat timeit runs) and the
+allocations of a single call, as traced by tracemalloc:
+
+    alloc_peak_bytes      peak memory allocated while the call ran
+    alloc_retained_bytes  memory still allocated after the call (caches, leaks)
+
+Results are compared against a stored baseline (benchmarks/baselines/
+auth_hot_paths.json by default). Baselines are machine specific: refresh it
+with --save-baseline on the machine you compare on. Run from the backend
+directory:
+
+    python -m benchmarks.bench_auth_hot_paths --save-baseline
+    python -m benchmarks.bench_auth_hot_paths --check   # exit 1 on regression
+"""
+
+import os
+
+# The apps are imported for UserRegister and the profile conversion; keep them
+# off Azure and quiet.
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+from azure.data.tables import TableEntity
+
+from auth.password_pool import _hash, password_pool
+from auth.utils import (
+    generate_jwt_token, hash_password, sanitize_input, validate_email,
+    validate_password_strength, verify_jwt_token, verify_password
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "auth_hot_paths.json")
+PASSWORD = "Bench123pass"
+SECRET_KEY = "bench-secret-key"
+
+
+def password_cases(costs):
+    """hash/verify at each bcrypt cost; the pool's cost is swapped per case"""
+    cases = []
+    for cost in costs:
+        hashed = _hash(PASSWORD, cost)
+
+        def hash_at(cost=cost):
+            password_pool.rounds = cost
+            return hash_password(PASSWORD)
+
+        cases.append((f"hash_password[cost={cost}]", hash_at))
+        cases.append((f"verify_password[cost={cost}]", lambda hashed=hashed: verify_password(PASSWORD, hashed)))
+    return cases
+
+
+def auth_cases():
+    token = generate_jwt_token("user-123", "kid.parent@example.com", SECRET_KEY)
+    long_input = "  <b>Hello</b> <script>alert(1)</script> world & friends " * 4
+    return [
+        ("generate_jwt_token", lambda: generate_jwt_token("user-123", "kid.parent@example.com", SECRET_KEY)),
+        ("verify_jwt_token", lambda: verify_jwt_token(token, SECRET_KEY)),
+        ("validate_email", lambda: validate_email("kid.parent+school@example.co.uk")),
+        ("validate_password_strength", lambda: validate_password_strength(PASSWORD)),
+        ("sanitize_input", lambda: sanitize_input(long_input)),
+    ]
+
+
+def user_register_case():
+    from fastapi_app import UserRegister
+
+    body = {
+        "username": "benchuser",
+        "password": PASSWORD,
+        "email": "bench.user@example.com",
+        "fullName": "Bench User",
+        "dob": "2000-01-01",
+        "location": "Bench City"
+    }
+    return [("UserRegister.model_validate", lambda: UserRegister.model_validate(body))]
+
+
+def profile_conversion_case(profiles):
+    from app import kid_profile_from_entity
+
+    now = datetime.datetime.utcnow().isoformat()
+    entities = []
+    for i in range(profiles):
+        entity = TableEntity({
+            "PartitionKey": "user-123",
+            "RowKey": f"profile-{i}",
+            "name": f"Kid {i}",
+            "age": 5 + i % 10,
+            "grade": str(i % 6 + 1),
+            "avatar": "default",
+            "learning_goals": "[\"math\", \"reading\"]",
+            "created_at": now,
+            "last_activity": now,
+            "progress": "{\"math\": {\"level\": 3}}",
+            "is_active": True
+        })
+        entity._metadata = {"etag": "W/\"datetime'2024-01-01T00%3A00%3A00Z'\"", "timestamp": None}
+        entities.append(entity)
+    return [(f"kid_profile_from_entity[x{profiles}]",
+             lambda: [kid_profile_from_entity(entity) for entity in entities])]
+
+
+def measure(fn, repeat):
+    """ops/sec of fn (best of `repeat` autoranged runs) and its allocations"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    fn()  # warm any lazy imports and caches before tracing
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    del result
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ops_per_sec": round(1.0 / best, 1),
+        "us_per_op": round(best * 1e6, 3),
+        "alloc_peak_bytes": max(0, peak - before),
+        "alloc_retained_bytes": after - before
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against the baseline; returns the names that regressed"""
+    print(f"\nAgainst baseline @ {baseline.get('commit')} ({baseline.get('python')}, {baseline.get('machine')}):")
+    regressed = []
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            print(f"{name:>36}: new")
+            continue
+        speed = (result["ops_per_sec"] / before["ops_per_sec"] - 1) * 100
+        alloc = result["alloc_peak_bytes"] - before["alloc_peak_bytes"]
+        slower = speed < -tolerance
+        # Small allocation jitter comes from interpreter internals; flag growth above tolerance
+        heavier = alloc > max(256, before["alloc_peak_bytes"] * tolerance / 100)
+        flag = "  REGRESSION" if slower or heavier else ""
+        if flag:
+            regressed.append(name)
+        print(f"{name:>36}: ops/s {speed:+6.1f}%   alloc {alloc:+7d} B{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auth hot path micro-benchmarks")
+    parser.add_argument("--costs", type=int, nargs="+", default=[4, 8, 10, 12],
+                        help="bcrypt work factors to benchmark")
+    parser.add_argument("--profiles", type=int, default=20,
+                        help="entities per kid_profile_from_entity run (one profile list)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="run only cases whose name contains this text")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=15.0,
+                        help="percent slowdown (or allocation growth) counted as a regression")
+    parser.add_argument("--check", action="store_true", help="exit 1 if anything regressed")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args()
+
+    cases = (password_cases(args.costs) + auth_cases() + user_register_case()
+             + profile_conversion_case(args.profiles))
+    if args.only:
+        cases = [(name, fn) for name, fn in cases if args.only in name]
+
+    rounds = password_pool.rounds
+    results = {}
+    try:
+        for name, fn in cases:
+            results[name] = measure(fn, args.repeat)
+            result = results[name]
+            print(f"{name:>36}: {result['ops_per_sec']:>12.1f} ops/s  {result['us_per_op']:>12.3f} us/op  "
+                  f"peak {result['alloc_peak_bytes']:>7d} B  retained {result['alloc_retained_bytes']:>+6d} B")
+    finally:
+        password_pool.rounds = rounds
+
+    report = {
+        "commit": git_commit(),
+        "taken_at": datetime.datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "results": results
+    }
+
+    regressed = []
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressed = compare(results, json.load(f), args.tolerance)
+    else:
+        print(f"\nNo baseline at {args.baseline}; create one with --save-baseline")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.check and regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
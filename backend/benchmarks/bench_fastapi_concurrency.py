@@ -0,0 +1,137 @@
+"""
+FastAPI concurrency benchmark with simulated storage latency
+
+Drives GET /profile (JWT check + one user point read) in-process through
+httpx's ASGI transport, with the user table replaced by a stand-in that
+sleeps for --latency-ms on every call. Two storage modes are compared:
+
+    threadpool  the read blocks a Starlette threadpool worker (40 by default),
+                which is how the sync `def` handlers used to wait on Azure
+    async       the read awaits, as with the azure.data.tables.aio clients
+
+No Azure account is touched. Run from the backend directory:
+
+    python -m benchmarks.bench_fastapi_concurrency --concurrency 200 --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+# Never reach a real account from .env, the benchmark stubs storage out
+os.environ['AZURE_STORAGE_CONNECTION_STRING'] = (
+    'DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;'
+    'AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;'
+    'TableEndpoint=http://127.0.0.1:1/devstoreaccount1;'
+)
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret')
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+import fastapi_app
+
+USERNAME = "benchuser"
+
+
+def make_user(partition_key):
+    return {
+        "PartitionKey": partition_key,
+        "RowKey": USERNAME,
+        "email": "bench@aischool.local",
+        "fullName": "Bench User",
+        "dob": "2000-01-01",
+        "location": "Nowhere",
+        "created_at": "2024-01-01T00:00:00",
+        "is_active": True
+    }
+
+
+class AsyncLatencyTable:
+    """Awaits the simulated round trip, like the aio TableClient"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.user = make_user(fastapi_app.user_store.partition_for(USERNAME))
+
+    async def get_entity(self, partition_key, row_key, **kwargs):
+        await asyncio.sleep(self.latency)
+        return dict(self.user)
+
+
+class ThreadpoolLatencyTable(AsyncLatencyTable):
+    """Blocks a threadpool worker for the round trip, like the sync TableClient"""
+
+    def _get_entity(self):
+        time.sleep(self.latency)
+        return dict(self.user)
+
+    async def get_entity(self, partition_key, row_key, **kwargs):
+        return await run_in_threadpool(self._get_entity)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))]
+
+
+async def run_mode(table, concurrency, total):
+    fastapi_app.user_store.table_client = table
+    token = fastapi_app.generate_jwt_token(USERNAME, "bench@aischool.local")
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    transport = httpx.ASGITransport(app=fastapi_app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.get("/profile", headers=headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.mean(latencies), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastAPI concurrency benchmark")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000.0
+    results = {}
+    for mode, table in (("threadpool", ThreadpoolLatencyTable(latency)), ("async", AsyncLatencyTable(latency))):
+        results[mode] = asyncio.run(run_mode(table, args.concurrency, args.requests))
+        r = results[mode]
+        print(f"{mode:>10}: {r['rps']:>8} req/s  p50 {r['p50_ms']:>8} ms  p99 {r['p99_ms']:>8} ms")
+
+    print(f"Throughput gain: {results['async']['rps'] / results['threadpool']['rps']:.1f}x "
+          f"at {args.concurrency} concurrent requests, {args.latency_ms} ms storage latency")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
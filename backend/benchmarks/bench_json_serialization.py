@@ -0,0 +1,165 @@
+"""
+JSON serialization cost per endpoint: stdlib json vs orjson
+
+Times how each app turns a handler's return value into response bytes, for
+representative payloads of its busiest endpoints:
+
+    flask    app.json.response(payload)                 (what jsonify runs)
+    fastapi  response_model validation + TimedJSONResponse render
+
+with serialization.fast_json switched off ("before", stdlib) and on
+("after", orjson), and checks that both produce the same data. Profile
+lists carry a `progress` JSON blob per profile, the part that grows.
+Run from the backend directory (orjson must be installed):
+
+    python -m benchmarks.bench_json_serialization --profiles 20 --output results/json.json
+"""
+
+import os
+
+# The apps are imported for their real response classes; keep them off Azure and quiet
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import argparse
+import datetime
+import json
+import sys
+import timeit
+import uuid
+
+from serialization import fast_json
+
+
+def progress_blob(subjects):
+    """A kid's progress JSON string, as stored on the profile entity"""
+    return json.dumps({
+        f"subject_{s}": {
+            "level": s % 7 + 1,
+            "xp": 1250 + s * 37,
+            "scores": [60 + (s * 7 + i * 3) % 40 for i in range(20)],
+            "badges": [f"badge_{s}_{i}" for i in range(5)],
+            "last_lesson": f"lesson-{s}-12",
+            "completed": s % 2 == 0
+        }
+        for s in range(subjects)
+    })
+
+
+def profile(i, subjects):
+    now = datetime.datetime.utcnow().isoformat()
+    return {
+        "id": str(uuid.uuid4()),
+        "name": f"Kid {i}",
+        "age": 5 + i % 10,
+        "grade": str(i % 6 + 1),
+        "avatar": "default",
+        "learning_goals": "Reading, math and science",
+        "created_at": now,
+        "last_activity": now,
+        "progress": progress_blob(subjects)
+    }
+
+
+def run_sync(coroutine):
+    """Drive a coroutine that never suspends (FastAPI's serialize_response for async routes)"""
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("coroutine suspended")
+
+
+def flask_cases(profiles):
+    from app import create_app
+
+    app = create_app()
+    user = {"user_id": str(uuid.uuid4()), "email": "parent@example.com", "full_name": "Parent Name",
+            "phone_number": "", "created_at": profiles[0]["created_at"], "last_login": None}
+    payloads = {
+        "GET /api/profiles": {"profiles": profiles, "count": len(profiles)},
+        "GET /api/profiles/<id>": {"profile": profiles[0]},
+        "POST /api/auth/login": {"message": "Login successful", "token": "x" * 180, "user": user},
+    }
+    return [(f"flask {name}", lambda payload=payload: app.json.response(payload).get_data())
+            for name, payload in payloads.items()]
+
+
+def fastapi_cases(profiles):
+    from fastapi.routing import APIRoute, serialize_response
+
+    import fastapi_app
+
+    routes = {(method, route.path): route for route in fastapi_app.app.routes
+              if isinstance(route, APIRoute) for method in route.methods}
+    user = {"username": "parent", "email": "parent@example.com", "fullName": "Parent Name",
+            "dob": "1985-01-01", "location": "Springfield", "created_at": profiles[0]["created_at"],
+            "last_login": None}
+    payloads = {
+        # The list handler renders its own body (and caches it), without response_model
+        ("GET", "/api/profiles"): ({"profiles": profiles, "count": len(profiles)}, False),
+        ("GET", "/api/profiles/{profile_id}"): ({"profile": profiles[0]}, True),
+        ("POST", "/login"): ({"success": True, "message": "Login successful", "token": "x" * 180,
+                              "user": user}, True),
+    }
+
+    cases = []
+    for (method, path), (payload, validated) in payloads.items():
+        route = routes[(method, path)]
+        if validated:
+            def render(route=route, payload=payload):
+                content = run_sync(serialize_response(field=route.secure_cloned_response_field,
+                                                      response_content=payload))
+                return route.response_class(content).body
+        else:
+            def render(route=route, payload=payload):
+                return route.response_class(payload).body
+        cases.append((f"fastapi {method} {path}", render))
+    return cases
+
+
+def time_per_call(fn, repeat):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization benchmark, stdlib vs orjson")
+    parser.add_argument("--profiles", type=int, default=20, help="profiles in a list response")
+    parser.add_argument("--subjects", type=int, default=6, help="subjects in each progress blob")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    if not fast_json.ORJSON_AVAILABLE:
+        sys.exit("orjson is not installed; pip install orjson")
+
+    profiles = [profile(i, args.subjects) for i in range(args.profiles)]
+    cases = flask_cases(profiles) + fastapi_cases(profiles)
+
+    results = {}
+    for name, fn in cases:
+        measured = {}
+        bodies = {}
+        for label, enabled in (("stdlib", False), ("orjson", True)):
+            fast_json.ENABLED = enabled
+            bodies[label] = fn()
+            measured[f"{label}_us"] = round(time_per_call(fn, args.repeat) * 1e6, 2)
+        if json.loads(bodies["stdlib"]) != json.loads(bodies["orjson"]):
+            sys.exit(f"{name}: orjson output differs from the stdlib's")
+        measured["bytes"] = len(bodies["orjson"])
+        measured["speedup"] = round(measured["stdlib_us"] / measured["orjson_us"], 2)
+        results[name] = measured
+        print(f"{name:>42}: stdlib {measured['stdlib_us']:>9.2f} us  orjson {measured['orjson_us']:>9.2f} us  "
+              f"x{measured['speedup']:<5}  {measured['bytes']} B")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
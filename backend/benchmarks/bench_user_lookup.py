@@ -0,0 +1,127 @@
+"""
+User lookup benchmark: RowKey filter scan vs point read
+
+Seeds a throwaway table on a local Azure Table emulator (Azurite) and, at each
+requested table size, measures the latency of the two ways fastapi_app has
+looked users up:
+
+    scan   query_entities("RowKey eq '<username>'")  (no PartitionKey)
+    point  get_entity(partition_key, row_key)         (storage.UserStore)
+
+Start Azurite first, e.g. `azurite-table --tableHost 127.0.0.1`, then run
+from the backend directory:
+
+    python -m benchmarks.bench_user_lookup --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+from azure.data.tables import TableServiceClient
+
+from storage import UserStore
+
+DEFAULT_CONNECTION_STRING = "UseDevelopmentStorage=true"
+BATCH_SIZE = 100  # Azure limit for a single entity group transaction
+
+
+def seed_users(store, start, end):
+    """Insert users [start, end) using one transaction per 100 rows"""
+    batch = []
+    for i in range(start, end):
+        username = f"user{i:07d}"
+        batch.append(("upsert", {
+            "PartitionKey": store.partition_for(username),
+            "RowKey": username,
+            "email": f"{username}@bench.local",
+            "password_hash": "x",
+            "is_active": True
+        }))
+        if len(batch) == BATCH_SIZE:
+            store.table_client.submit_transaction(batch)
+            batch = []
+    if batch:
+        store.table_client.submit_transaction(batch)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of latencies"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def measure(lookup, usernames):
+    """Run lookup for each username and return latencies in milliseconds"""
+    latencies = []
+    for username in usernames:
+        started = time.perf_counter()
+        lookup(username)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def summarize(latencies):
+    return {
+        "samples": len(latencies),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--connection-string",
+                        default=os.getenv("AZURITE_CONNECTION_STRING", DEFAULT_CONNECTION_STRING))
+    parser.add_argument("--table", default="benchusers")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--point-samples", type=int, default=500)
+    parser.add_argument("--scan-samples", type=int, default=20,
+                        help="scans touch the whole table, keep this small at 1M rows")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded table afterwards")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    service = TableServiceClient.from_connection_string(args.connection_string)
+    service.create_table_if_not_exists(args.table)
+    store = UserStore(service.get_table_client(args.table))
+
+    results = []
+    seeded = 0
+    try:
+        for size in sorted(args.sizes):
+            print(f"Seeding {seeded} -> {size} users...")
+            seed_users(store, seeded, size)
+            seeded = size
+
+            rng = random.Random(size)
+            pick = lambda n: [f"user{rng.randrange(size):07d}" for _ in range(n)]
+
+            scan = measure(
+                lambda u: next(iter(store.table_client.query_entities(f"RowKey eq '{u}'")), None),
+                pick(args.scan_samples)
+            )
+            point = measure(store.get, pick(args.point_samples))
+
+            row = {"users": size, "scan": summarize(scan), "point": summarize(point)}
+            results.append(row)
+            print(f"{size:>9} users | scan p50 {row['scan']['p50_ms']:>10} ms  p99 {row['scan']['p99_ms']:>10} ms"
+                  f" | point p50 {row['point']['p50_ms']:>8} ms  p99 {row['point']['p99_ms']:>8} ms")
+    finally:
+        if not args.keep:
+            service.delete_table(args.table)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
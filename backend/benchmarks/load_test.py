@@ -0,0 +1,292 @@
+"""
+Load test for a running Flask (port 5000) or FastAPI (port 8000) server
+
+Drives realistic request mixes with a fixed number of concurrent clients
+(closed loop) and reports RPS and p50/p95/p99 latency per scenario:
+
+    registration_burst  new accounts registered as fast as possible
+    login_storm         existing users logging in (bcrypt bound)
+    profile_polling     logged-in users re-fetching their profile list
+    profile_churn       logged-in users creating and updating kid profiles
+
+Scenarios a server does not implement are reported as skipped. Setup
+registers --users throwaway accounts, so point it at a test deployment or a
+server started with STORAGE_BACKEND=memory. Run from the backend directory:
+
+    python -m benchmarks.load_test --target flask --concurrency 50 --requests 2000 \\
+        --output results/flask.json
+    python -m benchmarks.load_test --target fastapi --compare results/flask.json
+
+Results are JSON (with the git commit they were taken at), so runs can be
+compared between commits with --compare.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+SCENARIOS = ('registration_burst', 'login_storm', 'profile_polling', 'profile_churn')
+PASSWORD = "LoadTest123"
+
+
+class FlaskTarget:
+    """Request shapes of app.py"""
+
+    name = 'flask'
+    default_url = 'http://localhost:5000'
+    supports = set(SCENARIOS)
+
+    def register(self, n, run_id):
+        return 'POST', '/api/auth/register', {
+            'email': f"load-{run_id}-{n}@loadtest.example.com",
+            'password': PASSWORD,
+            'full_name': f"Load User {n}"
+        }
+
+    def login(self, user):
+        return 'POST', '/api/auth/login', {'email': user['email'], 'password': PASSWORD}
+
+    @staticmethod
+    def token(body):
+        return body['token']
+
+    def list_profiles(self):
+        return 'GET', '/api/profiles', None
+
+    def create_profile(self, n):
+        return 'POST', '/api/profiles', {'name': f"Kid {n}", 'age': 5 + n % 10, 'grade': str(n % 6 + 1)}
+
+    @staticmethod
+    def profile_id(body):
+        return body['profile']['id']
+
+    def update_profile(self, profile_id, n):
+        return 'PUT', f"/api/profiles/{profile_id}", {'name': f"Kid {n}", 'age': 5 + n % 10}
+
+
+class FastAPITarget(FlaskTarget):
+    """Request shapes of fastapi_app.py"""
+
+    name = 'fastapi'
+    default_url = 'http://localhost:8000'
+
+    def register(self, n, run_id):
+        return 'POST', '/register', {
+            'username': f"load{run_id}{n}",
+            'password': PASSWORD,
+            'email': f"load-{run_id}-{n}@loadtest.example.com",
+            'fullName': f"Load User {n}",
+            'dob': '2000-01-01',
+            'location': 'Load Test'
+        }
+
+    def login(self, user):
+        return 'POST', '/login', {'username': user['username'], 'password': PASSWORD}
+
+
+TARGETS = {'flask': FlaskTarget, 'fastapi': FastAPITarget}
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of latencies"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def send(client, method, path, payload=None, token=None, headers=None):
+    headers = dict(headers or {})
+    if token:
+        headers['Authorization'] = f"Bearer {token}"
+    return await client.request(method, path, json=payload, headers=headers)
+
+
+async def run_closed_loop(concurrency, total, operation):
+    """Run operation(i) total times from `concurrency` workers, timing each call"""
+    latencies, statuses = [], Counter()
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                status = await operation(i)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[str(status)] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    errors = sum(count for status, count in statuses.items() if not status.startswith(('2', '3')))
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': dict(statuses),
+        'duration_s': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(statistics.mean(latencies), 2),
+        'max_ms': round(max(latencies), 2)
+    }
+
+
+async def setup_users(client, target, run_id, count, concurrency):
+    """Register and log in `count` users, each with one kid profile if supported"""
+    users = [None] * count
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def prepare(n):
+        async with semaphore:
+            method, path, payload = target.register(n, run_id)
+            response = await send(client, method, path, payload)
+            response.raise_for_status()
+            user = dict(payload)
+            method, path, payload = target.login(user)
+            response = await send(client, method, path, payload)
+            response.raise_for_status()
+            user['token'] = target.token(response.json())
+            if 'profile_churn' in target.supports:
+                method, path, payload = target.create_profile(n)
+                response = await send(client, method, path, payload, token=user['token'])
+                response.raise_for_status()
+                user['profile_id'] = target.profile_id(response.json())
+            users[n] = user
+
+    await asyncio.gather(*(prepare(n) for n in range(count)))
+    return users
+
+
+async def run(args):
+    target = TARGETS[args.target]()
+    base_url = args.url or target.default_url
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        print(f"Setting up {args.users} users on {base_url} ...")
+        users = await setup_users(client, target, run_id, args.users, args.concurrency)
+        etags = {}
+
+        async def registration(i):
+            method, path, payload = target.register(args.users + i, run_id)
+            return (await send(client, method, path, payload)).status_code
+
+        async def login(i):
+            method, path, payload = target.login(users[i % len(users)])
+            return (await send(client, method, path, payload)).status_code
+
+        async def polling(i):
+            user = users[i % len(users)]
+            method, path, _ = target.list_profiles()
+            headers = {}
+            if args.conditional and user['email'] in etags:
+                headers['If-None-Match'] = etags[user['email']]
+            response = await send(client, method, path, token=user['token'], headers=headers)
+            if 'ETag' in response.headers:
+                etags[user['email']] = response.headers['ETag']
+            return response.status_code
+
+        async def churn(i):
+            # Alternate creating a profile and updating the user's first one
+            user = users[i % len(users)]
+            if i % 2:
+                method, path, payload = target.update_profile(user['profile_id'], i)
+            else:
+                method, path, payload = target.create_profile(i)
+            return (await send(client, method, path, payload, token=user['token'])).status_code
+
+        operations = {
+            'registration_burst': registration,
+            'login_storm': login,
+            'profile_polling': polling,
+            'profile_churn': churn
+        }
+        for scenario in args.scenarios:
+            if scenario not in target.supports:
+                results[scenario] = {'skipped': f"not implemented by the {target.name} app"}
+                print(f"{scenario:>20}: skipped")
+                continue
+            result = await run_closed_loop(args.concurrency, args.requests, operations[scenario])
+            results[scenario] = result
+            print(f"{scenario:>20}: {result['rps']:>8} req/s  p50 {result['p50_ms']:>8} ms  "
+                  f"p95 {result['p95_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  errors {result['errors']}")
+
+    return {
+        'target': target.name,
+        'url': base_url,
+        'commit': git_commit(),
+        'started_at': datetime.datetime.utcnow().isoformat() + 'Z',
+        'args': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        'results': results
+    }
+
+
+def compare(report, baseline_path):
+    """Print RPS and p99 change against a previous report"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nAgainst {baseline_path} ({baseline.get('target')} @ {baseline.get('commit')}):")
+    for scenario, result in report['results'].items():
+        before = baseline.get('results', {}).get(scenario)
+        if 'skipped' in result or not before or 'skipped' in before:
+            continue
+        rps = (result['rps'] / before['rps'] - 1) * 100 if before['rps'] else 0.0
+        p99 = (result['p99_ms'] / before['p99_ms'] - 1) * 100 if before['p99_ms'] else 0.0
+        print(f"{scenario:>20}: rps {rps:+6.1f}%   p99 {p99:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test a running AI School server")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="flask")
+    parser.add_argument("--url", help="base URL (default: localhost:5000 for flask, :8000 for fastapi)")
+    parser.add_argument("--scenarios", type=lambda s: s.split(','), default=list(SCENARIOS),
+                        help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--users", type=int, default=50, help="accounts created during setup")
+    parser.add_argument("--conditional", action="store_true",
+                        help="poll with If-None-Match revalidation")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="previous JSON report to compare against")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
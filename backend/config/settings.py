@@ -14,12 +14,108 @@ class Config:
     JWT_EXPIRATION_HOURS = 24
     JWT_ALGORITHM = 'HS256'
     
+    # Storage backend: 'azure', or 'memory' for the in-process stand-in used for
+    # local load tests. MEMORY_STORAGE_LATENCY_MS is "10" for every operation
+    # or per operation, e.g. "get=8,query=15,create=12,update=12,transaction=20";
+    # up to MEMORY_STORAGE_JITTER_MS of random delay is added to each call.
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'azure').lower()
+    MEMORY_STORAGE_LATENCY_MS = os.getenv('MEMORY_STORAGE_LATENCY_MS', '0')
+    MEMORY_STORAGE_JITTER_MS = float(os.getenv('MEMORY_STORAGE_JITTER_MS', '0'))
+    
     # Table Storage Configuration
     USERS_TABLE_NAME = 'users'
+    EMAIL_INDEX_TABLE_NAME = 'useremails'
+    KIDS_PROFILES_TABLE_NAME = 'kidsprofiles'
+    
+    # Tables are created lazily, once per process. Set to true where deployment
+    # already created them, to skip the create_table round trips entirely.
+    STORAGE_TABLES_PROVISIONED = os.getenv('STORAGE_TABLES_PROVISIONED', 'False').lower() == 'true'
+    
+    # Number of hash-sharded partitions for FastAPI users and the email index
+    # (1 keeps the single legacy partition). Changing it requires running
+    # migrate_user_partitions.py; keep the legacy fallback on until it is done.
+    USER_PARTITION_SHARDS = int(os.getenv('USER_PARTITION_SHARDS', '1'))
+    USER_PARTITION_LEGACY_FALLBACK = os.getenv('USER_PARTITION_LEGACY_FALLBACK', 'True').lower() == 'true'
+    
+    # Connections in the shared pool of the async (FastAPI) Azure clients
+    AZURE_HTTP_POOL_SIZE = int(os.getenv('AZURE_HTTP_POOL_SIZE', '100'))
+    
+    # In-process user entity cache (0 entries or 0 seconds disables it)
+    USER_CACHE_MAX_ENTRIES = int(os.getenv('USER_CACHE_MAX_ENTRIES', '10000'))
+    USER_CACHE_TTL_SECONDS = float(os.getenv('USER_CACHE_TTL_SECONDS', '60'))
+    
+    # Serialized GET /api/profiles responses, per parent user
+    PROFILE_LIST_CACHE_MAX_ENTRIES = int(os.getenv('PROFILE_LIST_CACHE_MAX_ENTRIES', '10000'))
+    PROFILE_LIST_CACHE_TTL_SECONDS = float(os.getenv('PROFILE_LIST_CACHE_TTL_SECONDS', '30'))
+    
+    # The user and profile list caches live in each process, and a write only
+    # invalidates them in the process that handled it. With several worker
+    # processes, another worker keeps serving the old user (up to
+    # USER_CACHE_TTL_SECONDS) or the old profile list and its ETag (up to
+    # PROFILE_LIST_CACHE_TTL_SECONDS), e.g. to the list reload right after a
+    # profile is created. PROCESS_CACHES=auto keeps them only while one process
+    # serves requests (WEB_PROCESSES, which gunicorn.conf.py sets from its
+    # worker count); 'on' accepts that staleness for fewer storage reads, 'off'
+    # always disables them.
+    PROCESS_CACHES = os.getenv('PROCESS_CACHES', 'auto').lower()
+    WEB_PROCESSES = int(os.getenv('WEB_PROCESSES', '1'))
+    
+    # Profile delta sync re-reads this many seconds before a change token, for
+    # writes that commit with a Timestamp older than the newest one already sent
+    PROFILE_SYNC_OVERLAP_SECONDS = float(os.getenv('PROFILE_SYNC_OVERLAP_SECONDS', '2'))
+    
+    # bcrypt executor: concurrent hashes, and jobs allowed to wait for a worker
+    # before new password work is rejected with 503
+    BCRYPT_MAX_WORKERS = int(os.getenv('BCRYPT_MAX_WORKERS', str(os.cpu_count() or 1)))
+    BCRYPT_MAX_QUEUE = int(os.getenv('BCRYPT_MAX_QUEUE', '32'))
+    
+    # bcrypt cost factor for new hashes; stored hashes with a lower cost are
+    # upgraded on login. BCRYPT_CALIBRATE picks the highest cost that hashes
+    # within BCRYPT_TARGET_MS on this host at startup instead.
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+    BCRYPT_CALIBRATE = os.getenv('BCRYPT_CALIBRATE', 'False').lower() == 'true'
+    BCRYPT_TARGET_MS = float(os.getenv('BCRYPT_TARGET_MS', '250'))
+    
+    # Write-behind queue for last_login / last_activity timestamps
+    WRITE_BEHIND_FLUSH_INTERVAL_SECONDS = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL_SECONDS', '2.0'))
+    WRITE_BEHIND_MAX_PENDING = int(os.getenv('WRITE_BEHIND_MAX_PENDING', '500'))
+    
+    # Log records buffered for the background log writer before new ones are dropped
+    LOG_QUEUE_MAX_RECORDS = int(os.getenv('LOG_QUEUE_MAX_RECORDS', '10000'))
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    
+    # One JSON line per request: fraction of successful requests written;
+    # errors and requests slower than REQUEST_LOG_SLOW_MS are always written
+    REQUEST_LOG_SAMPLE_RATE = float(os.getenv('REQUEST_LOG_SAMPLE_RATE', '0.1'))
+    REQUEST_LOG_SLOW_MS = float(os.getenv('REQUEST_LOG_SLOW_MS', '500'))
+    
+    # Production server (gunicorn -c gunicorn.conf.py): pre-forked worker
+    # processes, each with WEB_THREADS request threads
+    WEB_BIND = os.getenv('WEB_BIND', '0.0.0.0:5000')
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', str((os.cpu_count() or 1) * 2 + 1)))
+    WEB_THREADS = int(os.getenv('WEB_THREADS', '4'))
+    WEB_TIMEOUT_SECONDS = int(os.getenv('WEB_TIMEOUT_SECONDS', '30'))
+    
+    # Encode API responses with orjson when it is installed (false: stdlib json)
+    FAST_JSON = os.getenv('FAST_JSON', 'True').lower() == 'true'
+    
+    # Response compression: brotli (if installed) or gzip, for bodies of at
+    # least COMPRESSION_MIN_BYTES
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '5'))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
     
     # Flask Configuration
     DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     
+    @classmethod
+    def process_caches_enabled(cls) -> bool:
+        """Whether the per-process user and profile list caches are used (see PROCESS_CACHES)"""
+        if cls.PROCESS_CACHES == 'auto':
+            return cls.WEB_PROCESSES <= 1
+        return cls.PROCESS_CACHES == 'on'
+    
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
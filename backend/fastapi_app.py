@@ -3,49 +3,256 @@ AI School FastAPI Backend Server
 User authentication with Azure Table Storage using FastAPI
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Body, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from azure.data.tables import TableServiceClient, TableEntity
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from azure.data.tables import TableEntity, UpdateMode
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, EmailStr, field_validator
-import bcrypt
 import jwt
 import datetime
-from typing import Optional
+import hashlib
+from typing import Any, Dict, List, Optional
 import os
+import sys
+import logging
 from dotenv import load_dotenv
+from storage import (
+    CountingTableClient, DuplicateEmailError, WriteBehindQueue, TTLCache, LatencyModel, TableProvisioner,
+    create_table_service, start_request_stats
+)
+from storage.aio import AsyncTableStorage, AsyncUserStore, AsyncEmailIndex, AsyncKidProfileStore
+from config import Config
+from serialization import (
+    fast_json, EncodedBody, choose_encoding, compress, encoded_etag, etag_variants, should_compress
+)
+from models import (
+    PROGRESS_PATCH_ATTEMPTS, InvalidProgressEvents, InvalidProgressPatch, ProgressPreconditionFailed,
+    aggregate_events, apply_progress_patch, build_changes, changes_query, decode_change_token,
+    kid_profile_from_entity, new_kid_profile_entity, progress_etag
+)
+from auth import hash_password_async, verify_password_async, password_pool, PasswordHasherBusy
+from observability import RequestLogger, RequestLogFormatter, start_queue_logging
+from observability.timing import span, start_request_timings
+from observability.metrics import HTTP_REQUESTS_IN_FLIGHT, METRICS_AVAILABLE, observe_request, render_metrics
 
 # Load environment variables
 load_dotenv()
 
 # Configuration
 AZURE_CONN_STR = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
-if not AZURE_CONN_STR:
+if not AZURE_CONN_STR and Config.STORAGE_BACKEND == 'azure':
     raise ValueError("AZURE_STORAGE_CONNECTION_STRING environment variable is required")
 
-TABLE_NAME = "users"
+TABLE_NAME = Config.USERS_TABLE_NAME
+EMAIL_INDEX_TABLE_NAME = Config.EMAIL_INDEX_TABLE_NAME
+KIDS_PROFILES_TABLE_NAME = Config.KIDS_PROFILES_TABLE_NAME
 SECRET_KEY = os.getenv('SECRET_KEY')
 if not SECRET_KEY:
     raise ValueError("SECRET_KEY environment variable is required")
 
-# Azure Table Storage setup
-table_service = TableServiceClient.from_connection_string(conn_str=AZURE_CONN_STR)
+# Azure Table Storage setup (or the in-memory stand-in, see STORAGE_BACKEND)
+storage_latency = LatencyModel.parse(Config.MEMORY_STORAGE_LATENCY_MS, Config.MEMORY_STORAGE_JITTER_MS)
+table_service = create_table_service(AZURE_CONN_STR, backend=Config.STORAGE_BACKEND, latency=storage_latency)
+
+# Tables are created once per process, off the import path: started in the
+# background on startup, awaited by the first request that needs them
+table_provisioner = TableProvisioner(
+    table_service,
+    (TABLE_NAME, EMAIL_INDEX_TABLE_NAME, KIDS_PROFILES_TABLE_NAME),
+    skip=Config.STORAGE_TABLES_PROVISIONED
+)
+
+# Sync client, used by the write-behind queue's background thread
+table_client = CountingTableClient(table_service.get_table_client(table_name=TABLE_NAME))
+
+# Async clients for request handlers; connected on startup (see open_storage)
+async_storage = AsyncTableStorage(
+    AZURE_CONN_STR,
+    pool_size=Config.AZURE_HTTP_POOL_SIZE,
+    backend=Config.STORAGE_BACKEND,
+    latency=storage_latency
+)
+email_index = AsyncEmailIndex(
+    None,
+    shards=Config.USER_PARTITION_SHARDS,
+    legacy_fallback=Config.USER_PARTITION_LEGACY_FALLBACK
+)
+# Per-process caches, off while several worker processes would each keep
+# their own stale copy (see Config.PROCESS_CACHES)
+process_caches = Config.process_caches_enabled()
+user_cache = TTLCache(Config.USER_CACHE_MAX_ENTRIES if process_caches else 0, Config.USER_CACHE_TTL_SECONDS,
+                      name='users')
+user_store = AsyncUserStore(
+    None,
+    email_index=email_index,
+    shards=Config.USER_PARTITION_SHARDS,
+    legacy_fallback=Config.USER_PARTITION_LEGACY_FALLBACK,
+    cache=user_cache
+)
+kid_profile_store = AsyncKidProfileStore(None)
+
+# Serialized profile list responses (EncodedBody: ETag and compressed
+# variants), keyed by parent username; invalidated by every kid profile write
+profile_list_cache = TTLCache(
+    Config.PROFILE_LIST_CACHE_MAX_ENTRIES if process_caches else 0,
+    Config.PROFILE_LIST_CACHE_TTL_SECONDS,
+    name='profile_lists'
+)
+
+# Timestamp updates are written in the background, off the request path
+write_behind = WriteBehindQueue(
+    flush_interval=Config.WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+    max_pending=Config.WRITE_BEHIND_MAX_PENDING
+)
+
+# Console logging through the non-blocking queue, request lines as bare JSON
+console_handler = logging.StreamHandler(sys.stdout)
+console_handler.setFormatter(RequestLogFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+start_queue_logging(
+    [console_handler],
+    max_records=Config.LOG_QUEUE_MAX_RECORDS,
+    level=getattr(logging, Config.LOG_LEVEL, logging.INFO)
+)
+
+logger = logging.getLogger('ai_school.fastapi')
+
+# Structured per-request log lines, sampled for successful requests
+request_logger = RequestLogger(Config.REQUEST_LOG_SAMPLE_RATE, Config.REQUEST_LOG_SLOW_MS)
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse using orjson when enabled, reporting serialization time as the json span"""
+
+    def render(self, content) -> bytes:
+        with span("json"):
+            if fast_json.ENABLED:
+                return fast_json.dumps(content)
+            return super().render(content)
+
+class RequestTimingMiddleware:
+    """Server-Timing and X-Storage-Calls headers, and the request log line
+    
+    Plain ASGI rather than BaseHTTPMiddleware, so handlers run in the same
+    task and see the timings and storage stats context variables.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-# Create table if it doesn't exist
-try:
-    table_service.create_table(TABLE_NAME)
-    print(f"✓ Table '{TABLE_NAME}' created or already exists")
-except Exception as e:
-    if "already exists" not in str(e).lower():
-        print(f"Error creating table: {e}")
+        timings = start_request_timings()
+        storage_stats = start_request_stats()
+        status_code = 500
+        HTTP_REQUESTS_IN_FLIGHT.inc()
 
-table_client = table_service.get_table_client(table_name=TABLE_NAME)
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.server_timing())
+                headers.append("X-Storage-Calls", repr(storage_stats))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            duration_ms = timings.elapsed_ms()
+            observe_request(scope["method"], route, status_code, duration_ms / 1000)
+            request_logger.log(
+                scope["method"],
+                route,
+                status_code,
+                duration_ms,
+                user_id=scope.get("state", {}).get("user_id"),
+                storage={"reads": storage_stats.reads, "writes": storage_stats.writes},
+                spans=timings.as_dict()
+            )
+
+class CompressionMiddleware:
+    """Compress large JSON bodies for clients that accept it
+
+    Plain ASGI like RequestTimingMiddleware, and inside it, so the compress
+    span is part of Server-Timing. Streamed bodies and responses that are
+    already encoded (cached profile lists) pass through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held back until the body shows whether it gets compressed
+                start = message
+                return
+            if message["type"] == "http.response.body" and start is not None:
+                headers = MutableHeaders(scope=start)
+                body = message.get("body", b"")
+                if (start["status"] == 200 and not message.get("more_body", False)
+                        and "content-encoding" not in headers):
+                    if "accept-encoding" not in headers.get("vary", "").lower():
+                        headers.add_vary_header("Accept-Encoding")
+                    if should_compress(headers.get("content-type"), len(body)):
+                        body = compress(body, encoding)
+                        headers["Content-Encoding"] = encoding
+                        headers["Content-Length"] = str(len(body))
+                        etag = headers.get("etag")
+                        if etag:
+                            weak = etag.startswith("W/")
+                            tag = encoded_etag(etag.removeprefix("W/").strip('"'), encoding)
+                            headers["ETag"] = f'W/"{tag}"' if weak else f'"{tag}"'
+                        message = {**message, "body": body}
+                await send(start)
+                start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
 
 # FastAPI app initialization
+# Paths answered without touching table storage
+STORAGE_FREE_PATHS = {"/", "/health", "/live", "/ready", "/metrics", "/logout"}
+
+async def require_storage(request: Request):
+    """Wait for table provisioning on requests that use storage; 503 if it fails"""
+    if table_provisioner.ready or request.url.path in STORAGE_FREE_PATHS:
+        return
+    try:
+        await run_in_threadpool(table_provisioner.ensure)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Storage is not available yet, please try again shortly",
+            headers={"Retry-After": "1"}
+        )
+
 app = FastAPI(
     title="AI School Backend API",
     description="Authentication server for AI School mobile app",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=TimedJSONResponse,
+    dependencies=[Depends(require_storage)]
 )
 
 # CORS middleware
@@ -56,6 +263,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(RequestTimingMiddleware)
 
 # Security
 security = HTTPBearer()
@@ -130,15 +339,96 @@ class MessageResponse(BaseModel):
     success: bool
     message: str
 
-# Utility functions
-def hash_password(password: str) -> str:
-    """Hash password using bcrypt"""
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+class KidProfileCreate(BaseModel):
+    name: str
+    age: int
+    grade: Optional[str] = ""
+    avatar: Optional[str] = "default"
+    learning_goals: Optional[str] = ""
+    
+    @field_validator('name')
+    @classmethod
+    def validate_name(cls, v):
+        if not v.strip():
+            raise ValueError('Name is required')
+        return v.strip()
+    
+    @field_validator('age')
+    @classmethod
+    def validate_age(cls, v):
+        if v < 3 or v > 18:
+            raise ValueError('Age must be between 3 and 18')
+        return v
+    
+    @field_validator('grade', 'learning_goals')
+    @classmethod
+    def strip_text(cls, v):
+        return v.strip() if v else ""
 
-def verify_password(password: str, hashed: str) -> bool:
-    """Verify password against hash"""
-    return bcrypt.checkpw(password.encode(), hashed.encode())
+class KidProfileUpdate(BaseModel):
+    name: Optional[str] = None
+    age: Optional[int] = None
+    grade: Optional[str] = None
+    avatar: Optional[str] = None
+    learning_goals: Optional[str] = None
+    progress: Optional[str] = None  # JSON string
+    
+    @field_validator('name')
+    @classmethod
+    def validate_name(cls, v):
+        if v is not None and not v.strip():
+            raise ValueError('Name cannot be empty')
+        return v.strip() if v is not None else v
+    
+    @field_validator('age')
+    @classmethod
+    def validate_age(cls, v):
+        if v is not None and (v < 3 or v > 18):
+            raise ValueError('Age must be between 3 and 18')
+        return v
+
+class KidProfile(BaseModel):
+    """A kid profile as the Android app reads it (same shape as the Flask API)"""
+    id: str
+    name: str
+    age: int
+    grade: str
+    avatar: str
+    learning_goals: str
+    created_at: str
+    last_activity: Optional[str] = None
+    progress: str = "{}"
+
+class KidProfileResponse(BaseModel):
+    profile: KidProfile
+
+class KidProfileSavedResponse(BaseModel):
+    message: str
+    profile: KidProfile
+
+class KidProfileListResponse(BaseModel):
+    profiles: List[KidProfile]
+    count: int
+
+class KidProgressResponse(BaseModel):
+    progress: str
+
+class ProgressEventsRequest(BaseModel):
+    events: List[Dict[str, Any]]
 
+class ProgressEventsResponse(BaseModel):
+    message: str
+    accepted: int
+    updated: List[str]
+    skipped: List[str]
+
+class KidProfileSyncResponse(BaseModel):
+    profiles: List[KidProfile]
+    deleted: List[str]
+    token: str
+    full: bool
+
+# Utility functions
 def generate_jwt_token(username: str, email: str) -> str:
     """Generate JWT token"""
     payload = {
@@ -147,12 +437,14 @@ def generate_jwt_token(username: str, email: str) -> str:
         'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24),
         'iat': datetime.datetime.utcnow()
     }
-    return jwt.encode(payload, SECRET_KEY, algorithm='HS256')
+    with span("jwt"):
+        return jwt.encode(payload, SECRET_KEY, algorithm='HS256')
 
 def verify_jwt_token(token: str) -> dict:
     """Verify JWT token"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        with span("jwt"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -165,15 +457,15 @@ def verify_jwt_token(token: str) -> dict:
             detail="Invalid token"
         )
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current user from JWT token"""
     token = credentials.credentials
     payload = verify_jwt_token(token)
+    request.state.user_id = payload['username']
     
     # Get user from database
     try:
-        entities = table_client.query_entities(f"RowKey eq '{payload['username']}'")
-        entity = next(entities, None)
+        entity = await user_store.get(payload['username'])
         if not entity:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -186,20 +478,78 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="Could not validate credentials"
         )
 
-def update_last_login(username: str):
-    """Update user's last login timestamp"""
+async def get_current_username(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Username from the JWT, without reading the user entity"""
+    payload = verify_jwt_token(credentials.credentials)
+    request.state.user_id = payload['username']
+    return payload['username']
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names the (strong) etag, in any content coding"""
+    if not if_none_match:
+        return False
+    variants = etag_variants(etag)
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/").strip('"') in variants:
+            return True
+    return False
+
+def if_match_satisfied(if_match: str, etag: str) -> bool:
+    """Whether an If-Match header names the etag, in any content coding (strong comparison)"""
+    variants = etag_variants(etag)
+    for candidate in if_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or (not candidate.startswith("W/") and candidate.strip('"') in variants):
+            return True
+    return False
+
+def update_last_login(entity: TableEntity):
+    """Queue a last login timestamp update for a loaded user entity
+    
+    The cached user is dropped once the write-behind queue has written the
+    merge, so a read in between cannot re-cache it without last_login.
+    """
+    username = entity["RowKey"]
     try:
-        entities = table_client.query_entities(f"RowKey eq '{username}'")
-        entity = next(entities, None)
-        if entity:
-            entity["last_login"] = datetime.datetime.utcnow().isoformat()
-            table_client.update_entity(entity, mode='merge')
+        write_behind.merge(
+            table_client,
+            entity["PartitionKey"],
+            username,
+            {"last_login": datetime.datetime.utcnow().isoformat()},
+            on_flushed=lambda: user_store.invalidate(username)
+        )
     except Exception as e:
-        print(f"Error updating last login: {e}")
+        logger.error("Error updating last login: %s", e)
+
+def upgrade_password_hash(entity: TableEntity, password: str):
+    """Re-hash a verified password at the configured cost in the background
+    
+    The write is conditional on the entity's ETag, so a concurrent password
+    change wins; a skipped upgrade is retried on the next login.
+    """
+    etag = getattr(entity, "metadata", {}).get("etag")
+    if not etag:
+        return
+
+    def store(new_hash: str):
+        try:
+            table_client.update_entity(
+                {"PartitionKey": entity["PartitionKey"], "RowKey": entity["RowKey"], "password_hash": new_hash},
+                mode=UpdateMode.MERGE,
+                etag=etag,
+                match_condition=MatchConditions.IfNotModified
+            )
+        except ResourceModifiedError:
+            pass
+        finally:
+            user_store.invalidate(entity["RowKey"])
+
+    password_pool.rehash_in_background(password, store)
 
 # API Routes
 @app.get("/", response_model=MessageResponse)
-def root():
+async def root():
     """Root endpoint"""
     return {
         "success": True,
@@ -207,28 +557,45 @@ def root():
     }
 
 @app.get("/health", response_model=MessageResponse)
-def health_check():
+async def health_check():
     """Health check endpoint"""
     return {
         "success": True,
         "message": "AI School Backend Server is healthy"
     }
 
+@app.get("/live", response_model=MessageResponse)
+async def liveness():
+    """Liveness probe: the process is up and serving, whatever the state of storage"""
+    return {
+        "success": True,
+        "message": "alive"
+    }
+
+@app.get("/ready", response_model=MessageResponse)
+async def readiness():
+    """Readiness probe: 200 once the tables are provisioned, 503 (and provisioning started) until then"""
+    if table_provisioner.ready:
+        return {"success": True, "message": "ready"}
+    table_provisioner.start()
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"success": False, "message": table_provisioner.error or "starting"}
+    )
+
 @app.post("/register", response_model=RegisterResponse)
-def register(user: UserRegister):
+async def register(user: UserRegister, request: Request):
     """User registration endpoint"""
     try:
         # Check if user already exists
-        entities = table_client.query_entities(f"RowKey eq '{user.username}'")
-        if list(entities):
+        if await user_store.exists(user.username):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User already exists"
             )
         
         # Check if email already exists
-        email_entities = table_client.query_entities(f"email eq '{user.email}'")
-        if list(email_entities):
+        if await email_index.lookup(user.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
@@ -236,10 +603,9 @@ def register(user: UserRegister):
         
         # Create new user entity
         entity = TableEntity()
-        entity["PartitionKey"] = "User"
         entity["RowKey"] = user.username
         entity["email"] = user.email
-        entity["password_hash"] = hash_password(user.password)
+        entity["password_hash"] = await hash_password_async(user.password)
         entity["fullName"] = user.fullName
         entity["dob"] = user.dob
         entity["location"] = user.location
@@ -248,10 +614,22 @@ def register(user: UserRegister):
         entity["is_active"] = True
         
         # Save to database
-        table_client.create_entity(entity)
+        try:
+            await user_store.create(entity)
+        except ResourceExistsError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="User already exists"
+            )
+        except DuplicateEmailError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
         
         # Generate JWT token
         token = generate_jwt_token(user.username, user.email)
+        request.state.user_id = user.username
         
         # Prepare response
         user_response = UserResponse(
@@ -270,22 +648,21 @@ def register(user: UserRegister):
             user=user_response
         )
         
-    except HTTPException:
+    except (HTTPException, PasswordHasherBusy):
         raise
     except Exception as e:
-        print(f"Registration error: {e}")
+        logger.error("Registration error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
         )
 
 @app.post("/login", response_model=LoginResponse)
-def login(user: UserLogin):
+async def login(user: UserLogin, request: Request):
     """User login endpoint"""
     try:
         # Find user by username
-        entities = table_client.query_entities(f"RowKey eq '{user.username}'")
-        entity = next(entities, None)
+        entity = await user_store.get(user.username)
         
         if not entity:
             raise HTTPException(
@@ -294,7 +671,7 @@ def login(user: UserLogin):
             )
         
         # Verify password
-        if not verify_password(user.password, entity["password_hash"]):
+        if not await verify_password_async(user.password, entity["password_hash"]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid username or password"
@@ -307,11 +684,16 @@ def login(user: UserLogin):
                 detail="Account is deactivated"
             )
         
+        # Upgrade hashes created with a lower bcrypt cost
+        if password_pool.needs_rehash(entity["password_hash"]):
+            upgrade_password_hash(entity, user.password)
+        
         # Update last login
-        update_last_login(user.username)
+        update_last_login(entity)
         
         # Generate JWT token
         token = generate_jwt_token(user.username, entity["email"])
+        request.state.user_id = user.username
         
         # Prepare response
         user_response = UserResponse(
@@ -331,17 +713,17 @@ def login(user: UserLogin):
             user=user_response
         )
         
-    except HTTPException:
+    except (HTTPException, PasswordHasherBusy):
         raise
     except Exception as e:
-        print(f"Login error: {e}")
+        logger.error("Login error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
         )
 
 @app.get("/profile", response_model=UserResponse)
-def get_profile(current_user = Depends(get_current_user)):
+async def get_profile(current_user = Depends(get_current_user)):
     """Get user profile (protected endpoint)"""
     try:
         return UserResponse(
@@ -354,14 +736,268 @@ def get_profile(current_user = Depends(get_current_user)):
             last_login=current_user.get("last_login")
         )
     except Exception as e:
-        print(f"Profile error: {e}")
+        logger.error("Profile error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
         )
 
+# Kids profiles, same paths and JSON as the Flask API's /api/profiles
+@app.get("/api/profiles", response_model=KidProfileListResponse)
+async def list_kid_profiles(request: Request, username: str = Depends(get_current_username)):
+    """Get all kids profiles for the authenticated user
+    
+    The serialized list is cached per user and carries a strong ETag, so a
+    client sending If-None-Match gets an empty 304 while nothing changed.
+    """
+    try:
+        cached = profile_list_cache.get(username)
+        if cached is None:
+            entities = await kid_profile_store.list_active(username)
+            profiles = [kid_profile_from_entity(entity) for entity in entities]
+            body = TimedJSONResponse({"profiles": profiles, "count": len(profiles)}).body
+            cached = EncodedBody(body, hashlib.sha256(body).hexdigest())
+            profile_list_cache.set(username, cached)
+        
+        # Compressed once per cached list, not per request
+        encoding = cached.encoding_for(request.headers.get("accept-encoding"))
+        headers = {
+            "ETag": f'"{encoded_etag(cached.etag, encoding)}"',
+            "Cache-Control": "private, no-cache",
+            "Vary": "Accept-Encoding"
+        }
+        if etag_matches(request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=cached.get(encoding), media_type="application/json", headers=headers)
+    except Exception as e:
+        logger.error("Get profiles error for %s: %s", username, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+@app.post("/api/profiles", response_model=KidProfileSavedResponse, status_code=status.HTTP_201_CREATED)
+async def create_kid_profile(profile: KidProfileCreate, username: str = Depends(get_current_username)):
+    """Create a new kid profile"""
+    try:
+        entity = new_kid_profile_entity(
+            username, profile.name, profile.age, profile.grade, profile.avatar, profile.learning_goals
+        )
+        await kid_profile_store.create(entity)
+        profile_list_cache.invalidate(username)
+        return {
+            "message": "Kid profile created successfully",
+            "profile": kid_profile_from_entity(entity)
+        }
+    except Exception as e:
+        logger.error("Create profile error for %s: %s", username, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create profile"
+        )
+
+# Registered before /api/profiles/{profile_id}, which would match "sync" as an id
+@app.get("/api/profiles/sync", response_model=KidProfileSyncResponse)
+async def sync_kid_profiles(response: Response, since: Optional[str] = None,
+                            username: str = Depends(get_current_username)):
+    """Kids profiles changed since a change token
+    
+    ?since=<token> returns the profiles created or modified since the token
+    and the ids of those deleted; without a token (or with an unreadable one)
+    every active profile comes back with full=true. Either way the response
+    carries the token for the next sync.
+    """
+    since_timestamp = decode_change_token(since)
+    if since and since_timestamp is None:
+        logger.warning("Sync profiles for %s: unreadable change token, sending a full list", username)
+    try:
+        entities = await kid_profile_store.query(*changes_query(username, since_timestamp))
+    except Exception as e:
+        logger.error("Sync profiles error for %s: %s", username, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to sync profiles"
+        )
+    response.headers["Cache-Control"] = "private, no-store"
+    return build_changes(entities, since_timestamp)
+
+@app.get("/api/profiles/{profile_id}", response_model=KidProfileResponse)
+async def get_kid_profile(profile_id: str, username: str = Depends(get_current_username)):
+    """Get a specific kid profile"""
+    try:
+        entity = await kid_profile_store.get(username, profile_id)
+    except Exception as e:
+        logger.error("Get profile %s error: %s", profile_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+    if entity is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return {"profile": kid_profile_from_entity(entity)}
+
+@app.put("/api/profiles/{profile_id}", response_model=KidProfileSavedResponse)
+async def update_kid_profile(profile_id: str, update: KidProfileUpdate,
+                             username: str = Depends(get_current_username)):
+    """Update a kid profile"""
+    try:
+        entity = await kid_profile_store.update(username, profile_id, update.model_dump(exclude_none=True))
+    except Exception as e:
+        logger.error("Update profile %s error: %s", profile_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+    finally:
+        profile_list_cache.invalidate(username)
+    if entity is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found or update failed"
+        )
+    return {
+        "message": "Profile updated successfully",
+        "profile": kid_profile_from_entity(entity)
+    }
+
+@app.get("/api/profiles/{profile_id}/progress", response_model=KidProgressResponse)
+async def get_kid_progress(profile_id: str, request: Request, response: Response,
+                           username: str = Depends(get_current_username)):
+    """Get a kid's progress and its ETag"""
+    try:
+        entity = await kid_profile_store.get(username, profile_id)
+    except Exception as e:
+        logger.error("Get progress %s error: %s", profile_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+    if entity is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    progress = entity.get("progress") or "{}"
+    etag = progress_etag(progress)
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return {"progress": progress}
+
+@app.patch("/api/profiles/{profile_id}/progress", response_model=KidProgressResponse)
+async def patch_kid_progress(profile_id: str, request: Request, response: Response,
+                             patch: Any = Body(..., media_type="application/merge-patch+json"),
+                             username: str = Depends(get_current_username)):
+    """Update a kid's progress with a JSON merge patch (RFC 7396)
+    
+    The body holds only the keys to change, null removing a key. With
+    If-Match the patch applies only while the progress still has that ETag
+    (412 otherwise); concurrent patches without it are merged in turn.
+    """
+    if_match = request.headers.get("if-match")
+    
+    def rewrite(current: str) -> str:
+        if if_match is not None and not if_match_satisfied(if_match, progress_etag(current)):
+            raise ProgressPreconditionFailed(profile_id)
+        return apply_progress_patch(current, patch)
+    
+    try:
+        progress = await kid_profile_store.rewrite_progress(username, profile_id, rewrite,
+                                                            attempts=PROGRESS_PATCH_ATTEMPTS)
+    except InvalidProgressPatch as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ProgressPreconditionFailed:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Progress has changed, reload it and retry"
+        )
+    except ResourceModifiedError:
+        logger.warning("Patch progress %s: too many concurrent writes", profile_id)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Progress is being updated concurrently, retry"
+        )
+    except Exception as e:
+        logger.error("Patch progress %s error: %s", profile_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+    finally:
+        profile_list_cache.invalidate(username)
+    if progress is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    response.headers["ETag"] = f'"{progress_etag(progress)}"'
+    response.headers["Cache-Control"] = "private, no-cache"
+    return {"progress": progress}
+
+@app.delete("/api/profiles/{profile_id}", response_model=MessageResponse)
+async def delete_kid_profile(profile_id: str, username: str = Depends(get_current_username)):
+    """Delete a kid profile (soft delete, the profile is marked inactive)"""
+    try:
+        deleted = await kid_profile_store.deactivate(username, profile_id)
+    except Exception as e:
+        logger.error("Delete profile %s error: %s", profile_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+    finally:
+        profile_list_cache.invalidate(username)
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return MessageResponse(success=True, message="Profile deleted successfully")
+
+@app.post("/api/progress/events", response_model=ProgressEventsResponse)
+async def record_progress_events(batch: ProgressEventsRequest, username: str = Depends(get_current_username)):
+    """Record a batch of progress events across the user's kids
+    
+    Each event is {"profile_id", "occurred_at", "progress": merge patch}, up
+    to 1000 per request. Events are applied per profile in occurred_at
+    order; events for missing or deleted profiles are skipped.
+    """
+    try:
+        aggregates = aggregate_events(batch.events)
+        updated, skipped = await kid_profile_store.write_progress_events(
+            username, aggregates, attempts=PROGRESS_PATCH_ATTEMPTS
+        )
+    except (InvalidProgressEvents, InvalidProgressPatch) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ResourceModifiedError:
+        logger.warning("Record progress events for %s: too many concurrent writes", username)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Profiles are being updated concurrently, retry"
+        )
+    except Exception as e:
+        logger.error("Record progress events error for %s: %s", username, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+    finally:
+        profile_list_cache.invalidate(username)
+    return {
+        "message": "Progress events recorded",
+        "accepted": len(batch.events),
+        "updated": updated,
+        "skipped": skipped
+    }
+
 @app.post("/logout", response_model=MessageResponse)
-def logout():
+async def logout():
     """User logout endpoint"""
     # Since we're using stateless JWT tokens, logout is handled client-side
     return MessageResponse(
@@ -369,14 +1005,59 @@ def logout():
         message="Logged out successfully"
     )
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics, aggregated over all workers in multiprocess mode"""
+    if not METRICS_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="prometheus_client is not installed"
+        )
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.on_event("startup")
+async def open_storage():
+    """Open the pooled async Azure clients inside the event loop, start table provisioning"""
+    table_provisioner.start()
+    await async_storage.open()
+    email_index.table_client = CountingTableClient(async_storage.get_table_client(EMAIL_INDEX_TABLE_NAME))
+    user_store.table_client = CountingTableClient(async_storage.get_table_client(TABLE_NAME))
+    kid_profile_store.table_client = CountingTableClient(async_storage.get_table_client(KIDS_PROFILES_TABLE_NAME))
+
+@app.on_event("shutdown")
+async def close_storage():
+    """Write queued timestamp updates and close the Azure clients"""
+    await run_in_threadpool(write_behind.stop)
+    await async_storage.close()
+
 # Error handlers
+@app.exception_handler(PasswordHasherBusy)
+async def password_pool_busy_handler(request, exc):
+    """Fail fast with 503 when password hashing capacity is exhausted"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please try again shortly"},
+        headers={"Retry-After": "1"}
+    )
+
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return {"success": False, "message": "Endpoint not found"}
+    # Routes raising HTTPException(404) keep their own detail
+    detail = getattr(exc, "detail", None)
+    if detail and detail != "Not Found":
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": detail})
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND,
+        content={"success": False, "message": "Endpoint not found"}
+    )
 
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
-    return {"success": False, "message": "Internal server error"}
+    return JSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"success": False, "message": "Internal server error"}
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -387,6 +1068,12 @@ if __name__ == "__main__":
     print("   POST /register")
     print("   POST /login")
     print("   GET  /profile")
+    print("   📋 Kids Profiles:")
+    print("   GET  /api/profiles")
+    print("   POST /api/profiles")
+    print("   GET  /api/profiles/{id}")
+    print("   PUT  /api/profiles/{id}")
+    print("   DELETE /api/profiles/{id}")
     print("   POST /logout")
     print("   GET  /docs (Swagger UI)")
     print("   GET  /redoc (ReDoc)")
@@ -0,0 +1,62 @@
+"""
+gunicorn settings for the Flask app
+
+    cd backend && gunicorn -c gunicorn.conf.py
+
+Worker processes, threads per worker, bind address and timeout come from
+WEB_WORKERS, WEB_THREADS, WEB_BIND and WEB_TIMEOUT_SECONDS (see
+config/settings.py). bcrypt releases the GIL, so threads help with login
+bursts; workers are what scale the rest of the CPU work. Each worker keeps
+its own user and profile list caches, so with more than one worker they are
+off unless PROCESS_CACHES=on.
+
+For metrics aggregated over all workers, point PROMETHEUS_MULTIPROC_DIR at a
+directory writable by the server; it is emptied at startup.
+"""
+
+import glob
+import os
+
+from config import Config
+
+wsgi_app = 'wsgi:application'
+bind = Config.WEB_BIND
+worker_class = 'gthread'
+workers = Config.WEB_WORKERS
+threads = Config.WEB_THREADS
+timeout = Config.WEB_TIMEOUT_SECONDS
+
+# Import the app once in the master; workers inherit it copy-on-write
+preload_app = True
+
+# Each worker would hold its own copy of the in-memory tables
+if Config.STORAGE_BACKEND == 'memory':
+    workers = 1
+
+# The app is imported after this file; with several workers its per-process
+# user and profile list caches are turned off (see Config.PROCESS_CACHES)
+Config.WEB_PROCESSES = workers
+
+# Samples left by a previous run's workers would be summed into ours. This runs
+# before the app (and prometheus_client) is preloaded.
+multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+if multiproc_dir:
+    os.makedirs(multiproc_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(multiproc_dir, '*.db')):
+        os.remove(path)
+
+
+def on_starting(server):
+    if Config.STORAGE_BACKEND == 'memory':
+        server.log.warning("STORAGE_BACKEND=memory keeps tables per process; running a single worker")
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s started (%d threads)", worker.pid, threads)
+
+
+def child_exit(server, worker):
+    if multiproc_dir:
+        from prometheus_client import multiprocess
+        # Drop the dead worker's live gauges (in-flight requests, bcrypt queue)
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,190 @@
+"""
+Online migration of FastAPI users to hash-sharded partitions
+
+Moves every user row (and email index row) that is not in the partition
+computed by the current USER_PARTITION_SHARDS setting. Rows are streamed page
+by page; each page is copied with per-partition transactions of up to 100
+rows, then the source rows are deleted in batches, conditional on the ETag
+read during the scan.
+
+The servers keep running meanwhile. With USER_PARTITION_LEGACY_FALLBACK on,
+reads and merges that miss the sharded partition retry the legacy one, and a
+source row modified after it was copied fails its conditional delete and is
+copied again. Once the migration reports zero remaining rows, turn the
+fallback off to drop the extra read on misses.
+
+Usage (from the backend directory):
+    USER_PARTITION_SHARDS=16 python migrate_user_partitions.py [--page-size 500] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+from collections import defaultdict
+
+from azure.core import MatchConditions
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from azure.data.tables import TableServiceClient, TableTransactionError, UpdateMode
+from dotenv import load_dotenv
+
+from config import Config
+from storage import EMAIL_PARTITION_KEY, USER_PARTITION_KEY
+from storage.sharding import partition_range_filter, shard_partition
+
+BATCH_SIZE = 100  # Azure limit for a single entity group transaction
+MAX_COPY_ATTEMPTS = 3
+
+
+def chunks(rows, size=BATCH_SIZE):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def copy_rows(table_client, moves):
+    """Upsert the target rows, one transaction per target partition"""
+    by_partition = defaultdict(list)
+    for _, target in moves:
+        by_partition[target["PartitionKey"]].append(target)
+
+    for rows in by_partition.values():
+        for batch in chunks(rows):
+            try:
+                table_client.submit_transaction(
+                    [("upsert", row, {"mode": UpdateMode.MERGE}) for row in batch]
+                )
+            except TableTransactionError:
+                for row in batch:
+                    table_client.upsert_entity(row, mode=UpdateMode.MERGE)
+
+
+def delete_source(table_client, source, target_for):
+    """Delete one source row, re-copying it if it changed since it was read"""
+    for _ in range(MAX_COPY_ATTEMPTS):
+        try:
+            table_client.delete_entity(
+                partition_key=source["PartitionKey"],
+                row_key=source["RowKey"],
+                etag=source.metadata["etag"],
+                match_condition=MatchConditions.IfNotModified
+            )
+            return True
+        except HttpResponseError as e:
+            if e.status_code != 412:
+                raise
+
+        # Written by a server after the copy; carry the new values over
+        try:
+            source = table_client.get_entity(partition_key=source["PartitionKey"], row_key=source["RowKey"])
+        except ResourceNotFoundError:
+            return True
+        target = dict(source)
+        target["PartitionKey"] = target_for(source["RowKey"])
+        table_client.upsert_entity(target, mode=UpdateMode.MERGE)
+    return False
+
+
+def delete_rows(table_client, moves, target_for, stats):
+    """Delete copied source rows, one transaction per source partition"""
+    by_partition = defaultdict(list)
+    for source, _ in moves:
+        by_partition[source["PartitionKey"]].append(source)
+
+    for sources in by_partition.values():
+        for batch in chunks(sources):
+            try:
+                table_client.submit_transaction([
+                    ("delete", source, {"etag": source.metadata["etag"],
+                                        "match_condition": MatchConditions.IfNotModified})
+                    for source in batch
+                ])
+                stats["moved"] += len(batch)
+                continue
+            except TableTransactionError:
+                pass
+
+            for source in batch:
+                if delete_source(table_client, source, target_for):
+                    stats["moved"] += 1
+                else:
+                    stats["retry"] += 1
+
+
+def migrate_table(table_client, prefix, target_for, page_size=500, dry_run=False):
+    """
+    Move rows of one table into their computed partitions
+
+    Args:
+        table_client: TableClient of the table to migrate
+        prefix (str): Partition prefix ("User" or "Email")
+        target_for (callable): Maps a RowKey to its target PartitionKey
+        page_size (int): Rows fetched per page
+        dry_run (bool): Only count rows, write nothing
+
+    Returns:
+        Dict: Counters for scanned, in-place, moved and left-for-retry rows
+    """
+    stats = {"scanned": 0, "in_place": 0, "moved": 0, "retry": 0}
+    pages = table_client.query_entities(partition_range_filter(prefix), results_per_page=page_size).by_page()
+
+    for page in pages:
+        moves = []
+        for source in page:
+            stats["scanned"] += 1
+            partition = target_for(source["RowKey"])
+            if source["PartitionKey"] == partition:
+                stats["in_place"] += 1
+                continue
+            target = dict(source)
+            target["PartitionKey"] = partition
+            moves.append((source, target))
+
+        if moves and not dry_run:
+            copy_rows(table_client, moves)
+            delete_rows(table_client, moves, target_for, stats)
+        elif moves:
+            stats["moved"] += len(moves)
+
+        print(f"  ...{stats['scanned']} rows scanned, {stats['moved']} moved")
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move FastAPI users into hash-sharded partitions")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    load_dotenv()
+    conn_str = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
+    if not conn_str:
+        print("AZURE_STORAGE_CONNECTION_STRING environment variable is required")
+        sys.exit(1)
+
+    shards = Config.USER_PARTITION_SHARDS
+    service = TableServiceClient.from_connection_string(conn_str)
+    tables = [
+        (Config.USERS_TABLE_NAME, USER_PARTITION_KEY),
+        (Config.EMAIL_INDEX_TABLE_NAME, EMAIL_PARTITION_KEY)
+    ]
+
+    remaining = 0
+    for table_name, prefix in tables:
+        print(f"🔄 Migrating '{table_name}' to {shards} partition(s)...")
+        stats = migrate_table(
+            service.get_table_client(table_name),
+            prefix,
+            lambda row_key, prefix=prefix: shard_partition(prefix, row_key, shards),
+            page_size=args.page_size,
+            dry_run=args.dry_run
+        )
+        remaining += stats["retry"]
+        print(f"✓ {table_name}: {stats}")
+
+    if remaining:
+        print(f"⚠ {remaining} rows kept changing during the copy, run the migration again")
+    sys.exit(1 if remaining else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,18 @@
 # Models package
 from .user import User
+from .kid_profile import UPDATABLE_FIELDS, kid_profile_from_entity, new_kid_profile_entity
+from .progress import (
+    PROGRESS_PATCH_ATTEMPTS, InvalidProgressPatch, ProgressPreconditionFailed, apply_progress_patch, progress_etag
+)
+from .progress_events import (
+    TRANSACTION_SIZE, InvalidProgressEvents, aggregate_events, lost_to_concurrent_write, progress_changes,
+    progress_update_operations, transaction_chunks
+)
+from .profile_sync import build_changes, changes_query, decode_change_token, encode_change_token
 
-__all__ = ['User']
+__all__ = ['User', 'UPDATABLE_FIELDS', 'kid_profile_from_entity', 'new_kid_profile_entity',
+           'build_changes', 'changes_query', 'decode_change_token', 'encode_change_token',
+           'PROGRESS_PATCH_ATTEMPTS', 'InvalidProgressPatch', 'ProgressPreconditionFailed',
+           'apply_progress_patch', 'progress_etag',
+           'TRANSACTION_SIZE', 'InvalidProgressEvents', 'aggregate_events', 'lost_to_concurrent_write',
+           'progress_changes', 'progress_update_operations', 'transaction_chunks']
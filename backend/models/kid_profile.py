@@ -0,0 +1,48 @@
+"""
+Kid profile entities for Azure Table Storage
+
+Profiles are partitioned by their parent: the user id in the Flask app, the
+username in the FastAPI app. Both apps return the same JSON for a profile,
+the shape the Android KidProfile class reads.
+"""
+
+import datetime
+import uuid
+from typing import Any, Dict, Optional
+
+# Properties a client may change with an update
+UPDATABLE_FIELDS = ('name', 'age', 'grade', 'avatar', 'learning_goals', 'progress')
+
+
+def new_kid_profile_entity(parent_id: str, name: str, age: int, grade: Optional[str] = None,
+                           avatar: Optional[str] = None, learning_goals: Optional[str] = None) -> Dict[str, Any]:
+    """Entity for a new, active kid profile of parent_id"""
+    return {
+        "PartitionKey": parent_id,        # Parent as partition key
+        "RowKey": str(uuid.uuid4()),      # Using UUID as row key
+        "user_id": parent_id,
+        "name": name,
+        "age": age,
+        "grade": grade or "",
+        "avatar": avatar or "default",
+        "learning_goals": learning_goals or "",
+        "created_at": datetime.datetime.utcnow().isoformat(),
+        "last_activity": None,
+        "progress": "{}",  # JSON string to store progress data
+        "is_active": True
+    }
+
+
+def kid_profile_from_entity(entity) -> Dict[str, Any]:
+    """Wire format of a kids profile entity"""
+    return {
+        'id': entity['RowKey'],
+        'name': entity['name'],
+        'age': entity['age'],
+        'grade': entity['grade'],
+        'avatar': entity['avatar'],
+        'learning_goals': entity['learning_goals'],
+        'created_at': entity['created_at'],
+        'last_activity': entity.get('last_activity'),
+        'progress': entity.get('progress', '{}')
+    }
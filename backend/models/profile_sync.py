@@ -0,0 +1,86 @@
+"""
+Delta sync of kids profiles with change tokens
+
+A change token is an opaque string holding the newest entity Timestamp the
+client has seen. Sync returns the profiles of the parent's partition written
+since then: active ones in full, soft-deleted ones (is_active = false) by id.
+Without a token, or with one the server cannot read, the client gets a full
+list and replaces what it has.
+
+Timestamps are assigned by the storage service when a write commits, so a
+write committing just after a sync can carry a slightly older Timestamp than
+the newest one that sync returned. Each query therefore reaches back
+PROFILE_SYNC_OVERLAP_SECONDS before the token; profiles sent twice are
+harmless, the client applies them as upserts.
+"""
+
+import base64
+import binascii
+import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from config import Config
+
+from .kid_profile import kid_profile_from_entity
+
+TOKEN_PREFIX = 'v1:'
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def encode_change_token(timestamp: datetime.datetime) -> str:
+    """Opaque token for a Timestamp"""
+    raw = TOKEN_PREFIX + timestamp.astimezone(datetime.timezone.utc).isoformat()
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_change_token(token: Optional[str]) -> Optional[datetime.datetime]:
+    """Timestamp of a token, None if it is missing or unreadable"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('utf-8')
+        if not raw.startswith(TOKEN_PREFIX):
+            return None
+        timestamp = datetime.datetime.fromisoformat(raw[len(TOKEN_PREFIX):])
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if timestamp.tzinfo is None:
+        return None
+    return timestamp
+
+
+def changes_query(parent_id: str, since: Optional[datetime.datetime]) -> Tuple[str, Dict[str, Any]]:
+    """Filter and parameters selecting the parent's profiles written since a token's Timestamp"""
+    if since is None:
+        return "PartitionKey eq @parent", {"parent": parent_id}
+    overlap = datetime.timedelta(seconds=Config.PROFILE_SYNC_OVERLAP_SECONDS)
+    return "PartitionKey eq @parent and Timestamp ge @since", {"parent": parent_id, "since": since - overlap}
+
+
+def build_changes(entities: Iterable, since: Optional[datetime.datetime]) -> Dict[str, Any]:
+    """
+    Sync response for the entities a changes_query returned
+
+    Args:
+        entities (Iterable): Profile entities, with Timestamp in their metadata
+        since (datetime): Timestamp of the client's token, None for a full sync
+
+    Returns:
+        Dict: profiles (active, wire format), deleted (ids), token, full
+    """
+    newest = since or EPOCH
+    profiles, deleted = [], []
+    for entity in entities:
+        timestamp = entity.metadata.get('timestamp')
+        if timestamp is not None and timestamp > newest:
+            newest = timestamp
+        if entity.get('is_active', True):
+            profiles.append(kid_profile_from_entity(entity))
+        elif since is not None:
+            deleted.append(entity['RowKey'])
+    return {
+        'profiles': profiles,
+        'deleted': deleted,
+        'token': encode_change_token(newest),
+        'full': since is None
+    }
@@ -0,0 +1,83 @@
+"""
+Kid progress documents and JSON merge patches (RFC 7396)
+
+A profile's progress is a JSON object stored as a string property. Clients
+change it with a merge patch: patch members replace the document's, objects
+merge recursively and null removes a member, so two devices recording
+different lessons touch different keys and both writes survive.
+
+The ETag of progress is a hash of the stored string; it changes when
+progress does, not when other profile fields (name, age) are edited.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable
+
+# Azure Table string properties hold at most 32K UTF-16 characters
+PROGRESS_MAX_CHARS = 32 * 1024
+
+# Conditional writes retried when another write lands between read and write
+PROGRESS_PATCH_ATTEMPTS = 3
+
+
+class InvalidProgressPatch(ValueError):
+    """The patch is not a JSON object, or the patched progress is too large"""
+
+
+class ProgressPreconditionFailed(Exception):
+    """If-Match named a progress ETag that is no longer current"""
+
+
+def progress_etag(stored: str) -> str:
+    """Strong ETag (unquoted) of a stored progress string"""
+    return hashlib.sha256(stored.encode('utf-8')).hexdigest()
+
+
+def load_progress(stored: Any) -> Dict[str, Any]:
+    """Progress document of a stored string; anything but a JSON object reads as {}"""
+    try:
+        document = json.loads(stored) if stored else {}
+    except (TypeError, ValueError):
+        return {}
+    return document if isinstance(document, dict) else {}
+
+
+def merge_patch(target: Any, patch: Any) -> Any:
+    """target with an RFC 7396 merge patch applied (neither argument is modified)"""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def apply_progress_patch(stored: Any, patch: Any) -> str:
+    """
+    Stored progress string after a merge patch
+
+    Args:
+        stored (Any): Current progress property of the profile
+        patch (Any): Decoded merge patch, must be a JSON object
+
+    Returns:
+        str: Progress to store
+    """
+    return apply_progress_patches(stored, [patch])
+
+
+def apply_progress_patches(stored: Any, patches: Iterable[Any]) -> str:
+    """Stored progress string after merge patches applied in order"""
+    document = load_progress(stored)
+    for patch in patches:
+        if not isinstance(patch, dict):
+            raise InvalidProgressPatch('Progress patch must be a JSON object')
+        document = merge_patch(document, patch)
+    patched = json.dumps(document, ensure_ascii=False, separators=(',', ':'))
+    if len(patched) > PROGRESS_MAX_CHARS:
+        raise InvalidProgressPatch(f'Progress would exceed {PROGRESS_MAX_CHARS} characters')
+    return patched
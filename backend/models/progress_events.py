@@ -0,0 +1,155 @@
+"""
+Batched progress events
+
+An offline session records progress as events, each a merge patch of one
+kid's progress (see models.progress) stamped with when it happened:
+
+    {"profile_id": "...", "occurred_at": "2024-05-01T10:00:00Z", "progress": {"math": {"xp": 120}}}
+
+and uploads them in one request. aggregate_events() groups them by profile,
+oldest first, so each profile is read and written once however many events
+it has; progress_update_operations() turns them into MERGE operations,
+each conditional on the ETag its profile was read with. The writes go out
+as entity group transactions (a parent's profiles share a partition, so one
+request is one partition). Azure caps a transaction at 100 operations and a
+4 MB payload, and progress alone may be 32K characters per profile, so
+transaction_chunks() closes a chunk at TRANSACTION_SIZE operations or
+TRANSACTION_BYTES_BUDGET of estimated payload, whichever comes first. Only a transaction that lost to a concurrent write
+(lost_to_concurrent_write) is worth recomputing and retrying.
+
+Merge patches are idempotent, so a client may resend a batch whose response
+it never got.
+"""
+
+import datetime
+import json
+from typing import Any, Dict, Iterable, List, Tuple
+
+from azure.core import MatchConditions
+from azure.data.tables import TableTransactionError, UpdateMode
+
+from .progress import apply_progress_patches
+
+MAX_EVENTS_PER_REQUEST = 1000
+TRANSACTION_SIZE = 100
+# Estimated payload per transaction: the entity JSON plus a per-operation
+# allowance for its multipart headers, with headroom under Azure's 4 MB cap
+TRANSACTION_BYTES_BUDGET = 3 * 1024 * 1024
+OPERATION_OVERHEAD_BYTES = 1024
+
+
+class InvalidProgressEvents(ValueError):
+    """The request body is not a list of well-formed progress events"""
+
+
+def _utc(value: Any) -> datetime.datetime:
+    """Naive UTC datetime of an ISO 8601 string, as created_at and last_activity are stored"""
+    if not isinstance(value, str):
+        raise ValueError(value)
+    moment = datetime.datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def aggregate_events(events: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Group progress events by profile
+
+    Args:
+        events (Any): Decoded `events` list of the request
+
+    Returns:
+        Dict: profile id -> {'patches': merge patches oldest first, 'last_activity': newest occurred_at}
+    """
+    if not isinstance(events, list) or not events:
+        raise InvalidProgressEvents('events must be a non-empty list')
+    if len(events) > MAX_EVENTS_PER_REQUEST:
+        raise InvalidProgressEvents(f'At most {MAX_EVENTS_PER_REQUEST} events per request')
+
+    timed = []
+    for index, event in enumerate(events):
+        if not isinstance(event, dict) or not isinstance(event.get('profile_id'), str):
+            raise InvalidProgressEvents(f'Event {index} has no profile_id')
+        if not isinstance(event.get('progress'), dict):
+            raise InvalidProgressEvents(f'Event {index}: progress must be a JSON object')
+        try:
+            occurred_at = _utc(event.get('occurred_at'))
+        except ValueError:
+            raise InvalidProgressEvents(f'Event {index}: occurred_at must be an ISO 8601 time')
+        timed.append((occurred_at, event))
+
+    aggregates = {}
+    # Stable: events stamped with the same time keep their upload order
+    for occurred_at, event in sorted(timed, key=lambda item: item[0]):
+        aggregate = aggregates.setdefault(event['profile_id'], {'patches': [], 'last_activity': occurred_at})
+        aggregate['patches'].append(event['progress'])
+        aggregate['last_activity'] = occurred_at
+    return aggregates
+
+
+def progress_changes(entity, aggregate: Dict[str, Any]) -> Dict[str, Any]:
+    """Properties to merge into a profile entity for its aggregated events"""
+    changes = {'progress': apply_progress_patches(entity.get('progress') or '{}', aggregate['patches'])}
+    try:
+        last_activity = _utc(entity.get('last_activity'))
+    except ValueError:
+        last_activity = None
+    # An old offline session must not move last_activity backwards
+    if last_activity is None or aggregate['last_activity'] > last_activity:
+        changes['last_activity'] = aggregate['last_activity'].isoformat()
+    return changes
+
+
+def progress_update_operations(parent_id: str, profiles: Dict[str, Any], aggregates: Dict[str, Dict[str, Any]],
+                               profile_ids: Iterable[str]) -> Tuple[List[tuple], List[str]]:
+    """
+    Transaction operations writing aggregated events to a parent's profiles
+
+    Args:
+        parent_id (str): PartitionKey of the profiles
+        profiles (Dict): Profile entities of the partition by id, as just read
+        aggregates (Dict): aggregate_events() result
+        profile_ids (Iterable): Ids of the aggregates to write
+
+    Returns:
+        Tuple: Conditional MERGE operations, ids skipped as missing or deleted
+    """
+    operations, skipped = [], []
+    for profile_id in profile_ids:
+        entity = profiles.get(profile_id)
+        if entity is None or not entity.get('is_active', True):
+            skipped.append(profile_id)
+            continue
+        operations.append((
+            'update',
+            {'PartitionKey': parent_id, 'RowKey': profile_id, **progress_changes(entity, aggregates[profile_id])},
+            {'mode': UpdateMode.MERGE, 'etag': entity.metadata['etag'],
+             'match_condition': MatchConditions.IfNotModified}
+        ))
+    return operations, skipped
+
+
+def lost_to_concurrent_write(error: TableTransactionError) -> bool:
+    """Whether a transaction failed only because a profile changed after it was read (412)"""
+    return error.status_code == 412
+
+
+def operation_size(operation: tuple) -> int:
+    """Estimated bytes a transaction operation adds to the request"""
+    # ASCII-escaped like the SDK's serializer, so non-ASCII text counts at its worst
+    return len(json.dumps(operation[1], default=str)) + OPERATION_OVERHEAD_BYTES
+
+
+def transaction_chunks(operations: List[tuple]) -> Iterable[List[tuple]]:
+    """operations in slices that fit one entity group transaction, by count and payload size"""
+    chunk, size = [], 0
+    for operation in operations:
+        added = operation_size(operation)
+        if chunk and (len(chunk) == TRANSACTION_SIZE or size + added > TRANSACTION_BYTES_BUDGET):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(operation)
+        size += added
+    if chunk:
+        yield chunk
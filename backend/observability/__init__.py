@@ -0,0 +1,13 @@
+# Observability package
+from .log_queue import DroppingQueueHandler, DropReportingListener, start_queue_logging
+from .request_log import RequestLogger, RequestLogFormatter, hash_user_id, REQUEST_LOGGER_NAME
+
+__all__ = [
+    'DroppingQueueHandler',
+    'DropReportingListener',
+    'start_queue_logging',
+    'RequestLogger',
+    'RequestLogFormatter',
+    'hash_user_id',
+    'REQUEST_LOGGER_NAME'
+]
@@ -0,0 +1,109 @@
+"""
+Non-blocking logging pipeline
+
+Request threads only put records on a bounded in-memory queue; a single
+QueueListener thread writes them to the real handlers (log file, console).
+When the queue is full the record is dropped and counted instead of making
+the request wait for disk or console I/O. The number of dropped records is
+reported by the listener once the queue drains, and on shutdown.
+
+The listener thread does not survive a fork, so a forked worker (gunicorn
+with preload) starts its own listener on a fresh queue.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Tuple
+
+from .metrics import LOG_RECORDS_DROPPED
+
+logger = logging.getLogger('ai_school.logging')
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks; records that do not fit are counted"""
+
+    def __init__(self, max_records: int):
+        super().__init__(queue.Queue(max_records))
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+
+class DropReportingListener(QueueListener):
+    """QueueListener that logs how many records were dropped since last time"""
+
+    def __init__(self, queue_handler: DroppingQueueHandler, *handlers):
+        super().__init__(queue_handler.queue, *handlers, respect_handler_level=True)
+        self.queue_handler = queue_handler
+        self._reported = 0
+
+    def handle(self, record: logging.LogRecord) -> None:
+        super().handle(record)
+        if self.queue.empty():
+            self.report_dropped()
+
+    def report_dropped(self) -> None:
+        dropped = self.queue_handler.dropped
+        if dropped > self._reported:
+            super().handle(logger.makeRecord(
+                logger.name, logging.WARNING, __file__, 0,
+                "Log queue full, dropped %d records (%d total)",
+                (dropped - self._reported, dropped), None
+            ))
+            self._reported = dropped
+
+    def stop(self) -> None:
+        super().stop()
+        self.report_dropped()
+
+    def restart_after_fork(self) -> None:
+        """Start a listener thread in a forked child if the parent had one running"""
+        if self._thread is None:
+            return
+        # The parent's queue may hold records it is about to write, and its locks
+        # may have been held at fork time; start over with fresh ones
+        self.queue_handler.queue = self.queue = queue.Queue(self.queue.maxsize)
+        self.queue_handler._dropped_lock = threading.Lock()
+        self.queue_handler.dropped = self._reported = 0
+        self._thread = None
+        self.start()
+
+
+def start_queue_logging(handlers: List[logging.Handler], max_records: int = 10000,
+                        level: int = logging.DEBUG) -> Tuple[DroppingQueueHandler, DropReportingListener]:
+    """
+    Route the root logger through a bounded queue to the given handlers
+
+    Args:
+        handlers (List[logging.Handler]): Handlers doing the actual I/O
+        max_records (int): Records buffered before new ones are dropped
+        level (int): Root logger level
+
+    Returns:
+        Tuple: The queue handler (with the `dropped` counter) and its listener
+    """
+    queue_handler = DroppingQueueHandler(max_records)
+    listener = DropReportingListener(queue_handler, *handlers)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener.start()
+    atexit.register(listener.stop)
+    os.register_at_fork(after_in_child=listener.restart_after_fork)
+    return queue_handler, listener
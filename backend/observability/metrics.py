@@ -0,0 +1,128 @@
+"""
+Prometheus metrics for both apps
+
+Exposed at /metrics:
+
+    ai_school_http_requests_total{method,route,status}
+    ai_school_http_request_duration_seconds{method,route}      histogram
+    ai_school_http_requests_in_flight
+    ai_school_azure_request_duration_seconds{operation}        histogram
+    ai_school_azure_errors_total{operation}
+    ai_school_bcrypt_queue_depth                               running + waiting
+    ai_school_cache_requests_total{cache,result}               hit / miss
+    ai_school_log_records_dropped_total
+
+Cache hit ratios are computed at query time, e.g.
+    sum by (cache) (rate(ai_school_cache_requests_total{result="hit"}[5m]))
+      / sum by (cache) (rate(ai_school_cache_requests_total[5m]))
+
+Under gunicorn or uvicorn with several workers, set PROMETHEUS_MULTIPROC_DIR
+to an empty directory before the app starts. Every worker then writes its
+samples there and /metrics, whichever worker answers it, aggregates all of
+them: counters and histograms are summed, gauges summed over live workers.
+
+prometheus_client is optional; without it every metric is a no-op and
+/metrics answers 501.
+"""
+
+import os
+from typing import Tuple
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    )
+    from prometheus_client import multiprocess
+except ImportError:
+    CollectorRegistry = None
+
+
+class _NoopMetric:
+    """Stand-in used when prometheus_client is not installed"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def observe(self, amount):
+        pass
+
+
+METRICS_AVAILABLE = CollectorRegistry is not None
+
+if METRICS_AVAILABLE:
+    HTTP_REQUESTS = Counter(
+        'ai_school_http_requests_total', 'HTTP requests handled',
+        ['method', 'route', 'status']
+    )
+    HTTP_REQUEST_DURATION = Histogram(
+        'ai_school_http_request_duration_seconds', 'Time spent handling HTTP requests',
+        ['method', 'route']
+    )
+    HTTP_REQUESTS_IN_FLIGHT = Gauge(
+        'ai_school_http_requests_in_flight', 'HTTP requests being handled',
+        multiprocess_mode='livesum'
+    )
+    AZURE_REQUEST_DURATION = Histogram(
+        'ai_school_azure_request_duration_seconds', 'Azure Table Storage round trips',
+        ['operation'],
+        buckets=(.002, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+    )
+    AZURE_ERRORS = Counter(
+        'ai_school_azure_errors_total', 'Azure Table Storage calls that raised',
+        ['operation']
+    )
+    BCRYPT_QUEUE_DEPTH = Gauge(
+        'ai_school_bcrypt_queue_depth', 'Password jobs running or waiting for a bcrypt worker',
+        multiprocess_mode='livesum'
+    )
+    CACHE_REQUESTS = Counter(
+        'ai_school_cache_requests_total', 'In-process cache lookups',
+        ['cache', 'result']
+    )
+    LOG_RECORDS_DROPPED = Counter(
+        'ai_school_log_records_dropped_total', 'Log records dropped because the log queue was full'
+    )
+else:
+    HTTP_REQUESTS = HTTP_REQUEST_DURATION = HTTP_REQUESTS_IN_FLIGHT = _NoopMetric()
+    AZURE_REQUEST_DURATION = AZURE_ERRORS = BCRYPT_QUEUE_DEPTH = _NoopMetric()
+    CACHE_REQUESTS = LOG_RECORDS_DROPPED = _NoopMetric()
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    """Count a finished HTTP request and record its latency"""
+    HTTP_REQUESTS.labels(method, route, str(status)).inc()
+    HTTP_REQUEST_DURATION.labels(method, route).observe(seconds)
+
+
+def observe_azure(operation: str, seconds: float, failed: bool = False) -> None:
+    """Record one Azure round trip"""
+    AZURE_REQUEST_DURATION.labels(operation).observe(seconds)
+    if failed:
+        AZURE_ERRORS.labels(operation).inc()
+
+
+def cache_counters(cache: str) -> Tuple:
+    """Hit and miss counters of one cache, bound once so lookups stay cheap"""
+    return CACHE_REQUESTS.labels(cache, 'hit'), CACHE_REQUESTS.labels(cache, 'miss')
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Current metrics in the Prometheus text format
+
+    Returns:
+        Tuple[bytes, str]: Body and content type; empty body if metrics are unavailable
+    """
+    if not METRICS_AVAILABLE:
+        return b'', 'text/plain'
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
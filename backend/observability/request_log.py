@@ -0,0 +1,77 @@
+"""
+One structured JSON line per request, with sampling
+
+Every finished request becomes a single record (method, route template,
+status, latency, storage round trips, hashed user id). Successful requests
+are sampled at REQUEST_LOG_SAMPLE_RATE; errors (status >= 400) and requests
+slower than REQUEST_LOG_SLOW_MS are always written. Each line carries the
+rate it was sampled at, so counts can be re-weighted downstream.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import random
+from typing import Any, Dict, Optional
+
+REQUEST_LOGGER_NAME = 'ai_school.requests'
+
+
+def hash_user_id(user_id: Optional[str]) -> Optional[str]:
+    """Short, stable pseudonym for a user id, so logs carry no raw identifiers"""
+    if not user_id:
+        return None
+    return hashlib.sha256(str(user_id).encode('utf-8')).hexdigest()[:16]
+
+
+class RequestLogFormatter(logging.Formatter):
+    """Writes request records as bare JSON lines, everything else with the base format"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if record.name == REQUEST_LOGGER_NAME:
+            return record.getMessage()
+        return super().format(record)
+
+
+class RequestLogger:
+    """Decides whether a finished request is logged and writes its JSON line"""
+
+    def __init__(self, sample_rate: float = 1.0, slow_ms: float = 500.0,
+                 logger: Optional[logging.Logger] = None):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.logger = logger or logging.getLogger(REQUEST_LOGGER_NAME)
+
+    def should_log(self, status: int, duration_ms: float) -> bool:
+        if status >= 400 or duration_ms >= self.slow_ms:
+            return True
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def log(self, method: str, route: str, status: int, duration_ms: float,
+            user_id: Optional[str] = None, **fields: Any) -> None:
+        """
+        Write the request's JSON line if it passes sampling
+
+        Args:
+            method (str): HTTP method
+            route (str): Route template, e.g. /api/profiles/<profile_id>
+            status (int): Response status code
+            duration_ms (float): Time spent in the app
+            user_id (str): Authenticated user, hashed before writing
+            **fields: Extra values (e.g. storage call counts)
+        """
+        if not self.should_log(status, duration_ms) or not self.logger.isEnabledFor(logging.INFO):
+            return
+
+        record: Dict[str, Any] = {
+            'ts': datetime.datetime.utcnow().isoformat(timespec='milliseconds') + 'Z',
+            'method': method,
+            'route': route,
+            'status': status,
+            'duration_ms': round(duration_ms, 2),
+            'user': hash_user_id(user_id),
+            'sample_rate': 1.0 if status >= 400 or duration_ms >= self.slow_ms else self.sample_rate
+        }
+        record.update(fields)
+        self.logger.info(json.dumps(record, separators=(',', ':'), default=str))
@@ -0,0 +1,71 @@
+"""
+Per-request timing spans
+
+Hot spots (Azure round trips, bcrypt, JWT encode/decode, JSON serialization)
+are wrapped in span(name). Time is summed per name on the current request's
+RequestTimings, which lives in a context variable like the storage call
+stats, and returned to the client as a Server-Timing header:
+
+    Server-Timing: azure;dur=41.2, bcrypt;dur=238.9, jwt;dur=0.1, total;dur=283.0
+
+Outside of a request span() only runs the wrapped code.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Milliseconds spent per span name while handling one request"""
+
+    __slots__ = ('started', 'spans')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+
+    def add(self, name: str, elapsed_ms: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + elapsed_ms
+
+    def elapsed_ms(self) -> float:
+        """Time since the request started"""
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(ms, 2) for name, ms in self.spans.items()}
+
+    def server_timing(self, total_ms: Optional[float] = None) -> str:
+        """Value for the Server-Timing response header"""
+        metrics = [f"{name};dur={ms:.1f}" for name, ms in self.spans.items()]
+        metrics.append(f"total;dur={self.elapsed_ms() if total_ms is None else total_ms:.1f}")
+        return ', '.join(metrics)
+
+
+def start_request_timings() -> RequestTimings:
+    """Begin collecting spans for the current request"""
+    timings = RequestTimings()
+    _request_timings.set(timings)
+    return timings
+
+
+def current_request_timings() -> Optional[RequestTimings]:
+    """Timings of the current request, None outside of a request"""
+    return _request_timings.get()
+
+
+@contextmanager
+def span(name: str):
+    """Add the time spent in the block to the current request's span `name`"""
+    timings = _request_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - started) * 1000)
@@ -20,6 +20,10 @@ echo.
 echo Running test_kids_profiles.py...
 python test_kids_profiles.py
 
+echo.
+echo Running test_progress_events.py...
+python test_progress_events.py
+
 echo.
 echo Running test_profiles.py...
 python test_profiles.py
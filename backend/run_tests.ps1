@@ -12,6 +12,7 @@ $testFiles = @(
     "test_azure_connection.py", 
     "simple_test.py",
     "test_kids_profiles.py",
+    "test_progress_events.py",
     "test_profiles.py",
     "test_api.py",
     "test_fastapi.py"
@@ -0,0 +1,13 @@
+# Serialization package
+from . import fast_json
+from .compression import EncodedBody, choose_encoding, compress, encoded_etag, etag_variants, should_compress
+
+__all__ = [
+    'fast_json',
+    'EncodedBody',
+    'choose_encoding',
+    'compress',
+    'encoded_etag',
+    'etag_variants',
+    'should_compress'
+]
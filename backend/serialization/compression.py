@@ -0,0 +1,107 @@
+"""
+Response compression (brotli when installed, else gzip)
+
+Bodies of at least COMPRESSION_MIN_BYTES are compressed for clients that
+accept it; smaller ones cost more CPU than the bytes they save. The default
+levels (gzip 5, brotli 4) get most of the size reduction of the maximum
+levels at a fraction of the CPU, which matters because bodies are compressed
+on the request path.
+
+A compressed representation gets its own strong ETag ("<etag>-gzip"), as
+RFC 9110 requires; etag_variants() lists the tags a client may send back.
+EncodedBody keeps the compressed variants of a cached body, so cache hits
+are served without compressing again.
+"""
+
+import gzip
+from typing import Dict, List, Optional
+
+from config import Config
+from observability.timing import span
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BROTLI_AVAILABLE = brotli is not None
+ENCODINGS = ('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',)
+MIN_BYTES = Config.COMPRESSION_MIN_BYTES
+COMPRESSIBLE_TYPES = ('application/json', 'text/')
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    """Content codings of an Accept-Encoding header with their q values"""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported coding the client accepts, None for an uncompressed response"""
+    if not Config.COMPRESSION_ENABLED or not accept_encoding:
+        return None
+    accepted = _accepted(accept_encoding)
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def should_compress(content_type: Optional[str], size: int) -> bool:
+    """Whether a body of this type and size is worth compressing"""
+    return size >= MIN_BYTES and bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """body compressed with encoding ('br' or 'gzip'), timed as the compress span"""
+    with span('compress'):
+        if encoding == 'br':
+            return brotli.compress(body, quality=Config.COMPRESSION_BROTLI_QUALITY)
+        return gzip.compress(body, compresslevel=Config.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """Strong ETag of the body as sent with encoding (unquoted)"""
+    return f"{etag}-{encoding}" if encoding else etag
+
+
+def etag_variants(etag: str) -> List[str]:
+    """ETags the same body may have been sent with"""
+    return [etag] + [encoded_etag(etag, encoding) for encoding in ENCODINGS]
+
+
+class EncodedBody:
+    """A cacheable response body with its ETag and compressed variants"""
+
+    __slots__ = ('body', 'etag', '_encoded')
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+        self._encoded = {}
+
+    def encoding_for(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Coding to send this body with, None if it stays uncompressed"""
+        if len(self.body) < MIN_BYTES:
+            return None
+        return choose_encoding(accept_encoding)
+
+    def get(self, encoding: Optional[str]) -> bytes:
+        """The body in encoding, compressed on first request and kept"""
+        if encoding is None:
+            return self.body
+        encoded = self._encoded.get(encoding)
+        if encoded is None:
+            encoded = self._encoded[encoding] = compress(self.body, encoding)
+        return encoded
@@ -0,0 +1,58 @@
+"""
+orjson-backed JSON encoding for API responses
+
+Both apps serialize through here when orjson is installed and FAST_JSON is
+not turned off. The encoded data is the same as the stdlib's; the bytes may
+differ (non-ASCII text is written as UTF-8 rather than \\u escapes). Values
+orjson rejects, such as integers beyond 64 bits, fall back to the stdlib.
+
+ENABLED is read on every call, so it can be flipped at runtime (the
+serialization benchmark compares both paths in one process).
+"""
+
+import json
+from typing import Any, Callable, Optional
+
+from config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_AVAILABLE = orjson is not None
+ENABLED = ORJSON_AVAILABLE and Config.FAST_JSON
+
+if ORJSON_AVAILABLE:
+    # datetime and dataclasses go to `default`, so each app keeps its own
+    # formatting for them (Flask writes HTTP dates, for instance)
+    _BASE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None, sort_keys: bool = False) -> bytes:
+    """
+    Compact UTF-8 JSON of obj
+
+    Args:
+        obj (Any): Value to encode
+        default (Callable): Called for values JSON has no type for
+        sort_keys (bool): Write object keys in sorted order
+
+    Returns:
+        bytes: Encoded JSON
+    """
+    if ENABLED:
+        option = _BASE_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _BASE_OPTIONS
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, default=default, sort_keys=sort_keys, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def loads(data) -> Any:
+    """Decode JSON from str or bytes"""
+    if ENABLED:
+        return orjson.loads(data)
+    return json.loads(data)
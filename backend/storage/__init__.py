@@ -0,0 +1,29 @@
+# Storage package
+from .users import UserStore, USER_PARTITION_KEY
+from .emails import EmailIndex, DuplicateEmailError, EMAIL_PARTITION_KEY, normalize_email
+from .instrumentation import CountingTableClient, StorageCallStats, start_request_stats, current_request_stats
+from .write_behind import WriteBehindQueue
+from .cache import TTLCache
+from .memory import InMemoryTableServiceClient, InMemoryTableClient, LatencyModel
+from .backend import create_table_service
+from .provisioning import TableProvisioner
+
+__all__ = [
+    'UserStore',
+    'USER_PARTITION_KEY',
+    'EmailIndex',
+    'DuplicateEmailError',
+    'EMAIL_PARTITION_KEY',
+    'normalize_email',
+    'CountingTableClient',
+    'StorageCallStats',
+    'start_request_stats',
+    'current_request_stats',
+    'WriteBehindQueue',
+    'TTLCache',
+    'InMemoryTableServiceClient',
+    'InMemoryTableClient',
+    'LatencyModel',
+    'create_table_service',
+    'TableProvisioner'
+]
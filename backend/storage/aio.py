@@ -0,0 +1,308 @@
+"""
+Async storage access layer built on azure.data.tables.aio
+
+Mirrors UserStore and EmailIndex for async FastAPI handlers, so a request
+waiting on Azure yields the event loop instead of holding a threadpool
+worker. Partition and key computation is inherited from the sync classes.
+AsyncKidProfileStore holds the kids profiles, partitioned by parent username.
+
+All async table clients share one aiohttp session with a bounded connection
+pool, opened inside the running event loop by AsyncTableStorage.open().
+With the memory backend the clients are in-memory tables instead.
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.data.tables import TableEntity, TableTransactionError, UpdateMode
+from azure.data.tables.aio import TableServiceClient
+
+from models import lost_to_concurrent_write, progress_update_operations, transaction_chunks
+
+from .emails import EMAIL_PARTITION_KEY, DuplicateEmailError, EmailIndex, email_row_key
+from .memory import AsyncInMemoryTableServiceClient, LatencyModel
+from .users import USER_PARTITION_KEY, UserStore
+
+logger = logging.getLogger('ai_school.async_storage')
+
+
+class AsyncTableStorage:
+    """Owns the async service client and its pooled HTTP transport"""
+
+    def __init__(self, connection_string: str, pool_size: int = 100, backend: str = 'azure',
+                 latency: LatencyModel = None):
+        self.connection_string = connection_string
+        self.pool_size = pool_size
+        self.backend = backend
+        self.latency = latency
+        self._session = None
+        self.service = None
+
+    async def open(self) -> None:
+        """Create the shared session; must run inside the event loop"""
+        if self.backend == 'memory':
+            self.service = AsyncInMemoryTableServiceClient(self.latency)
+            return
+        connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size)
+        self._session = aiohttp.ClientSession(connector=connector)
+        transport = AioHttpTransport(session=self._session, session_owner=False)
+        self.service = TableServiceClient.from_connection_string(self.connection_string, transport=transport)
+
+    def get_table_client(self, table_name: str):
+        """Table client sharing the service client's transport"""
+        return self.service.get_table_client(table_name=table_name)
+
+    async def close(self) -> None:
+        if self.service is not None:
+            await self.service.close()
+        if self._session is not None:
+            await self._session.close()
+
+
+class AsyncEmailIndex(EmailIndex):
+    """Async email -> username index, see EmailIndex"""
+
+    async def get(self, email: str) -> Optional[TableEntity]:
+        row_key = email_row_key(email)
+        try:
+            return await self.table_client.get_entity(partition_key=self.partition_for(email), row_key=row_key)
+        except ResourceNotFoundError:
+            if not self.legacy_fallback:
+                return None
+
+        try:
+            return await self.table_client.get_entity(partition_key=EMAIL_PARTITION_KEY, row_key=row_key)
+        except ResourceNotFoundError:
+            return None
+
+    async def lookup(self, email: str) -> Optional[str]:
+        entity = await self.get(email)
+        return entity["username"] if entity else None
+
+    async def reserve(self, email: str, username: str, owner_exists=None) -> str:
+        entity = self.entity_for(email, username)
+        if self.legacy_fallback and entity["PartitionKey"] != EMAIL_PARTITION_KEY:
+            try:
+                await self.table_client.get_entity(partition_key=EMAIL_PARTITION_KEY, row_key=entity["RowKey"])
+                raise DuplicateEmailError(email)
+            except ResourceNotFoundError:
+                pass
+
+        try:
+            return (await self.table_client.create_entity(entity))["etag"]
+        except ResourceExistsError:
+            existing = await self.get(email)
+            if existing is None or not await self._is_stale(existing, owner_exists):
+                raise DuplicateEmailError(email)
+
+        try:
+            metadata = await self.table_client.update_entity(
+                entity,
+                mode=UpdateMode.REPLACE,
+                etag=existing.metadata["etag"],
+                match_condition=MatchConditions.IfNotModified
+            )
+        except Exception:
+            raise DuplicateEmailError(email)
+        return metadata["etag"]
+
+    async def release(self, email: str, etag: str) -> None:
+        try:
+            await self.table_client.delete_entity(
+                partition_key=self.partition_for(email),
+                row_key=email_row_key(email),
+                etag=etag,
+                match_condition=MatchConditions.IfNotModified
+            )
+        except Exception as e:
+            logger.error("Error releasing email reservation: %s", e)
+
+    async def _is_stale(self, entity: TableEntity, owner_exists) -> bool:
+        if owner_exists is None or not self._reservation_expired(entity):
+            return False
+        return not await owner_exists(entity["username"])
+
+
+class AsyncUserStore(UserStore):
+    """Async username-keyed access to the users table, see UserStore"""
+
+    async def get(self, username: str) -> Optional[TableEntity]:
+        if self.cache is not None:
+            entity = self.cache.get(username)
+            if entity is not None:
+                return entity
+
+        entity = await self._read(username)
+        if entity is not None and self.cache is not None:
+            self.cache.set(username, entity)
+        return entity
+
+    async def _read(self, username: str) -> Optional[TableEntity]:
+        try:
+            return await self.table_client.get_entity(partition_key=self.partition_for(username), row_key=username)
+        except ResourceNotFoundError:
+            if not self.legacy_fallback:
+                return None
+
+        try:
+            return await self.table_client.get_entity(partition_key=USER_PARTITION_KEY, row_key=username)
+        except ResourceNotFoundError:
+            return None
+
+    async def exists(self, username: str) -> bool:
+        return await self.get(username) is not None
+
+    async def create(self, entity: Dict[str, Any]) -> Dict[str, Any]:
+        username = entity["RowKey"]
+        entity["PartitionKey"] = self.partition_for(username)
+        if self.email_index is None:
+            await self.table_client.create_entity(entity)
+            self.invalidate(username)
+            return entity
+
+        etag = await self.email_index.reserve(entity["email"], username, owner_exists=self.exists)
+        try:
+            await self.table_client.create_entity(entity)
+        except Exception:
+            await self.email_index.release(entity["email"], etag)
+            raise
+        self.invalidate(username)
+        return entity
+
+    async def merge(self, username: str, properties: Dict[str, Any]) -> None:
+        entity = dict(properties)
+        entity["PartitionKey"] = self.partition_for(username)
+        entity["RowKey"] = username
+        try:
+            await self.table_client.update_entity(entity, mode=UpdateMode.MERGE)
+        except ResourceNotFoundError:
+            if not self.legacy_fallback:
+                raise
+            entity["PartitionKey"] = USER_PARTITION_KEY
+            await self.table_client.update_entity(entity, mode=UpdateMode.MERGE)
+        finally:
+            self.invalidate(username)
+
+
+class AsyncKidProfileStore:
+    """Async access to kids profiles, one partition per parent"""
+
+    def __init__(self, table_client):
+        self.table_client = table_client
+
+    async def list_active(self, parent: str) -> List[TableEntity]:
+        entities = self.table_client.query_entities(
+            "PartitionKey eq @parent and is_active eq true",
+            parameters={"parent": parent}
+        )
+        return [entity async for entity in entities]
+
+    async def query(self, query_filter: str, parameters: Dict[str, Any]) -> List[TableEntity]:
+        """Profiles matching a filter, deleted ones included (see models.changes_query)"""
+        entities = self.table_client.query_entities(query_filter, parameters=parameters)
+        return [entity async for entity in entities]
+
+    async def get(self, parent: str, profile_id: str) -> Optional[TableEntity]:
+        """Active profile of parent, None if missing or deleted"""
+        try:
+            entity = await self.table_client.get_entity(partition_key=parent, row_key=profile_id)
+        except ResourceNotFoundError:
+            return None
+        return entity if entity.get("is_active", True) else None
+
+    async def create(self, entity: Dict[str, Any]) -> Dict[str, Any]:
+        await self.table_client.create_entity(entity)
+        return entity
+
+    async def update(self, parent: str, profile_id: str, properties: Dict[str, Any]) -> Optional[TableEntity]:
+        """Merge properties into an active profile; the updated entity, None if missing or deleted"""
+        entity = await self.get(parent, profile_id)
+        if entity is None:
+            return None
+        changes = {"PartitionKey": parent, "RowKey": profile_id, **properties}
+        await self.table_client.update_entity(changes, mode=UpdateMode.MERGE)
+        entity.update(properties)
+        return entity
+
+    async def rewrite_progress(self, parent: str, profile_id: str, rewrite: Callable[[str], str],
+                               attempts: int = 3) -> Optional[str]:
+        """
+        Replace an active profile's progress with rewrite(current progress)
+
+        The write is conditional on the ETag the profile was read with; when
+        another write lands in between, rewrite runs again on the fresh
+        progress, up to attempts times before ResourceModifiedError.
+
+        Returns:
+            Optional[str]: Stored progress, None if the profile is missing or deleted
+        """
+        for _ in range(attempts):
+            entity = await self.get(parent, profile_id)
+            if entity is None:
+                return None
+            current = entity.get("progress") or "{}"
+            progress = rewrite(current)
+            if progress == current:
+                return progress
+            try:
+                await self.table_client.update_entity(
+                    {"PartitionKey": parent, "RowKey": profile_id, "progress": progress},
+                    mode=UpdateMode.MERGE,
+                    etag=entity.metadata["etag"],
+                    match_condition=MatchConditions.IfNotModified
+                )
+            except ResourceModifiedError:
+                continue
+            return progress
+        raise ResourceModifiedError(f"Progress of profile {profile_id} kept changing")
+
+    async def write_progress_events(self, parent: str, aggregates: Dict[str, Dict[str, Any]],
+                                    attempts: int = 3) -> Tuple[List[str], List[str]]:
+        """
+        Write aggregated progress events (models.aggregate_events) to parent's profiles
+
+        One query reads the partition, then the profiles are merged in entity
+        group transactions of up to 100, conditional on the ETags they were
+        read with. Batches that lost to a concurrent write are recomputed
+        from fresh entities, up to attempts times before
+        ResourceModifiedError; other transaction errors are raised.
+
+        Returns:
+            Tuple[List[str], List[str]]: Updated ids, skipped ids (missing or deleted)
+        """
+        pending = sorted(aggregates)
+        updated, skipped = [], []
+        for _ in range(attempts):
+            profiles = {entity["RowKey"]: entity
+                        for entity in await self.query("PartitionKey eq @parent", {"parent": parent})}
+            operations, missing = progress_update_operations(parent, profiles, aggregates, pending)
+            skipped.extend(missing)
+
+            pending = []
+            for batch in transaction_chunks(operations):
+                batch_ids = [operation[1]["RowKey"] for operation in batch]
+                try:
+                    await self.table_client.submit_transaction(batch)
+                    updated.extend(batch_ids)
+                except TableTransactionError as e:
+                    if not lost_to_concurrent_write(e):
+                        raise
+                    pending.extend(batch_ids)
+            if not pending:
+                return updated, skipped
+        raise ResourceModifiedError(f"Profiles of {parent} kept changing")
+
+    async def deactivate(self, parent: str, profile_id: str) -> bool:
+        """Soft delete (is_active = false); False if the profile does not exist"""
+        try:
+            await self.table_client.update_entity(
+                {"PartitionKey": parent, "RowKey": profile_id, "is_active": False},
+                mode=UpdateMode.MERGE
+            )
+        except ResourceNotFoundError:
+            return False
+        return True
@@ -0,0 +1,49 @@
+"""
+Storage backend selection
+
+STORAGE_BACKEND=azure (the default) talks to Azure Table Storage through the
+connection string; STORAGE_BACKEND=memory uses the in-process stand-in from
+storage.memory, with simulated latency, so the apps run without an account.
+
+Pre-fork servers import the app, and may talk to Azure, before forking. A
+forked worker starts with an empty connection pool so that no two processes
+write to the same keep-alive socket. The memory backend is per process: run
+it with a single worker.
+"""
+
+import os
+
+from azure.core.pipeline.transport import RequestsTransport
+from azure.data.tables import TableServiceClient
+
+from .memory import InMemoryTableServiceClient, LatencyModel
+
+BACKENDS = ('azure', 'memory')
+
+
+def create_table_service(connection_string: str, backend: str = 'azure',
+                         latency: LatencyModel = None):
+    """
+    Sync TableServiceClient for the configured backend
+
+    Args:
+        connection_string (str): Azure Storage connection string, unused by the memory backend
+        backend (str): 'azure' or 'memory'
+        latency (LatencyModel): Simulated round trips for the memory backend
+
+    Returns:
+        TableServiceClient or InMemoryTableServiceClient
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend}', expected one of {', '.join(BACKENDS)}")
+    if backend == 'memory':
+        return InMemoryTableServiceClient(latency)
+    transport = RequestsTransport()
+    os.register_at_fork(after_in_child=lambda: _drop_connections(transport))
+    return TableServiceClient.from_connection_string(connection_string, transport=transport)
+
+
+def _drop_connections(transport: RequestsTransport) -> None:
+    """Forked worker: close the parent's pooled connections instead of sharing its sockets"""
+    if transport.session is not None:
+        transport.session.close()
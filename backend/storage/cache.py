@@ -0,0 +1,93 @@
+"""
+Bounded in-process LRU cache with a time-to-live
+
+Used to keep hot entities (users, serialized profile lists) out of Azure for
+repeated authenticated calls. Writers invalidate the keys they touch; the TTL
+bounds staleness for changes made by other worker processes.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from observability.metrics import cache_counters
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0, name: str = 'cache'):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hit_counter, self._miss_counter = cache_counters(name)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a key
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[Any]: Cached value, or None on a miss or expired entry
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                miss = True
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                miss = False
+        if miss:
+            self._miss_counter.inc()
+            return None
+        self._hit_counter.inc()
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a key after its backing data was written"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'name': self.name,
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,181 @@
+"""
+Email -> username index for the FastAPI users table
+
+Each registered email owns one row in the index table, so uniqueness checks
+are a single point read. Azure Table transactions cannot span two tables (or
+two partitions), so the index row is written first as an insert-only
+reservation: the insert succeeds for exactly one registration per email, and
+the reservation is released again if the user row cannot be created.
+"""
+
+import datetime
+import logging
+from typing import Optional
+from urllib.parse import quote
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+from azure.data.tables import TableClient, TableEntity, UpdateMode
+
+from .sharding import shard_partition
+
+logger = logging.getLogger('ai_school.emails')
+
+# Legacy partition of every index row, and prefix of the sharded partitions
+EMAIL_PARTITION_KEY = "Email"
+
+# A reservation whose user row never appeared is reclaimed after this long
+STALE_RESERVATION_SECONDS = 300
+
+
+class DuplicateEmailError(Exception):
+    """Raised when an email is already registered to another user"""
+
+
+def normalize_email(email: str) -> str:
+    """Lower-case and trim an email address"""
+    return email.strip().lower()
+
+
+def email_row_key(email: str) -> str:
+    """
+    Build the index RowKey for an email
+
+    Azure rejects '/', '\\', '#' and '?' in keys, all of which are legal in
+    the local part of an address, so the normalized email is percent-encoded.
+
+    Args:
+        email (str): Email address
+
+    Returns:
+        str: RowKey of the index row
+    """
+    return quote(normalize_email(email), safe="@.+-_")
+
+
+class EmailIndex:
+    """Maintains the email -> username index table"""
+
+    def __init__(self, table_client: TableClient, shards: int = 1, legacy_fallback: bool = False):
+        self.table_client = table_client
+        self.shards = shards
+        self.legacy_fallback = legacy_fallback and shards > 1
+
+    def partition_for(self, email: str) -> str:
+        """Compute the PartitionKey of an index row"""
+        return shard_partition(EMAIL_PARTITION_KEY, email_row_key(email), self.shards)
+
+    def get(self, email: str) -> Optional[TableEntity]:
+        """Point-read the index row for an email"""
+        row_key = email_row_key(email)
+        try:
+            return self.table_client.get_entity(partition_key=self.partition_for(email), row_key=row_key)
+        except ResourceNotFoundError:
+            if not self.legacy_fallback:
+                return None
+
+        try:
+            return self.table_client.get_entity(partition_key=EMAIL_PARTITION_KEY, row_key=row_key)
+        except ResourceNotFoundError:
+            return None
+
+    def lookup(self, email: str) -> Optional[str]:
+        """
+        Resolve an email to the username that owns it
+
+        Args:
+            email (str): Email address
+
+        Returns:
+            Optional[str]: Username if the email is registered, None otherwise
+        """
+        entity = self.get(email)
+        return entity["username"] if entity else None
+
+    def entity_for(self, email: str, username: str) -> dict:
+        """Build the index row for an email/username pair"""
+        return {
+            "PartitionKey": self.partition_for(email),
+            "RowKey": email_row_key(email),
+            "username": username,
+            "reserved_at": datetime.datetime.utcnow().isoformat()
+        }
+
+    def reserve(self, email: str, username: str, owner_exists=None) -> str:
+        """
+        Claim an email for a username
+
+        The claim is an insert, so concurrent registrations of the same email
+        cannot both succeed. An existing reservation is only taken over when
+        it is stale, i.e. older than STALE_RESERVATION_SECONDS and
+        owner_exists(username) reports that its user row was never written.
+        While rows are being migrated to sharded partitions, the legacy
+        partition is checked first since the insert cannot see it.
+
+        Args:
+            email (str): Email address to claim
+            username (str): Username that will own the email
+            owner_exists (callable): Checks whether a username has a user row
+
+        Returns:
+            str: ETag of the reservation, used to release it
+
+        Raises:
+            DuplicateEmailError: If the email belongs to another user
+        """
+        entity = self.entity_for(email, username)
+        if self.legacy_fallback and entity["PartitionKey"] != EMAIL_PARTITION_KEY:
+            try:
+                self.table_client.get_entity(partition_key=EMAIL_PARTITION_KEY, row_key=entity["RowKey"])
+                raise DuplicateEmailError(email)
+            except ResourceNotFoundError:
+                pass
+
+        try:
+            return self.table_client.create_entity(entity)["etag"]
+        except ResourceExistsError:
+            existing = self.get(email)
+            if existing is None or not self._is_stale(existing, owner_exists):
+                raise DuplicateEmailError(email)
+
+        try:
+            metadata = self.table_client.update_entity(
+                entity,
+                mode=UpdateMode.REPLACE,
+                etag=existing.metadata["etag"],
+                match_condition=MatchConditions.IfNotModified
+            )
+        except Exception:
+            # Another registration reclaimed it first
+            raise DuplicateEmailError(email)
+        return metadata["etag"]
+
+    def release(self, email: str, etag: str) -> None:
+        """
+        Drop a reservation made by reserve()
+
+        The delete is conditional on the ETag so a reservation that has since
+        been reclaimed by someone else is left alone.
+        """
+        try:
+            self.table_client.delete_entity(
+                partition_key=self.partition_for(email),
+                row_key=email_row_key(email),
+                etag=etag,
+                match_condition=MatchConditions.IfNotModified
+            )
+        except Exception as e:
+            logger.error("Error releasing email reservation: %s", e)
+
+    def _is_stale(self, entity: TableEntity, owner_exists) -> bool:
+        if owner_exists is None or not self._reservation_expired(entity):
+            return False
+        return not owner_exists(entity["username"])
+
+    @staticmethod
+    def _reservation_expired(entity: TableEntity) -> bool:
+        try:
+            reserved_at = datetime.datetime.fromisoformat(entity.get("reserved_at"))
+        except (TypeError, ValueError):
+            return False
+        return (datetime.datetime.utcnow() - reserved_at).total_seconds() > STALE_RESERVATION_SECONDS
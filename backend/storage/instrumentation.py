@@ -0,0 +1,178 @@
+"""
+Per-request storage round-trip counters
+
+CountingTableClient wraps a TableClient and records every call against the
+stats object of the current request, so a handler's storage cost can be
+asserted on (e.g. login does exactly one read and one write). Stats live in
+a context variable, which keeps them per-thread under the Flask threaded
+server and per-task under asyncio.
+
+The wrapper works for both the sync and the aio TableClient, and adds the
+time spent waiting on Azure to the request's "azure" timing span and to the
+per-operation Prometheus histogram. Query results are lazy pagers, so their
+page fetches are timed as they are iterated; the histogram records a query's
+time to its first page.
+"""
+
+import contextvars
+import inspect
+import time
+from typing import Optional
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from observability.metrics import observe_azure
+from observability.timing import span
+
+READ_OPERATIONS = ('get_entity', 'query_entities', 'list_entities')
+WRITE_OPERATIONS = ('create_entity', 'update_entity', 'upsert_entity', 'delete_entity', 'submit_transaction')
+PAGED_OPERATIONS = ('query_entities', 'list_entities')
+
+# Metric label per TableClient method; update_entity is labelled by its mode
+OPERATION_NAMES = {
+    'get_entity': 'get',
+    'query_entities': 'query',
+    'list_entities': 'list',
+    'create_entity': 'create',
+    'upsert_entity': 'upsert',
+    'delete_entity': 'delete',
+    'submit_transaction': 'transaction'
+}
+
+_request_stats = contextvars.ContextVar('storage_request_stats', default=None)
+
+
+class StorageCallStats:
+    """Storage round trips made while handling one request"""
+
+    __slots__ = ('reads', 'writes')
+
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+
+    @property
+    def total(self) -> int:
+        return self.reads + self.writes
+
+    def __repr__(self):
+        return f"reads={self.reads}, writes={self.writes}"
+
+
+def start_request_stats() -> StorageCallStats:
+    """Begin counting storage calls for the current request"""
+    stats = StorageCallStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def current_request_stats() -> Optional[StorageCallStats]:
+    """Stats of the current request, None outside of a request"""
+    return _request_stats.get()
+
+
+class CountingTableClient:
+    """TableClient proxy that counts reads and writes per request"""
+
+    def __init__(self, table_client):
+        self._table_client = table_client
+
+    def __getattr__(self, name):
+        attr = getattr(self._table_client, name)
+        if name in READ_OPERATIONS:
+            return self._counted(attr, name, 'reads')
+        if name in WRITE_OPERATIONS:
+            return self._counted(attr, name, 'writes')
+        return attr
+
+    @staticmethod
+    def _counted(method, name, kind):
+        def count(kwargs):
+            stats = _request_stats.get()
+            if stats is not None:
+                setattr(stats, kind, getattr(stats, kind) + 1)
+            if name == 'update_entity':
+                return str(kwargs.get('mode', 'merge')).rsplit('.', 1)[-1].lower()
+            return OPERATION_NAMES[name]
+
+        if inspect.iscoroutinefunction(method):
+            async def call_async(*args, **kwargs):
+                operation = count(kwargs)
+                started = time.perf_counter()
+                failed = False
+                try:
+                    with span('azure'):
+                        return await method(*args, **kwargs)
+                except ResourceNotFoundError:
+                    raise
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    observe_azure(operation, time.perf_counter() - started, failed)
+            return call_async
+
+        def call(*args, **kwargs):
+            operation = count(kwargs)
+            started = time.perf_counter()
+            failed = False
+            try:
+                with span('azure'):
+                    result = method(*args, **kwargs)
+            except ResourceNotFoundError:
+                raise
+            except Exception:
+                failed = True
+                raise
+            finally:
+                if name not in PAGED_OPERATIONS or failed:
+                    observe_azure(operation, time.perf_counter() - started, failed)
+            if hasattr(result, '__anext__') or hasattr(result, '__aiter__'):
+                return _TimedAsyncPages(result, operation)
+            if hasattr(result, '__next__'):
+                return _TimedPages(result, operation)
+            return result
+        return call
+
+
+class _TimedPages:
+    """Lazy query result whose page fetches count towards the azure span"""
+
+    def __init__(self, pager, operation):
+        self._pager = pager
+        self._operation = operation
+        self._observed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            with span('azure'):
+                return next(self._pager)
+        finally:
+            self._observe_first_page(started)
+
+    def _observe_first_page(self, started):
+        if not self._observed:
+            self._observed = True
+            observe_azure(self._operation, time.perf_counter() - started)
+
+    def __getattr__(self, name):
+        return getattr(self._pager, name)
+
+
+class _TimedAsyncPages(_TimedPages):
+    """Async variant of _TimedPages for the aio TableClient"""
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        started = time.perf_counter()
+        try:
+            with span('azure'):
+                return await self._pager.__anext__()
+        finally:
+            self._observe_first_page(started)
@@ -0,0 +1,623 @@
+"""
+In-memory stand-in for Azure Table Storage
+
+Implements the part of TableServiceClient / TableClient (sync and aio) the
+apps and scripts use: create_table, get_table_client, query_entities,
+list_entities, get_entity, create_entity, update_entity, upsert_entity,
+delete_entity and submit_transaction. It keeps Azure's semantics where the
+code relies on them:
+
+- entities come back as TableEntity with an ETag and Timestamp in metadata
+- etag + match_condition=IfNotModified fails with ResourceModifiedError
+- creating an existing entity raises ResourceExistsError, updating a
+  missing one ResourceNotFoundError
+- transactions are atomic, single-partition, at most 100 operations and
+  4 MB of entity JSON (RequestTooLargeError, 413, beyond that);
+  a failed operation raises TableTransactionError with the status code and
+  error code Azure reports for it (412 for an ETag mismatch)
+
+Every operation can be delayed by a per-operation latency plus random
+jitter, so the full request path can be load-tested on a laptop with
+realistic storage delays. Tables live in a process-wide registry shared by
+all service clients, so the sync and async clients of an app see the same
+data. Select it with STORAGE_BACKEND=memory (see create_table_service).
+"""
+
+import asyncio
+import datetime
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+from azure.data.tables import RequestTooLargeError, TableEntity, TableTransactionError, UpdateMode
+
+MAX_TRANSACTION_OPERATIONS = 100
+MAX_TRANSACTION_BYTES = 4 * 1024 * 1024
+DEFAULT_PAGE_SIZE = 1000
+
+# Status and error code of a failed operation inside a transaction
+TRANSACTION_ERRORS = {
+    ResourceExistsError: (409, 'EntityAlreadyExists'),
+    ResourceNotFoundError: (404, 'ResourceNotFound'),
+    ResourceModifiedError: (412, 'UpdateConditionNotSatisfied'),
+}
+
+# Latency keys, per TableClient method
+OPERATION_KEYS = {
+    'get_entity': 'get',
+    'query_entities': 'query',
+    'list_entities': 'query',
+    'create_entity': 'create',
+    'update_entity': 'update',
+    'upsert_entity': 'upsert',
+    'delete_entity': 'delete',
+    'submit_transaction': 'transaction'
+}
+
+
+class LatencyModel:
+    """Simulated round-trip time per operation, in milliseconds"""
+
+    def __init__(self, latency_ms: Optional[Dict[str, float]] = None, default_ms: float = 0.0,
+                 jitter_ms: float = 0.0):
+        self.latency_ms = latency_ms or {}
+        self.default_ms = default_ms
+        self.jitter_ms = jitter_ms
+
+    @classmethod
+    def parse(cls, spec: str, jitter_ms: float = 0.0) -> 'LatencyModel':
+        """
+        Build from a spec such as "10" or "get=5,query=20,transaction=30"
+
+        A bare number sets the default for every operation; key=value pairs
+        override single operations (get, query, create, update, upsert,
+        delete, transaction).
+        """
+        default_ms = 0.0
+        latency_ms = {}
+        for part in filter(None, (p.strip() for p in (spec or '').split(','))):
+            if '=' in part:
+                key, value = part.split('=', 1)
+                latency_ms[key.strip()] = float(value)
+            else:
+                default_ms = float(part)
+        return cls(latency_ms, default_ms, jitter_ms)
+
+    def delay(self, operation: str) -> float:
+        """Seconds to wait for one call of the given TableClient method"""
+        ms = self.latency_ms.get(OPERATION_KEYS.get(operation, operation), self.default_ms)
+        if self.jitter_ms:
+            ms += random.uniform(0, self.jitter_ms)
+        return ms / 1000.0
+
+
+# OData filter subset: comparisons joined by and/or/not, with parentheses
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^']|'')*')
+      | (?P<typed>(?:datetime|guid|X|binary)'[^']*')
+      | (?P<param>@\w+)
+      | (?P<paren>[()])
+      | (?P<number>-?\d+(?:\.\d+)?L?)
+      | (?P<word>[A-Za-z_][\w]*)
+    )""", re.VERBOSE)
+
+_COMPARISONS = {
+    'eq': lambda a, b: a == b,
+    'ne': lambda a, b: a != b,
+    'gt': lambda a, b: a > b,
+    'ge': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'le': lambda a, b: a <= b
+}
+
+
+def _parse_datetime(value: str) -> datetime.datetime:
+    value = value.rstrip('Z')
+    if '.' in value:
+        head, fraction = value.split('.', 1)
+        value = f"{head}.{fraction[:6]}"
+    return datetime.datetime.fromisoformat(value).replace(tzinfo=datetime.timezone.utc)
+
+
+class _Filter:
+    """Compiled query_filter, evaluated against (properties, metadata)"""
+
+    def __init__(self, query_filter: str, parameters: Optional[Dict[str, Any]] = None):
+        self.tokens = self._tokenize(query_filter or '')
+        self.parameters = parameters or {}
+        self.pos = 0
+        self.tree = self._parse_or() if self.tokens else None
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unsupported filter: {query_filter}")
+
+    @staticmethod
+    def _tokenize(text: str) -> List[Tuple[str, str]]:
+        tokens, pos = [], 0
+        text = text.strip()
+        while pos < len(text):
+            match = _TOKEN.match(text, pos)
+            if not match or match.end() == pos:
+                raise ValueError(f"Unsupported filter near: {text[pos:]}")
+            tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            pos = match.end()
+        return tokens
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _next(self):
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def _parse_or(self):
+        node = self._parse_and()
+        while self._peek() == ('word', 'or'):
+            self._next()
+            node = ('or', node, self._parse_and())
+        return node
+
+    def _parse_and(self):
+        node = self._parse_unary()
+        while self._peek() == ('word', 'and'):
+            self._next()
+            node = ('and', node, self._parse_unary())
+        return node
+
+    def _parse_unary(self):
+        if self._peek() == ('word', 'not'):
+            self._next()
+            return ('not', self._parse_unary())
+        if self._peek() == ('paren', '('):
+            self._next()
+            node = self._parse_or()
+            if self._next() != ('paren', ')'):
+                raise ValueError("Unbalanced parentheses in filter")
+            return node
+        kind, name = self._next()
+        _, op = self._next()
+        if kind != 'word' or op not in _COMPARISONS:
+            raise ValueError(f"Unsupported comparison: {name} {op}")
+        return ('cmp', name, op, self._literal(*self._next()))
+
+    def _literal(self, kind, text):
+        if kind == 'string':
+            return text[1:-1].replace("''", "'")
+        if kind == 'param':
+            return self.parameters[text[1:]]
+        if kind == 'number':
+            text = text.rstrip('L')
+            return float(text) if '.' in text else int(text)
+        if kind == 'word' and text in ('true', 'false'):
+            return text == 'true'
+        if kind == 'typed':
+            prefix, value = text.split("'", 1)
+            value = value[:-1]
+            return _parse_datetime(value) if prefix == 'datetime' else value
+        raise ValueError(f"Unsupported literal: {text}")
+
+    def matches(self, properties: Dict[str, Any], metadata: Dict[str, Any]) -> bool:
+        return self.tree is None or self._eval(self.tree, properties, metadata)
+
+    def _eval(self, node, properties, metadata) -> bool:
+        if node[0] == 'and':
+            return self._eval(node[1], properties, metadata) and self._eval(node[2], properties, metadata)
+        if node[0] == 'or':
+            return self._eval(node[1], properties, metadata) or self._eval(node[2], properties, metadata)
+        if node[0] == 'not':
+            return not self._eval(node[1], properties, metadata)
+
+        _, name, op, expected = node
+        actual = metadata['timestamp'] if name == 'Timestamp' else properties.get(name)
+        if isinstance(expected, datetime.datetime) and isinstance(actual, str):
+            try:
+                actual = _parse_datetime(actual)
+            except ValueError:
+                return False
+        if isinstance(actual, datetime.datetime) and actual.tzinfo is None:
+            actual = actual.replace(tzinfo=datetime.timezone.utc)
+        if actual is None or isinstance(actual, bool) != isinstance(expected, bool):
+            return False
+        try:
+            return _COMPARISONS[op](actual, expected)
+        except TypeError:
+            return False
+
+
+class _MemoryTable:
+    """Rows of one table; every operation runs under the table lock"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows: Dict[Tuple[str, str], Tuple[Dict[str, Any], str, datetime.datetime]] = {}
+        self.lock = threading.RLock()
+        self._last_timestamp = None
+
+    def _stamp(self) -> Tuple[str, datetime.datetime]:
+        # Timestamps only move forward, so every write gets a distinct ETag
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if self._last_timestamp is not None and now <= self._last_timestamp:
+            now = self._last_timestamp + datetime.timedelta(microseconds=1)
+        self._last_timestamp = now
+        etag = "W/\"datetime'{}'\"".format(now.strftime('%Y-%m-%dT%H%%3A%M%%3A%S.%fZ'))
+        return etag, now
+
+    @staticmethod
+    def _key(entity: Dict[str, Any]) -> Tuple[str, str]:
+        return entity['PartitionKey'], entity['RowKey']
+
+    @staticmethod
+    def _entity(properties: Dict[str, Any], etag: str, timestamp, select=None) -> TableEntity:
+        if select:
+            properties = {k: v for k, v in properties.items() if k in select}
+        entity = TableEntity(properties)
+        entity._metadata = {'etag': etag, 'timestamp': timestamp}
+        return entity
+
+    def _check_etag(self, key, etag, match_condition):
+        if match_condition == MatchConditions.IfNotModified:
+            current = self.rows.get(key)
+            if current is None:
+                raise ResourceNotFoundError("The specified resource does not exist.")
+            if current[1] != etag:
+                raise ResourceModifiedError("The update condition specified in the request was not satisfied.")
+
+    def get(self, partition_key: str, row_key: str, select=None) -> TableEntity:
+        with self.lock:
+            row = self.rows.get((partition_key, row_key))
+            if row is None:
+                raise ResourceNotFoundError("The specified resource does not exist.")
+            return self._entity(dict(row[0]), row[1], row[2], select)
+
+    def query(self, query_filter: str, parameters=None, select=None) -> List[TableEntity]:
+        compiled = _Filter(query_filter, parameters)
+        with self.lock:
+            rows = sorted(self.rows.items())
+            return [
+                self._entity(dict(props), etag, timestamp, select)
+                for _, (props, etag, timestamp) in rows
+                if compiled.matches(props, {'timestamp': timestamp})
+            ]
+
+    def create(self, entity: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            key = self._key(entity)
+            if key in self.rows:
+                raise ResourceExistsError("The specified entity already exists.")
+            etag, timestamp = self._stamp()
+            self.rows[key] = (dict(entity), etag, timestamp)
+            return {'etag': etag, 'date': timestamp}
+
+    def update(self, entity: Dict[str, Any], mode=UpdateMode.MERGE, etag=None, match_condition=None,
+               upsert=False) -> Dict[str, Any]:
+        with self.lock:
+            key = self._key(entity)
+            self._check_etag(key, etag, match_condition)
+            current = self.rows.get(key)
+            if current is None and not upsert:
+                raise ResourceNotFoundError("The specified resource does not exist.")
+            if current is not None and mode == UpdateMode.MERGE:
+                properties = dict(current[0])
+                properties.update(entity)
+            else:
+                properties = dict(entity)
+            new_etag, timestamp = self._stamp()
+            self.rows[key] = (properties, new_etag, timestamp)
+            return {'etag': new_etag, 'date': timestamp}
+
+    def delete(self, partition_key: str, row_key: str, etag=None, match_condition=None) -> None:
+        with self.lock:
+            key = (partition_key, row_key)
+            if key not in self.rows:
+                return  # Like the SDK, deleting a missing entity succeeds
+            self._check_etag(key, etag, match_condition)
+            del self.rows[key]
+
+    def transaction(self, operations: Iterable) -> List[Dict[str, Any]]:
+        operations = list(operations)
+        if len(operations) > MAX_TRANSACTION_OPERATIONS:
+            raise TableTransactionError(message="The batch request contains too many operations.")
+        if len({op[1]['PartitionKey'] for op in operations}) > 1:
+            raise TableTransactionError(message="All entities in a transaction must share one PartitionKey.")
+        # Only the entity bodies are counted; the real payload adds multipart framing
+        payload = sum(len(json.dumps(op[1], default=str).encode('utf-8')) for op in operations)
+        if payload > MAX_TRANSACTION_BYTES:
+            error = RequestTooLargeError(message="The batch request body is larger than 4 MB.")
+            error.status_code, error.error_code = 413, 'RequestBodyTooLarge'
+            raise error
+
+        for operation in operations:
+            if operation[0] not in ('create', 'update', 'upsert', 'delete'):
+                raise ValueError(f"Unknown transaction operation: {operation[0]}")
+
+        with self.lock:
+            snapshot = dict(self.rows)
+            results = []
+            for index, operation in enumerate(operations):
+                action, entity = operation[0], operation[1]
+                kwargs = operation[2] if len(operation) > 2 else {}
+                try:
+                    if action == 'create':
+                        results.append(self.create(entity))
+                    elif action == 'update':
+                        results.append(self.update(entity, **kwargs))
+                    elif action == 'upsert':
+                        results.append(self.update(entity, upsert=True, **kwargs))
+                    else:
+                        self.delete(entity['PartitionKey'], entity['RowKey'], **kwargs)
+                        results.append({})
+                except (ResourceExistsError, ResourceNotFoundError, ResourceModifiedError) as e:
+                    self.rows = snapshot
+                    error = TableTransactionError(message=f"{index}:{e.message}", index=index)
+                    error.status_code, error.error_code = TRANSACTION_ERRORS[type(e)]
+                    raise error
+            return results
+
+
+class _Pager:
+    """Lazy query result like ItemPaged: the round trip happens on first use"""
+
+    def __init__(self, load, results_per_page: Optional[int] = None):
+        self._load_entities = load
+        self._page_size = results_per_page or DEFAULT_PAGE_SIZE
+        self._entities = None
+        self._iter = None
+
+    def _load(self) -> List[TableEntity]:
+        if self._entities is None:
+            self._entities = self._load_entities()
+            self._iter = iter(self._entities)
+        return self._entities
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self._load()
+        return next(self._iter)
+
+    def by_page(self, continuation_token=None):
+        entities = self._load()
+        return iter([
+            iter(entities[i:i + self._page_size])
+            for i in range(0, len(entities), self._page_size)
+        ])
+
+
+class InMemoryTableClient:
+    """Thread-safe in-memory TableClient"""
+
+    def __init__(self, table: _MemoryTable, latency: Optional[LatencyModel] = None):
+        self._table = table
+        self.table_name = table.name
+        self.latency = latency or LatencyModel()
+
+    def _wait(self, operation: str) -> None:
+        delay = self.latency.delay(operation)
+        if delay > 0:
+            time.sleep(delay)
+
+    def get_entity(self, partition_key: str, row_key: str, **kwargs) -> TableEntity:
+        self._wait('get_entity')
+        return self._table.get(partition_key, row_key, kwargs.get('select'))
+
+    def query_entities(self, query_filter: str, **kwargs) -> _Pager:
+        def load():
+            self._wait('query_entities')
+            return self._table.query(query_filter, kwargs.get('parameters'), kwargs.get('select'))
+        return _Pager(load, kwargs.get('results_per_page'))
+
+    def list_entities(self, **kwargs) -> _Pager:
+        def load():
+            self._wait('list_entities')
+            return self._table.query('', select=kwargs.get('select'))
+        return _Pager(load, kwargs.get('results_per_page'))
+
+    def create_entity(self, entity: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        self._wait('create_entity')
+        return self._table.create(entity)
+
+    def update_entity(self, entity: Dict[str, Any], mode=UpdateMode.MERGE, **kwargs) -> Dict[str, Any]:
+        self._wait('update_entity')
+        return self._table.update(entity, mode, kwargs.get('etag'), kwargs.get('match_condition'))
+
+    def upsert_entity(self, entity: Dict[str, Any], mode=UpdateMode.MERGE, **kwargs) -> Dict[str, Any]:
+        self._wait('upsert_entity')
+        return self._table.update(entity, mode, upsert=True)
+
+    def delete_entity(self, *args, **kwargs) -> None:
+        self._wait('delete_entity')
+        self._table.delete(*_delete_key(args, kwargs), kwargs.get('etag'), kwargs.get('match_condition'))
+
+    def submit_transaction(self, operations, **kwargs) -> List[Dict[str, Any]]:
+        self._wait('submit_transaction')
+        return self._table.transaction(operations)
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncInMemoryTableClient(InMemoryTableClient):
+    """In-memory TableClient with the azure.data.tables.aio interface"""
+
+    async def _wait_async(self, operation: str) -> None:
+        delay = self.latency.delay(operation)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def get_entity(self, partition_key: str, row_key: str, **kwargs) -> TableEntity:
+        await self._wait_async('get_entity')
+        return self._table.get(partition_key, row_key, kwargs.get('select'))
+
+    def query_entities(self, query_filter: str, **kwargs) -> '_AsyncQuery':
+        # Like AsyncItemPaged, the round trip happens on first iteration
+        return _AsyncQuery(self, lambda: self._table.query(query_filter, kwargs.get('parameters'),
+                                                           kwargs.get('select')), kwargs.get('results_per_page'))
+
+    def list_entities(self, **kwargs) -> '_AsyncQuery':
+        return _AsyncQuery(self, lambda: self._table.query('', select=kwargs.get('select')),
+                           kwargs.get('results_per_page'))
+
+    async def create_entity(self, entity: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        await self._wait_async('create_entity')
+        return self._table.create(entity)
+
+    async def update_entity(self, entity: Dict[str, Any], mode=UpdateMode.MERGE, **kwargs) -> Dict[str, Any]:
+        await self._wait_async('update_entity')
+        return self._table.update(entity, mode, kwargs.get('etag'), kwargs.get('match_condition'))
+
+    async def upsert_entity(self, entity: Dict[str, Any], mode=UpdateMode.MERGE, **kwargs) -> Dict[str, Any]:
+        await self._wait_async('upsert_entity')
+        return self._table.update(entity, mode, upsert=True)
+
+    async def delete_entity(self, *args, **kwargs) -> None:
+        await self._wait_async('delete_entity')
+        self._table.delete(*_delete_key(args, kwargs), kwargs.get('etag'), kwargs.get('match_condition'))
+
+    async def submit_transaction(self, operations, **kwargs) -> List[Dict[str, Any]]:
+        await self._wait_async('submit_transaction')
+        return self._table.transaction(operations)
+
+    async def close(self) -> None:
+        pass
+
+
+class _AsyncQuery:
+    """Lazy async query like AsyncItemPaged: waits out the latency on first use"""
+
+    def __init__(self, client: AsyncInMemoryTableClient, run, results_per_page=None):
+        self._client = client
+        self._run = run
+        self._page_size = results_per_page or DEFAULT_PAGE_SIZE
+        self._entities = None
+        self._iter = None
+
+    async def _load(self) -> List[TableEntity]:
+        if self._entities is None:
+            await self._client._wait_async('query_entities')
+            self._entities = self._run()
+            self._iter = iter(self._entities)
+        return self._entities
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self._load()
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    def by_page(self, continuation_token=None):
+        return _AsyncPages(self)
+
+
+class _AsyncPages:
+    """Async iterator of pages for _AsyncQuery.by_page()"""
+
+    def __init__(self, query: _AsyncQuery):
+        self._query = query
+        self._pages = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._pages is None:
+            entities = await self._query._load()
+            size = self._query._page_size
+            self._pages = iter([entities[i:i + size] for i in range(0, len(entities), size)])
+        try:
+            return _AsyncPage(next(self._pages))
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _AsyncPage:
+    """One page of an async query, itself async-iterable"""
+
+    def __init__(self, entities: List[TableEntity]):
+        self._iter = iter(entities)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _delete_key(args, kwargs) -> Tuple[str, str]:
+    """(partition_key, row_key) from any of delete_entity's call forms"""
+    if args and isinstance(args[0], dict):
+        return args[0]['PartitionKey'], args[0]['RowKey']
+    if 'entity' in kwargs:
+        return kwargs['entity']['PartitionKey'], kwargs['entity']['RowKey']
+    if len(args) >= 2:
+        return args[0], args[1]
+    return kwargs['partition_key'], kwargs['row_key']
+
+
+class InMemoryTableServiceClient:
+    """TableServiceClient over the process-wide in-memory tables"""
+
+    _tables: Dict[str, _MemoryTable] = {}
+    _tables_lock = threading.Lock()
+    client_class = InMemoryTableClient
+
+    def __init__(self, latency: Optional[LatencyModel] = None):
+        self.latency = latency or LatencyModel()
+
+    def _table(self, table_name: str, create: bool = False) -> _MemoryTable:
+        with self._tables_lock:
+            if table_name not in self._tables:
+                if not create:
+                    raise ResourceNotFoundError(f"Table {table_name} does not exist.")
+                self._tables[table_name] = _MemoryTable(table_name)
+            return self._tables[table_name]
+
+    def create_table(self, table_name: str, **kwargs):
+        with self._tables_lock:
+            if table_name in self._tables:
+                raise ResourceExistsError(f"Table {table_name} already exists.")
+        self._table(table_name, create=True)
+        return self.get_table_client(table_name)
+
+    def create_table_if_not_exists(self, table_name: str, **kwargs):
+        self._table(table_name, create=True)
+        return self.get_table_client(table_name)
+
+    def delete_table(self, table_name: str, **kwargs) -> None:
+        with self._tables_lock:
+            self._tables.pop(table_name, None)
+
+    def get_table_client(self, table_name: str, **kwargs):
+        # Like the SDK, the client is created even if the table does not exist yet
+        return self.client_class(self._table(table_name, create=True), self.latency)
+
+    @classmethod
+    def reset(cls) -> None:
+        """Drop every in-memory table"""
+        with cls._tables_lock:
+            cls._tables.clear()
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncInMemoryTableServiceClient(InMemoryTableServiceClient):
+    """Async TableServiceClient over the same in-memory tables"""
+
+    client_class = AsyncInMemoryTableClient
+
+    async def close(self) -> None:
+        pass
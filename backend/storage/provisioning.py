@@ -0,0 +1,93 @@
+"""
+Lazy, once-per-process table provisioning
+
+The apps used to call create_table for every table at import, a blocking
+round trip per table before the process could answer anything, repeated in
+every worker. TableProvisioner runs those calls on first need instead: the
+first request that touches storage, or a background thread started by the
+readiness probe or the app's startup hook. Liveness never waits for it.
+
+With STORAGE_TABLES_PROVISIONED=true the tables are assumed to exist (created
+by deployment tooling) and no call is made at all.
+"""
+
+import logging
+import os
+import threading
+from typing import Iterable, Optional
+
+from azure.core.exceptions import ResourceExistsError
+
+logger = logging.getLogger('ai_school.provisioning')
+
+
+class TableProvisioner:
+    """Creates the app's tables at most once per process"""
+
+    def __init__(self, service, table_names: Iterable[str], skip: bool = False):
+        self.service = service
+        self.table_names = tuple(table_names)
+        self.skip = skip
+        self.error: Optional[str] = None
+        self._ready = False
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def ensure(self) -> None:
+        """
+        Create any missing tables unless that already happened in this process
+
+        A forked worker inherits the parent's result; a failure is raised
+        and retried by the next call.
+        """
+        if self._ready:
+            return
+        if self._pid != os.getpid():
+            # Forked worker: a provisioning thread of the parent did not come along
+            self._reset()
+
+        with self._lock:
+            if self._ready:
+                return
+            if self.skip:
+                logger.info("Tables assumed provisioned: %s", ', '.join(self.table_names))
+            else:
+                try:
+                    for table_name in self.table_names:
+                        try:
+                            self.service.create_table(table_name)
+                            logger.info("Created table '%s'", table_name)
+                        except ResourceExistsError:
+                            logger.debug("Table '%s' already exists", table_name)
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    logger.error("Table provisioning failed: %s", self.error)
+                    raise
+            self.error = None
+            self._ready = True
+
+    def start(self) -> None:
+        """Provision on a background thread, if not ready and not already running"""
+        if self._ready:
+            return
+        if self._pid != os.getpid():
+            self._reset()
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='table-provisioning', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            self.ensure()
+        except Exception:
+            pass  # Recorded in self.error and logged; the next probe or request retries
@@ -0,0 +1,41 @@
+"""
+Hash-sharded partition keys
+
+A single Azure Table partition serves roughly 2,000 entities/sec. Spreading
+rows over several partitions derived from a stable hash of the RowKey lifts
+that ceiling while keeping every lookup a point read, since the partition
+can always be recomputed from the key alone.
+"""
+
+import zlib
+
+
+def shard_partition(prefix: str, row_key: str, shards: int) -> str:
+    """
+    Compute the PartitionKey for a row
+
+    crc32 is used rather than hash() because it is stable across processes
+    and Python versions.
+
+    Args:
+        prefix (str): Partition prefix, also the legacy unsharded partition
+        row_key (str): RowKey of the row
+        shards (int): Number of partitions, 1 disables sharding
+
+    Returns:
+        str: "<prefix>" when unsharded, "<prefix>-<shard>" otherwise
+    """
+    if shards <= 1:
+        return prefix
+    shard = zlib.crc32(row_key.encode('utf-8')) % shards
+    return f"{prefix}-{shard:0{len(str(shards - 1))}d}"
+
+
+def partition_range_filter(prefix: str) -> str:
+    """
+    OData filter matching the legacy partition and every shard of a prefix
+
+    '.' sorts right after '-', so [prefix, prefix + '.') covers "<prefix>"
+    and "<prefix>-*" without touching unrelated partitions.
+    """
+    return f"PartitionKey ge '{prefix}' and PartitionKey lt '{prefix}.'"
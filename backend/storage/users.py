@@ -0,0 +1,150 @@
+"""
+User storage access layer for Azure Table Storage
+
+FastAPI users are keyed by username. Every row lives in a partition that can
+be computed from the username alone, so lookups are issued as point reads
+(PartitionKey + RowKey) instead of filter queries that Azure answers with a
+full table scan.
+
+With sharding enabled, rows are spread over "User-<n>" partitions. While
+migrate_user_partitions.py is moving existing rows, reads and merges fall
+back to the legacy "User" partition for rows that have not moved yet.
+
+An optional TTLCache serves repeated reads; every write made through the
+store invalidates the username it touches.
+"""
+
+from typing import Any, Dict, Optional
+
+from azure.core.exceptions import ResourceNotFoundError
+from azure.data.tables import TableClient, TableEntity, UpdateMode
+
+from .cache import TTLCache
+from .emails import EmailIndex
+from .sharding import shard_partition
+
+# Legacy partition of every user row, and prefix of the sharded partitions
+USER_PARTITION_KEY = "User"
+
+
+class UserStore:
+    """Username-keyed access to the users table"""
+
+    def __init__(self, table_client: TableClient, email_index: Optional[EmailIndex] = None,
+                 shards: int = 1, legacy_fallback: bool = False, cache: Optional[TTLCache] = None):
+        self.table_client = table_client
+        self.email_index = email_index
+        self.cache = cache
+        self.shards = shards
+        self.legacy_fallback = legacy_fallback and shards > 1
+
+    def partition_for(self, username: str) -> str:
+        """
+        Compute the PartitionKey of a user row
+
+        Args:
+            username (str): Username (RowKey)
+
+        Returns:
+            str: PartitionKey holding the user row
+        """
+        return shard_partition(USER_PARTITION_KEY, username, self.shards)
+
+    def get(self, username: str) -> Optional[TableEntity]:
+        """
+        Point-read a user by username
+
+        Args:
+            username (str): Username (RowKey)
+
+        Returns:
+            Optional[TableEntity]: User entity if found, None otherwise
+        """
+        if self.cache is not None:
+            entity = self.cache.get(username)
+            if entity is not None:
+                return entity
+
+        entity = self._read(username)
+        if entity is not None and self.cache is not None:
+            self.cache.set(username, entity)
+        return entity
+
+    def _read(self, username: str) -> Optional[TableEntity]:
+        try:
+            return self.table_client.get_entity(
+                partition_key=self.partition_for(username),
+                row_key=username
+            )
+        except ResourceNotFoundError:
+            if not self.legacy_fallback:
+                return None
+
+        try:
+            return self.table_client.get_entity(partition_key=USER_PARTITION_KEY, row_key=username)
+        except ResourceNotFoundError:
+            return None
+
+    def invalidate(self, username: str) -> None:
+        """Drop a cached user after it was written outside the store"""
+        if self.cache is not None:
+            self.cache.invalidate(username)
+
+    def exists(self, username: str) -> bool:
+        """Check whether a username is taken"""
+        return self.get(username) is not None
+
+    def create(self, entity: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert a new user row
+
+        The PartitionKey is derived from the RowKey, callers only set RowKey.
+        When an email index is attached, the email is reserved first and the
+        reservation is released again if the user row cannot be written.
+
+        Args:
+            entity (Dict): User entity with RowKey set to the username
+
+        Returns:
+            Dict: The stored entity
+
+        Raises:
+            DuplicateEmailError: If the email is already registered
+            ResourceExistsError: If the username is already taken
+        """
+        username = entity["RowKey"]
+        entity["PartitionKey"] = self.partition_for(username)
+        if self.email_index is None:
+            self.table_client.create_entity(entity)
+            self.invalidate(username)
+            return entity
+
+        etag = self.email_index.reserve(entity["email"], username, owner_exists=self.exists)
+        try:
+            self.table_client.create_entity(entity)
+        except Exception:
+            self.email_index.release(entity["email"], etag)
+            raise
+        self.invalidate(username)
+        return entity
+
+    def merge(self, username: str, properties: Dict[str, Any]) -> None:
+        """
+        Merge properties into an existing user row without reading it first
+
+        Args:
+            username (str): Username (RowKey)
+            properties (Dict): Properties to write
+        """
+        entity = dict(properties)
+        entity["PartitionKey"] = self.partition_for(username)
+        entity["RowKey"] = username
+        try:
+            self.table_client.update_entity(entity, mode=UpdateMode.MERGE)
+        except ResourceNotFoundError:
+            if not self.legacy_fallback:
+                raise
+            entity["PartitionKey"] = USER_PARTITION_KEY
+            self.table_client.update_entity(entity, mode=UpdateMode.MERGE)
+        finally:
+            self.invalidate(username)
@@ -0,0 +1,149 @@
+"""
+Write-behind queue for non-critical entity updates
+
+Timestamps such as last_login do not need to be durable before the response
+is sent. Handlers enqueue a merge instead of writing it; repeated updates of
+the same entity are coalesced, and a background thread flushes them on a
+timer or once enough are pending, as one entity group transaction per
+partition (up to 100 entities each). Callbacks passed as on_flushed run
+once the entity's batch has been written, for example to drop a cached
+copy that would otherwise miss the update.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional
+
+from azure.core.exceptions import ResourceNotFoundError
+from azure.data.tables import TableTransactionError, UpdateMode
+
+logger = logging.getLogger('ai_school.write_behind')
+
+BATCH_SIZE = 100  # Azure limit for a single entity group transaction
+
+
+class WriteBehindQueue:
+    """Coalescing, batching background writer for merge updates"""
+
+    def __init__(self, flush_interval: float = 2.0, max_pending: int = 500):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._reset()
+        atexit.register(self.stop)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = {}
+        self._thread = None
+        self._stopping = False
+
+    def merge(self, table_client, partition_key: str, row_key: str, properties: Dict[str, Any],
+              on_flushed: Optional[Callable[[], None]] = None) -> None:
+        """
+        Queue a merge of properties into an existing entity
+
+        Args:
+            table_client: TableClient of the entity's table
+            partition_key (str): PartitionKey of the entity
+            row_key (str): RowKey of the entity
+            properties (Dict): Properties to merge; later values win
+            on_flushed (Callable): Called after the merge was written (or failed to be)
+        """
+        if self._pid != os.getpid():
+            # Forked worker: the parent's thread and lock did not come along
+            self._reset()
+
+        with self._lock:
+            key = (table_client, partition_key, row_key)
+            pending_properties, callbacks = self._pending.setdefault(key, ({}, []))
+            pending_properties.update(properties)
+            if on_flushed is not None:
+                callbacks.append(on_flushed)
+            pending = len(self._pending)
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        """Number of entities waiting to be written"""
+        return len(self._pending)
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all pending updates now"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        by_partition = defaultdict(list)
+        for (table_client, partition_key, row_key), (properties, callbacks) in pending.items():
+            entity = dict(properties)
+            entity['PartitionKey'] = partition_key
+            entity['RowKey'] = row_key
+            by_partition[(table_client, partition_key)].append((entity, callbacks))
+
+        for (table_client, _), queued in by_partition.items():
+            for i in range(0, len(queued), BATCH_SIZE):
+                batch = queued[i:i + BATCH_SIZE]
+                self._write_batch(table_client, [entity for entity, _ in batch])
+                self._run_callbacks(batch)
+        logger.debug("Write-behind flushed %d entities", len(pending))
+
+    @staticmethod
+    def _run_callbacks(batch):
+        for entity, callbacks in batch:
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error("Write-behind callback for %s/%s failed: %s",
+                                 entity['PartitionKey'], entity['RowKey'], e)
+
+    def _write_batch(self, table_client, entities):
+        try:
+            table_client.submit_transaction(
+                [('update', entity, {'mode': UpdateMode.MERGE}) for entity in entities]
+            )
+            return
+        except TableTransactionError:
+            # One missing entity fails the whole batch, write the rest one by one
+            pass
+        except Exception as e:
+            logger.error("Write-behind batch failed: %s", e)
+
+        for entity in entities:
+            try:
+                table_client.update_entity(entity, mode=UpdateMode.MERGE)
+            except ResourceNotFoundError:
+                logger.warning("Write-behind skipped missing entity %s/%s",
+                               entity['PartitionKey'], entity['RowKey'])
+            except Exception as e:
+                logger.error("Write-behind update of %s/%s failed: %s",
+                             entity['PartitionKey'], entity['RowKey'], e)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the background thread and drain everything still queued"""
+        if self._pid != os.getpid():
+            # Inherited from the parent process, which drains its own copy
+            return
+        self._stopping = True
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self.flush()
@@ -62,6 +62,13 @@ def test_login():
         result = response.json()
         print(f"   Response: {json.dumps(result, indent=2)}")
         
+        # Login costs at most one storage read (none on a user cache hit);
+        # last_login is written behind
+        storage_calls = response.headers.get('X-Storage-Calls')
+        print(f"   Storage calls: {storage_calls}")
+        if response.status_code == 200 and storage_calls not in ("reads=1, writes=0", "reads=0, writes=0"):
+            print("   ⚠ Unexpected number of storage round trips for login")
+        
         if response.status_code == 200:
             return result.get('token')
         return None
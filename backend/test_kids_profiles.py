@@ -167,6 +167,23 @@ def test_kids_profiles_api():
     except Exception as e:
         print(f"   ❌ Error: {e}")
     
+    # Step 6b: Conditional GET with the list's ETag as a weak validator
+    print("\n6b. 🔁 Testing GET /api/profiles with If-None-Match: W/<etag>...")
+    try:
+        response = requests.get(f"{BASE_URL}/profiles", headers=headers)
+        etag = response.headers.get('ETag', '').removeprefix('W/')
+        weak_headers = {**headers, "If-None-Match": f"W/{etag}"}
+        response = requests.get(f"{BASE_URL}/profiles", headers=weak_headers)
+        print(f"   Status Code: {response.status_code}")
+        
+        if response.status_code == 304:
+            print(f"   ✅ SUCCESS! Weak validator matched, not modified")
+        else:
+            print(f"   ❌ FAILED - Expected 304, got {response.status_code}")
+            
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+    
     # Step 7: Get specific kid profile
     if kid1_id:
         print(f"\n7. 👧 Testing GET /api/profiles/{kid1_id} (Get specific profile)...")
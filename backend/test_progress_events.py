@@ -0,0 +1,106 @@
+"""
+Test script for batched progress event ingestion
+Uploads large progress documents for many kids in one request, so the server
+has to split the write into several entity group transactions (Azure caps
+each at 100 operations and 4 MB)
+"""
+
+import requests
+import json
+
+BASE_URL = "http://localhost:5000/api"
+KIDS = 120
+PROGRESS_CHARS = 30000  # just under the 32K limit of the progress property
+
+def big_progress(i):
+    """A progress patch of about PROGRESS_CHARS characters, with text that needs escaping"""
+    return {"notes": "é\"" * (PROGRESS_CHARS // 3) + str(i)}
+
+def test_progress_events_api():
+    """Test POST /api/progress/events with a payload larger than one transaction"""
+    print("🧪 Testing AI School Progress Events API")
+    print("=" * 60)
+
+    # Step 1: Get authentication token
+    print("\n1. Getting Authentication Token...")
+    user_data = {
+        "email": "events@aischool.com",
+        "password": "password123",
+        "full_name": "Events Parent"
+    }
+    try:
+        response = requests.post(f"{BASE_URL}/auth/register", json=user_data)
+        if response.status_code == 409:
+            login_data = {"email": user_data["email"], "password": user_data["password"]}
+            response = requests.post(f"{BASE_URL}/auth/login", json=login_data)
+        token = response.json().get('token')
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+        return False
+
+    if not token:
+        print("   ❌ Could not get authentication token!")
+        return False
+
+    print(f"   ✓ Got token: {token[:20]}...")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Step 2: Create the kids
+    print(f"\n2. 👶 Creating {KIDS} kid profiles...")
+    kid_ids = []
+    for i in range(KIDS):
+        response = requests.post(f"{BASE_URL}/profiles", json={"name": f"Kid {i}", "age": 7}, headers=headers)
+        if response.status_code != 201:
+            print(f"   ❌ FAILED - Status: {response.status_code}")
+            print(f"   Response: {response.json()}")
+            return False
+        kid_ids.append(response.json()['profile']['id'])
+    print(f"   ✓ Created {len(kid_ids)} profiles")
+
+    # Step 3: One request with a large progress document for every kid
+    events = [
+        {"profile_id": kid_id, "occurred_at": "2024-05-01T10:00:00Z", "progress": big_progress(i)}
+        for i, kid_id in enumerate(kid_ids)
+    ]
+    body = json.dumps({"events": events})
+    print(f"\n3. 📈 Testing POST /api/progress/events ({len(events)} events, {len(body) // 1024} KB)...")
+    try:
+        response = requests.post(f"{BASE_URL}/progress/events", data=body,
+                                 headers={**headers, "Content-Type": "application/json"})
+        print(f"   Status Code: {response.status_code}")
+
+        result = response.json()
+        if response.status_code == 200 and len(result['updated']) == KIDS:
+            print(f"   ✅ SUCCESS! {result['accepted']} events, {len(result['updated'])} profiles updated")
+        else:
+            print(f"   ❌ FAILED - Status: {response.status_code}")
+            print(f"   Response: {json.dumps(result)[:500]}")
+
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+
+    # Step 4: Read one back
+    print(f"\n4. 🔍 Testing GET /api/profiles/{kid_ids[5]}/progress...")
+    try:
+        response = requests.get(f"{BASE_URL}/profiles/{kid_ids[5]}/progress", headers=headers)
+        print(f"   Status Code: {response.status_code}")
+
+        if response.status_code == 200 and json.loads(response.json()['progress']) == big_progress(5):
+            print(f"   ✅ SUCCESS! Progress stored intact")
+        else:
+            print(f"   ❌ FAILED - Progress differs from what was sent")
+
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+
+    # Step 5: Clean up
+    print(f"\n5. 🗑️ Deleting the {len(kid_ids)} test profiles...")
+    for kid_id in kid_ids:
+        requests.delete(f"{BASE_URL}/profiles/{kid_id}", headers=headers)
+    print(f"   ✓ Done")
+
+    print("\n" + "=" * 60)
+    print("🎉 Progress Events API Testing Complete!")
+
+if __name__ == "__main__":
+    test_progress_events_api()
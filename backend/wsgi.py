@@ -0,0 +1,20 @@
+"""
+WSGI entry point for the Flask app under a production server
+
+    gunicorn -c gunicorn.conf.py
+
+gunicorn.conf.py preloads this module in the master process, so storage
+clients, caches and compiled code are built once and shared with the forked
+workers copy-on-write.
+"""
+
+import gc
+
+from app import create_app
+
+application = create_app()
+
+# Everything allocated so far lives for the life of the process. Moving it to
+# the permanent generation keeps the cyclic GC from scanning it, and from
+# touching (and so copying) the shared pages in every worker.
+gc.freeze()
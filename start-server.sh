@@ -14,6 +14,13 @@ if [ ! -f ".env" ]; then
     exit 1
 fi
 
+# ./start-server.sh --dev runs the single-process development server
+if [ "$1" = "--dev" ]; then
+    echo "Starting development server..."
+    echo
+    exec python app.py
+fi
+
 echo "Starting server..."
 echo
-python app.py
+exec gunicorn -c gunicorn.conf.py